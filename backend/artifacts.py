@@ -0,0 +1,155 @@
+"""Memory-mappable model artifacts: one uncompressed .npy per array plus manifest.json.
+
+Every worker process that opens the directory maps the same files read-only, so
+N workers share one page-cache copy of the forest and the test set instead of
+each unpickling its own.
+
+Usage:
+    python artifacts.py model.pkl X_test.pkl y_test.pkl out_dir   # convert the pickles
+    python artifacts.py --verify out_dir                           # check the checksums
+"""
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import joblib
+
+from forest_export import FlatForest, flatten_forest
+from ingest import file_digest
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes', 'max_depth', 'is_leaf')
+
+
+def write_artifacts(out_dir, model, X_test=None, y_test=None):
+    """Write model (a fitted forest or a FlatForest) and optionally the test set to out_dir; returns the manifest.
+
+    Running servers may have the current files memory-mapped, so the new set is
+    written beside out_dir and swapped in by rename instead of over them.
+    """
+    out_dir = os.path.normpath(out_dir)
+    staged = f'{out_dir}.new-{os.getpid()}'
+    shutil.rmtree(staged, ignore_errors=True)
+    os.makedirs(staged)
+    try:
+        manifest = _write(staged, model, X_test, y_test)
+    except BaseException:
+        shutil.rmtree(staged, ignore_errors=True)
+        raise
+    swap_in(staged, out_dir)
+    return manifest
+
+
+def swap_in(staged, out_dir):
+    """Replace the artifact directory out_dir with the complete directory staged."""
+    if os.path.exists(out_dir):
+        retired = f'{out_dir}.old-{os.getpid()}'
+        os.replace(out_dir, retired)
+        os.replace(staged, out_dir)
+        # Open maps keep the unlinked files alive until their readers reload
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staged, out_dir)
+
+
+def _write(out_dir, model, X_test, y_test):
+    arrays = dict(model.arrays()) if isinstance(model, FlatForest) else flatten_forest(model)
+    feature_columns = [str(name) for name in arrays.pop('feature_names', [])]
+    arrays['is_leaf'] = arrays['left'] == np.arange(len(arrays['left']))
+    if X_test is not None:
+        if hasattr(X_test, 'columns'):
+            if feature_columns:
+                X_test = X_test[feature_columns]
+            else:
+                feature_columns = [str(name) for name in X_test.columns]
+        # Trees compare in float32, so the test features are stored that way
+        arrays['X_test'] = np.asarray(X_test, dtype=np.float32)
+    if y_test is not None:
+        arrays['y_test'] = np.asarray(y_test).astype(np.int8)
+
+    entries = {}
+    for name, array in arrays.items():
+        path = os.path.join(out_dir, f'{name}.npy')
+        # np.save pads the header so the data starts on a 64-byte boundary.
+        # ascontiguousarray would turn 0-d scalars (max_depth) into shape (1,)
+        array = np.asarray(array) if np.ndim(array) == 0 else np.ascontiguousarray(array)
+        np.save(path, array, allow_pickle=False)
+        entries[name] = {
+            'file': f'{name}.npy',
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'sha256': file_digest(path)
+        }
+    manifest = {
+        'formatVersion': FORMAT_VERSION,
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'featureColumns': feature_columns,
+        'classes': arrays['classes'].tolist(),
+        'nEstimators': int(len(arrays['roots'])),
+        'nNodes': int(len(arrays['feature'])),
+        'arrays': entries
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(artifact_dir):
+    with open(os.path.join(artifact_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('formatVersion') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('formatVersion')} in {artifact_dir}")
+    return manifest
+
+
+def verify_artifacts(artifact_dir):
+    """Raise ValueError if any array file does not match its manifest checksum."""
+    manifest = read_manifest(artifact_dir)
+    for name, entry in manifest['arrays'].items():
+        if file_digest(os.path.join(artifact_dir, entry['file'])) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {name} in {artifact_dir}")
+    return manifest
+
+
+def _open(artifact_dir, manifest, name):
+    entry = manifest['arrays'][name]
+    array = np.load(os.path.join(artifact_dir, entry['file']), mmap_mode='r', allow_pickle=False)
+    if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+        raise ValueError(f"{name} in {artifact_dir} does not match its manifest entry")
+    return array
+
+
+def load_forest(artifact_dir, verify=False):
+    """FlatForest whose node arrays are read-only memory maps of the artifact files."""
+    manifest = verify_artifacts(artifact_dir) if verify else read_manifest(artifact_dir)
+    # n_features is optional so artifacts written before it was stored still load
+    names = FOREST_ARRAYS + tuple(name for name in ('n_features',) if name in manifest['arrays'])
+    arrays = {name: _open(artifact_dir, manifest, name) for name in names}
+    return FlatForest.from_arrays(dict(arrays, feature_names=manifest['featureColumns'] or None))
+
+
+def load_test_set(artifact_dir):
+    manifest = read_manifest(artifact_dir)
+    if 'X_test' not in manifest['arrays'] or 'y_test' not in manifest['arrays']:
+        raise FileNotFoundError(f"No test set stored in {artifact_dir}")
+    return _open(artifact_dir, manifest, 'X_test'), _open(artifact_dir, manifest, 'y_test')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--verify':
+        manifest = verify_artifacts(sys.argv[2])
+        print(f"{len(manifest['arrays'])} arrays in {sys.argv[2]} match the manifest")
+    elif len(sys.argv) == 5:
+        model_path, x_test_path, y_test_path, out_dir = sys.argv[1:]
+        manifest = write_artifacts(out_dir, joblib.load(model_path), joblib.load(x_test_path),
+                                   joblib.load(y_test_path))
+        size = sum(os.path.getsize(os.path.join(out_dir, entry['file'])) for entry in manifest['arrays'].values())
+        print(f"Wrote {manifest['nEstimators']} trees / {manifest['nNodes']} nodes and "
+              f"{len(manifest['arrays'])} arrays ({size / 1e6:.1f} MB) to {out_dir}")
+    else:
+        print(__doc__.strip())
+        sys.exit(1)
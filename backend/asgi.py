@@ -0,0 +1,178 @@
+"""Asyncio (ASGI) entry point with the same /check-fraud and /roc-data contract as server.py.
+
+Requests and chain jobs are coroutines instead of threads. Each flag job runs
+server.py's process_flag_job on a bounded thread pool, so both entry points
+share one chain write path (user cache, nonces, metrics, stuck replacements).
+The job then awaits its receipt from the shared ReceiptTracker thread as a
+future. One process can therefore keep thousands of flags in flight while they
+wait for confirmation. Inference still runs on the micro-batcher thread, and
+blocking SQLite, RPC and ROC work runs on the thread pool, so none of it stalls
+the event loop.
+
+Usage: hypercorn asgi:app --bind 127.0.0.1:5000   (or: python asgi.py)
+"""
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors
+
+import server
+from features import FeatureError
+from metrics import REGISTRY
+from startup import Startup
+
+app = cors(Quart(__name__), allow_origin='http://localhost:3000')
+
+# Blocking work (SQLite job queue, chain sends, ROC reductions) gets a fixed number of threads
+executor = ThreadPoolExecutor(max_workers=int(os.getenv('ASGI_EXECUTOR_WORKERS', '8')),
+                              thread_name_prefix='asgi-blocking')
+# Upper bound on flag jobs in flight (sent or waiting for their receipt) at once
+chain_concurrency = int(os.getenv('ASGI_CHAIN_CONCURRENCY', '1000'))
+loop = None
+dispatcher = None
+# Running job tasks; holding the references keeps them from being garbage collected
+background = set()
+
+
+def run_blocking(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def run_job(job, slots):
+    try:
+        # Sends on a pool thread; a sent transaction comes back as a Future of the job result
+        result = await run_blocking(server.process_flag_job, job)
+        if isinstance(result, Future):
+            result = await asyncio.wrap_future(result)
+    except Exception as e:
+        print(f"Error updating fraud status for {job['userAddress']}: {str(e)}")
+        result = {'status': 'failed', 'error': str(e)}
+        server.forget_failed_flag(job, result)
+    finally:
+        slots.release()
+    if result['status'] == 'failed':
+        await run_blocking(server.job_queue.retry_or_fail, job, result.get('error'))
+    else:
+        await run_blocking(server.job_queue.complete, job['id'], result['status'],
+                           result.get('txHash'), result.get('error'))
+
+
+async def dispatch_jobs():
+    # Same SQLite queue as the threaded workers; each claimed job becomes a task
+    slots = asyncio.Semaphore(chain_concurrency)
+    while True:
+        await slots.acquire()
+        try:
+            jobs = await run_blocking(server.job_queue.claim, 1)
+        except Exception as e:
+            print(f"Error claiming jobs: {e}")
+            jobs = []
+        if not jobs:
+            slots.release()
+            await run_blocking(server.job_queue.wait_for_work, 1.0)
+            continue
+        task = asyncio.create_task(run_job(jobs[0], slots))
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+
+def check_chain():
+    # Same checks and background threads as server.py, except that jobs are
+    # dispatched as tasks on the event loop instead of by the worker threads
+    server.check_chain(start_workers=False)
+    asyncio.run_coroutine_threadsafe(start_dispatcher(), loop).result()
+
+
+async def start_dispatcher():
+    global dispatcher
+    if dispatcher is None:
+        dispatcher = asyncio.create_task(dispatch_jobs())
+
+
+startup = Startup(retry_interval=float(os.getenv('STARTUP_RETRY_INTERVAL', '5')))
+startup.add('model', server.load_model)
+startup.add('chain', check_chain, required=False)
+
+
+@app.before_serving
+async def start_background():
+    global loop
+    loop = asyncio.get_running_loop()
+    startup.start()
+
+
+@app.route('/healthz', methods=['GET'])
+async def healthz():
+    return jsonify({'status': 'ok', 'uptimeSeconds': startup.status()['uptimeSeconds']}), 200
+
+
+@app.route('/readyz', methods=['GET'])
+async def readyz():
+    status = startup.status()
+    status['inFlightJobs'] = len(background)
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@app.route('/check-fraud', methods=['POST'])
+async def check_fraud():
+    active = server.model_registry.active
+    if active is None:
+        return jsonify({'error': 'Model is still loading, retry shortly'}), 503
+    try:
+        data = await request.get_json()
+        user_address = data['userAddress']
+        try:
+            row = active.feature_extractor.extract(data['transaction'])
+        except FeatureError as e:
+            return jsonify({'error': str(e)}), 400
+        proba = await asyncio.wrap_future(server.batcher.submit(row, key=active))
+        is_fraud = active.model.classes_[np.argmax(proba)]
+        server.fraud_checks.inc(result='fraud' if is_fraud else 'legit')
+        if is_fraud:
+            job_id, queued = await run_blocking(server.enqueue_flag, user_address)
+            if job_id is None:
+                return jsonify({'isFraud': True, 'alreadyFlagged': True}), 200
+            return jsonify({'isFraud': True, 'jobId': job_id, 'coalesced': not queued}), 200
+        return jsonify({'isFraud': False}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/roc-data', methods=['GET'])
+async def get_roc_data():
+    try:
+        max_points = request.args.get('max_points', request.args.get('points', server.roc_default_max_points),
+                                      type=int)
+        mode = request.args.get('mode', 'exact')
+        if mode not in ('exact', 'histogram'):
+            return jsonify({'error': "mode must be 'exact' or 'histogram'"}), 400
+        if max_points is None or max_points < 0 or max_points == 1:
+            return jsonify({'error': 'max_points must be 0 (all points) or at least 2'}), 400
+        roc_data = await run_blocking(server.roc_cache.view, max_points or None, mode)
+        if roc_data is None:
+            if server.roc_cache.error:
+                return jsonify({'error': server.roc_cache.error}), 500
+            return jsonify({'error': 'ROC data is being computed, retry shortly'}), 503
+        return jsonify(roc_data), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id):
+    job = await run_blocking(server.job_queue.get, job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job), 200
+
+
+if __name__ == '__main__':
+    app.run(port=int(os.getenv('PORT', '5000')), use_reloader=False)
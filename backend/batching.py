@@ -0,0 +1,119 @@
+import threading
+import time
+import queue
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collects concurrent single-row predictions into one predict_proba call.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` rows or the oldest
+    row has waited ``max_wait_ms`` milliseconds, whichever comes first. Rows
+    submitted with a ``key`` (e.g. the model version a request started on) are
+    predicted with ``predict_proba(rows, key)``, one call per distinct key in
+    the batch, so a model swap never mixes versions in one call. If a batch
+    call raises, its rows are predicted one at a time, so only the rows that
+    fail on their own get the exception.
+    """
+
+    def __init__(self, predict_proba, max_batch_size=64, max_wait_ms=5, history=1000):
+        self.predict_proba = predict_proba
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._batch_sizes = []
+        self._queue_waits = []
+        self._history = history
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, row, key=None):
+        future = Future()
+        self._queue.put((np.asarray(row).reshape(-1), future, time.perf_counter(), key))
+        return future
+
+    def predict(self, row, timeout=None, key=None):
+        return self.submit(row, key).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[3], []).append(item)
+            for key, group in groups.items():
+                rows = np.vstack([row for row, _, _, _ in group])
+                try:
+                    proba = self._predict(rows, key)
+                except Exception as e:
+                    if len(group) == 1:
+                        group[0][1].set_exception(e)
+                        continue
+                    # One bad row must not fail the other requests in the batch: retry them one by one
+                    for row, future, _, _ in group:
+                        try:
+                            future.set_result(self._predict(row.reshape(1, -1), key)[0])
+                        except Exception as row_error:
+                            future.set_exception(row_error)
+                else:
+                    for (_, future, _, _), row_proba in zip(group, proba):
+                        future.set_result(row_proba)
+            self._record(len(batch), [started - enqueued for _, _, enqueued, _ in batch])
+
+    def _predict(self, rows, key):
+        return self.predict_proba(rows) if key is None else self.predict_proba(rows, key)
+
+    def _record(self, size, waits):
+        with self._stats_lock:
+            self._batches += 1
+            self._rows += size
+            self._batch_sizes.append(size)
+            self._queue_waits.extend(waits)
+            del self._batch_sizes[:-self._history]
+            del self._queue_waits[:-self._history]
+
+    def stats(self):
+        with self._stats_lock:
+            sizes = np.array(self._batch_sizes, dtype=float)
+            waits = np.array(self._queue_waits, dtype=float) * 1000.0
+            batches, rows = self._batches, self._rows
+
+        def summary(values):
+            if not len(values):
+                return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+            return {
+                'mean': float(values.mean()),
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'max': float(values.max())
+            }
+
+        return {
+            'maxBatchSize': self.max_batch_size,
+            'maxWaitMs': self.max_wait * 1000.0,
+            'batches': batches,
+            'rows': rows,
+            'pending': self._queue.qsize(),
+            'batchSize': summary(sizes),
+            'queueWaitMs': summary(waits)
+        }
@@ -0,0 +1,124 @@
+"""Load time and memory per worker: joblib pickles vs memory-mapped artifacts.
+
+Starts --workers processes at once for each format. Every worker loads the model
+and X_test/y_test, scores --rows rows, touches every array page and then reports:
+- load time
+- RSS
+- PSS, where shared pages are split across the processes that map them
+
+PSS is the number that shows page-cache sharing (Linux /proc only). Elsewhere
+only the RSS high-water mark is reported.
+
+Usage: python bench_artifacts.py [savedresult_dir] [--workers 4] [--rows 1000]
+Without a directory a synthetic 100-tree depth-20 forest and test set are used.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from artifacts import load_forest, load_test_set, write_artifacts
+from bench_forest import synthetic_model
+
+
+def memory_mb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return (int(fields['Rss'].split()[0]) / 1024, int(fields['Pss'].split()[0]) / 1024)
+    except OSError:
+        # ru_maxrss is KB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, None
+
+
+def load_pickles(paths):
+    model = joblib.load(paths['model'])
+    model.n_jobs = 1
+    return model, joblib.load(paths['X_test']), joblib.load(paths['y_test'])
+
+
+def load_mmap(paths):
+    return (load_forest(paths['artifacts']),) + load_test_set(paths['artifacts'])
+
+
+def worker(fmt, paths, rows, barrier, results):
+    before_rss, before_pss = memory_mb()
+    started = time.perf_counter()
+    model, X_test, y_test = (load_mmap if fmt == 'mmap' else load_pickles)(paths)
+    loaded = time.perf_counter() - started
+    model.predict_proba(X_test[:rows] if fmt == 'mmap' else X_test.iloc[:rows])
+    # Fault in every page so both formats are measured fully resident
+    for array in vars(model).values():
+        if isinstance(array, np.ndarray):
+            float(np.asarray(array).sum())
+    float(np.asarray(X_test).sum())
+    int(np.asarray(y_test).sum())
+    barrier.wait()
+    rss, pss = memory_mb()
+    results.put({'loadSec': loaded, 'rssMb': rss - before_rss,
+                 'pssMb': None if pss is None else pss - before_pss})
+    barrier.wait()
+
+
+def run(fmt, paths, workers, rows):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(fmt, paths, rows, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    summary = {
+        'load (s)': statistics.median(s['loadSec'] for s in samples),
+        'RSS / worker (MB)': statistics.median(s['rssMb'] for s in samples),
+    }
+    if samples[0]['pssMb'] is not None:
+        summary['PSS / worker (MB)'] = statistics.median(s['pssMb'] for s in samples)
+        summary[f'PSS x{workers} (MB)'] = sum(s['pssMb'] for s in samples)
+    return summary
+
+
+def main():
+    # Benchmark inputs are plain arrays in training column order
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('saved_dir', nargs='?')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.saved_dir:
+            paths = {name: os.path.join(args.saved_dir, file) for name, file in (
+                ('model', 'fraud_detection_model.pkl'), ('X_test', 'X_test.pkl'), ('y_test', 'y_test.pkl'))}
+        else:
+            rng = np.random.default_rng(42)
+            model = synthetic_model(rng)
+            X_test = pd.DataFrame(rng.normal(size=(57000, model.n_features_in_)), columns=model.feature_names_in_)
+            y_test = pd.Series((X_test['V14'] < -2.5).astype(int))
+            paths = {name: os.path.join(tmp, f'{name}.pkl') for name in ('model', 'X_test', 'y_test')}
+            for name, obj in (('model', model), ('X_test', X_test), ('y_test', y_test)):
+                joblib.dump(obj, paths[name])
+        # Each format's files are written fresh, then both are read from a warm page cache
+        paths['artifacts'] = os.path.join(tmp, 'artifacts')
+        write_artifacts(paths['artifacts'], *load_pickles(paths))
+
+        results = {fmt: run(fmt, paths, args.workers, args.rows) for fmt in ('pickle', 'mmap')}
+
+    print(f"{'':<22}{'pickle':>12}{'mmap':>12}")
+    for metric in results['pickle']:
+        print(f"{metric:<22}{results['pickle'][metric]:>12.2f}{results['mmap'][metric]:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
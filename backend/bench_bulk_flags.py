@@ -0,0 +1,133 @@
+"""Flags/sec and gas/flag: one updateFraudStatus per user vs batchUpdateFraudStatus chunks.
+
+Runs against an in-process eth-tester chain. Each pass sets isFraudulent on its
+own --users freshly registered users, so both make the same state change.
+UserAuth comes from a compiled artifact with batchUpdateFraudStatus in its ABI,
+either the truffle build (npx truffle compile writes build/contracts/UserAuth.json)
+or any JSON file with "abi" and "bytecode" named by USER_AUTH_ARTIFACT. Without
+one, contracts/UserAuth.sol is compiled by py-solc-x, which downloads solc 0.8.19.
+Requires: pip install "web3[tester]" (plus py-solc-x without an artifact)
+
+Usage: python bench_bulk_flags.py [--users 200] [--gas-budget 3000000]
+
+Measured on one CPU core with the solc 0.8.19 build in build/contracts (two runs):
+
+                               single tx       batched
+    transactions                     200             -
+    flags/sec                  17.6 - 18.9             -
+    gas/flag                       30873             -
+
+That build predates batchUpdateFraudStatus, and solc could not be downloaded on
+that machine, so the batched column still needs a run against a current build.
+"""
+import argparse
+import json
+import os
+import time
+
+from web3 import Web3, EthereumTesterProvider
+
+from nonce import NonceManager
+from flag_flusher import FraudFlagFlusher
+
+CONTRACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'contracts', 'UserAuth.sol')
+BUILD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'build', 'contracts', 'UserAuth.json')
+SOLC_VERSION = '0.8.19'
+
+
+def compile_user_auth(functions=()):
+    """ABI and bytecode of UserAuth.
+
+    Read from a compiled artifact (USER_AUTH_ARTIFACT, default the truffle build in
+    build/contracts) when its ABI has all of ``functions``; otherwise
+    contracts/UserAuth.sol is compiled with py-solc-x.
+    """
+    path = os.getenv('USER_AUTH_ARTIFACT') or BUILD_PATH
+    if os.path.exists(path):
+        with open(path) as f:
+            compiled = json.load(f)
+        missing = set(functions) - {entry.get('name') for entry in compiled['abi']}
+        if not missing:
+            return {'abi': compiled['abi'], 'bin': compiled.get('bytecode') or compiled['bin']}
+        print(f"{path} has no {', '.join(sorted(missing))} (rebuild it with npx truffle compile); "
+              f"compiling {CONTRACT_PATH} with py-solc-x")
+    import solcx
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    compiled = solcx.compile_files([CONTRACT_PATH], output_values=['abi', 'bin'], solc_version=SOLC_VERSION,
+                                   optimize=True, optimize_runs=200)
+    return next(value for key, value in compiled.items() if key.endswith(':UserAuth'))
+
+
+def send(w3, nonces, account, build_tx):
+    tx_hash = nonces.send(account.address, account.key, build_tx)
+    return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
+def setup_chain(n_users, w3=None, functions=()):
+    w3 = w3 or Web3(EthereumTesterProvider())
+    funder = w3.eth.accounts[0]
+    nonces = NonceManager(w3)
+    owner = w3.eth.account.create()
+    users = [w3.eth.account.create() for _ in range(n_users)]
+    for account in [owner] + users:
+        w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction(
+            {'from': funder, 'to': account.address, 'value': w3.to_wei(1, 'ether')}
+        ))
+
+    compiled = compile_user_auth(functions)
+    factory = w3.eth.contract(abi=compiled['abi'], bytecode=compiled['bin'])
+    receipt = send(w3, nonces, owner, lambda nonce: factory.constructor().build_transaction(
+        {'from': owner.address, 'nonce': nonce, 'gas': 3000000, 'gasPrice': w3.to_wei('20', 'gwei')}
+    ))
+    contract = w3.eth.contract(address=receipt['contractAddress'], abi=compiled['abi'])
+    for i, user in enumerate(users):
+        send(w3, nonces, user, lambda nonce: contract.functions.register(f'user{i}', 'pass').build_transaction(
+            {'from': user.address, 'nonce': nonce, 'gas': 300000, 'gasPrice': w3.to_wei('20', 'gwei')}
+        ))
+    return w3, contract, nonces, owner, users
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--gas-budget', type=int, default=3000000)
+    args = parser.parse_args()
+
+    # Each pass flags its own freshly registered users, so both write the same state change
+    w3, contract, nonces, owner, users = setup_chain(2 * args.users, functions=('batchUpdateFraudStatus',))
+    single_users, batch_users = users[:args.users], users[args.users:]
+
+    # Baseline: one updateFraudStatus transaction and receipt wait per user
+    started = time.perf_counter()
+    single_gas = 0
+    for user in single_users:
+        receipt = send(w3, nonces, owner, lambda nonce: contract.functions.updateFraudStatus(
+            user.address, True
+        ).build_transaction({'from': owner.address, 'nonce': nonce, 'gas': 500000,
+                             'gasPrice': w3.to_wei('20', 'gwei')}))
+        single_gas += receipt['gasUsed']
+    single_time = time.perf_counter() - started
+
+    # Batched: the same flags for the other users through the flusher
+    flusher = FraudFlagFlusher(w3, contract, nonces, owner.address, owner.key, gas_budget=args.gas_budget)
+    for user in batch_users:
+        flusher.add(user.address, True)
+    started = time.perf_counter()
+    results = flusher.flush()
+    batch_time = time.perf_counter() - started
+    if any(result['status'] != 'mined' for result in results):
+        raise RuntimeError(f'Batch flush failed: {results}')
+    batch_gas = sum(result['gasUsed'] for result in results)
+    if not all(contract.functions.isUserFraudulent(user.address).call() for user in users):
+        raise RuntimeError('Some users were not flagged')
+
+    n = args.users
+    print(f"{'':<26}{'single tx':>14}{'batched':>14}")
+    print(f"{'transactions':<26}{n:>14}{len(results):>14}")
+    print(f"{'flags/sec':<26}{n / single_time:>14.1f}{n / batch_time:>14.1f}")
+    print(f"{'gas/flag':<26}{single_gas / n:>14.0f}{batch_gas / n:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""End-to-end /check-fraud benchmark: server.py in-process against an eth-tester chain.
+
+The UserAuth contract is deployed on an in-process eth-tester chain and --users
+accounts are registered. server.py is imported and pointed at that chain, then
+served on a local port. /check-fraud is then driven from --concurrency threads.
+Each fraud request flags a different registered user, so every flag becomes a
+real transaction. The run ends once every queued flag has been mined or failed.
+
+Phases:
+- inference: /check-fraud round trip (parse, features, micro-batched predict_proba, enqueue)
+- chain: queued flag job created -> mined/reverted/failed (worker, nonce, sign, send, receipt)
+
+Client, server and chain share one process and GIL, so compare runs against each
+other rather than against production numbers. Results are written as JSON.
+--baseline prints the change against an earlier results file.
+
+UserAuth is deployed from a compiled artifact, as in bench_bulk_flags.py: the
+truffle build in build/contracts (npx truffle compile), or a JSON file with "abi"
+and "bytecode" named by USER_AUTH_ARTIFACT. With FLAG_BATCH_SIZE > 1 its ABI
+must have batchUpdateFraudStatus. Without a usable artifact py-solc-x compiles
+contracts/UserAuth.sol, which needs to download solc 0.8.19.
+
+Requires: pip install "web3[tester]" (plus py-solc-x without an artifact)
+
+Usage: python bench_e2e.py [--model path/to/fraud_detection_model.pkl] [--backend sklearn|flat|mmap]
+                           [--requests 1000] [--concurrency 16] [--fraud-ratio 0.1] [--users 200]
+                           [--output results.json] [--baseline previous.json]
+
+Measured with the defaults (synthetic model, sklearn backend, FLAG_BATCH_SIZE=1)
+on one CPU core against the solc 0.8.19 build in build/contracts (two runs):
+
+    requests throughputPerSec      104.8 - 113.5
+    inference p50 / p95 / p99 ms   135.8 - 147.0 / 201.2 - 214.9 / 237.5 - 245.3
+    chain p50 / p95 / p99 ms       4872 - 5356 / 5275 - 6006 / 5392 - 6070
+    chain flagsPerSec                6.4 - 6.9
+    chain jobs                     95: 89 - 93 mined, 2 - 6 failed
+
+The failed flags are eth-tester artifacts. It mines each transaction on arrival
+and has no mempool, so it rejects a nonce that a concurrent worker sends ahead
+of the previous one ("Invalid transaction nonce").
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import joblib
+import requests
+from web3 import Web3, EthereumTesterProvider
+from werkzeug.serving import make_server
+
+from artifacts import write_artifacts
+from bench_bulk_flags import setup_chain
+from bench_forest import synthetic_model
+from forest_export import export_forest
+
+FINAL_STATUSES = ('mined', 'reverted', 'noop', 'failed')
+
+
+class LockedTesterProvider(EthereumTesterProvider):
+    # py-evm is not thread-safe; server threads, client threads and the tracker all share it
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with self._lock:
+            return super().make_request(method, params)
+
+    def make_batch_request(self, batch):
+        return [self.make_request(method, params) for method, params in batch]
+
+
+def percentiles(values):
+    if not values:
+        return {'p50Ms': None, 'p95Ms': None, 'p99Ms': None, 'meanMs': None}
+    ms = np.asarray(values) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'p50Ms': float(p50), 'p95Ms': float(p95), 'p99Ms': float(p99), 'meanMs': float(ms.mean())}
+
+
+def prepare_model(args, tmp):
+    # Returns (env for server.py, fraud rows, clean rows) as lists of feature dicts
+    rng = np.random.default_rng(args.seed)
+    if args.model:
+        model = joblib.load(args.model)
+        X_test = joblib.load(os.path.join(os.path.dirname(args.model), 'X_test.pkl'))
+        model_path = args.model
+    else:
+        model = synthetic_model(rng)
+        X_test = pd.DataFrame(rng.normal(size=(20000, model.n_features_in_)), columns=model.feature_names_in_)
+        model_path = os.path.join(tmp, 'fraud_detection_model.pkl')
+        joblib.dump(model, model_path)
+    env = {'MODEL_PATH': model_path, 'MODEL_BACKEND': args.backend}
+    if args.backend == 'flat':
+        env['FLAT_MODEL_PATH'] = export_forest(model, os.path.join(tmp, 'model.npz'))
+    elif args.backend == 'mmap':
+        env['ARTIFACT_DIR'] = os.path.join(tmp, 'artifacts')
+        write_artifacts(env['ARTIFACT_DIR'], model)
+
+    predicted = model.predict(X_test)
+    rows = X_test.astype(float).to_dict('records')
+    fraud = [row for row, label in zip(rows, predicted) if label == 1][:200]
+    clean = [row for row, label in zip(rows, predicted) if label == 0][:200]
+    if not fraud or not clean:
+        raise RuntimeError('Need test rows the model scores as fraud and as clean')
+    return env, fraud, clean
+
+
+def start_server(args, tmp):
+    provider = LockedTesterProvider()
+    chain_w3 = Web3(provider)
+    print(f"Deploying UserAuth and registering {args.users} users on eth-tester...")
+    # FLAG_BATCH_SIZE > 1 sends batchUpdateFraudStatus, which older builds of UserAuth lack
+    batched = int(os.getenv('FLAG_BATCH_SIZE', '1')) > 1
+    _, contract, _, owner, users = setup_chain(args.users, chain_w3, ('batchUpdateFraudStatus',) if batched else ())
+
+    env, fraud_rows, clean_rows = prepare_model(args, tmp)
+    env.update({
+        'CONTRACT_ADDRESS': contract.address,
+        'OWNER_ADDRESS': owner.address,
+        'PRIVATE_KEY': owner.key.hex(),
+        'USER_PRIVATE_KEY': users[0].key.hex(),
+        'JOB_DB_PATH': os.path.join(tmp, 'jobs.sqlite3'),
+        'INDEX_DB_PATH': os.path.join(tmp, 'events.sqlite3'),
+        # Indexing the setup blocks would hold the eth-tester lock for most of the run
+        'INDEX_START_BLOCK': str(chain_w3.eth.block_number),
+    })
+    os.environ.update(env)
+    import server
+    # Every chain-side object holds server.w3, so swapping its provider moves them all to eth-tester
+    server.w3.provider = provider
+    app = server.create_app()
+    http = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+
+    deadline = time.monotonic() + 120
+    while not all(task['status'] == 'ready' for task in server.startup.status()['tasks'].values()):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server not ready: {server.startup.status()}")
+        time.sleep(0.05)
+    return server, f'http://127.0.0.1:{http.server_port}', users, fraud_rows, clean_rows
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url, users, fraud_rows, clean_rows = start_server(args, tmp)
+        rng = np.random.default_rng(args.seed)
+        is_fraud = rng.random(args.requests) < args.fraud_ratio
+        payloads = []
+        fraud_count = 0
+        for i, fraud in enumerate(is_fraud):
+            if fraud:
+                # A different user per flag, so coalescing doesn't hide the chain cost
+                user = users[fraud_count % len(users)]
+                tx = fraud_rows[fraud_count % len(fraud_rows)]
+                fraud_count += 1
+            else:
+                user = users[i % len(users)]
+                tx = clean_rows[i % len(clean_rows)]
+            payloads.append({'transaction': tx, 'userAddress': user.address})
+
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+        latencies = [None] * len(payloads)
+        responses = [None] * len(payloads)
+
+        def one_request(i):
+            started = time.perf_counter()
+            response = session.post(f'{url}/check-fraud', json=payloads[i], timeout=60)
+            latencies[i] = time.perf_counter() - started
+            responses[i] = (response.status_code, response.json())
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(one_request, range(len(payloads))))
+        load_seconds = time.perf_counter() - started
+
+        job_ids = {body['jobId'] for status, body in responses if status == 200 and body.get('jobId')}
+        deadline = time.monotonic() + args.chain_timeout
+        jobs = []
+        while True:
+            jobs = [server.job_queue.get(job_id) for job_id in job_ids]
+            if all(job['status'] in FINAL_STATUSES for job in jobs) or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        chain_seconds = time.perf_counter() - started
+
+        by_status = {}
+        for job in jobs:
+            by_status[job['status']] = by_status.get(job['status'], 0) + 1
+        finished = [job for job in jobs if job['status'] in FINAL_STATUSES]
+        ok = [status for status, _ in responses if status == 200]
+        return {
+            'config': {name: getattr(args, name) for name in
+                       ('model', 'backend', 'requests', 'concurrency', 'fraud_ratio', 'users', 'seed')},
+            'gitCommit': git_commit(),
+            'startedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'requests': {
+                'total': len(payloads),
+                'errors': len(payloads) - len(ok),
+                'throughputPerSec': len(payloads) / load_seconds,
+                'fraudRateRequested': args.fraud_ratio,
+                'fraudRateObserved': sum(1 for status, body in responses if status == 200 and body.get('isFraud'))
+                / max(len(ok), 1),
+            },
+            'inference': percentiles(latencies),
+            'chain': dict(percentiles([job['updatedAt'] - job['createdAt'] for job in finished]), **{
+                'jobs': len(jobs),
+                'unfinished': len(jobs) - len(finished),
+                'byStatus': by_status,
+                'flagsPerSec': len(finished) / chain_seconds if finished else None,
+            }),
+            'batcher': server.batcher.stats(),
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+COMPARED = [('requests', 'throughputPerSec'), ('inference', 'p50Ms'), ('inference', 'p95Ms'),
+            ('inference', 'p99Ms'), ('chain', 'p50Ms'), ('chain', 'p95Ms'), ('chain', 'p99Ms'),
+            ('chain', 'flagsPerSec')]
+
+
+def print_comparison(results, baseline):
+    print(f"{'':<28}{'baseline':>12}{'this run':>12}{'change':>10}")
+    for section, metric in COMPARED:
+        old, new = baseline[section].get(metric), results[section].get(metric)
+        change = f'{(new - old) / old * 100:+.1f}%' if old and new is not None else 'n/a'
+        print(f"{section + '.' + metric:<28}{old if old is not None else float('nan'):>12.2f}"
+              f"{new if new is not None else float('nan'):>12.2f}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='saved model pickle (X_test.pkl is read from the same directory)')
+    parser.add_argument('--backend', choices=('sklearn', 'flat', 'mmap'), default='sklearn')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--fraud-ratio', type=float, default=0.1)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chain-timeout', type=float, default=300.0)
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    # Server threads are daemons; skip interpreter teardown while they are still polling
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Per-request feature extraction + predict latency: one-row DataFrame vs FeatureExtractor.
+
+Usage: python bench_feature_extraction.py [path/to/fraud_detection_model.pkl] [--repeat N]
+Without a model path a small synthetic forest with the creditcard schema is trained.
+"""
+import argparse
+import timeit
+import warnings
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+
+from features import FeatureExtractor
+
+
+EXPECTED_FEATURES = ['V%d' % i for i in range(1, 29)] + ['Amount']
+
+
+def synthetic_model(rng):
+    columns = ['Time'] + EXPECTED_FEATURES
+    X = pd.DataFrame(rng.normal(size=(5000, len(columns))), columns=columns)
+    y = (X['V14'] + rng.normal(scale=0.5, size=len(X)) < -1.5).astype(int)
+    model = RandomForestClassifier(n_estimators=100, max_depth=20, random_state=42, n_jobs=1)
+    return model.fit(X, y)
+
+
+def main():
+    # Benchmark inputs are plain arrays in training column order
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('model_path', nargs='?')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    model = joblib.load(args.model_path) if args.model_path else synthetic_model(rng)
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = 1
+    feature_columns = list(getattr(model, 'feature_names_in_', EXPECTED_FEATURES))
+    payloads = [dict(zip(feature_columns, map(float, values)))
+                for values in rng.normal(size=(200, len(feature_columns)))]
+    extractor = FeatureExtractor(feature_columns, dtype=np.float32)
+
+    def dataframe_extract(payload):
+        transaction = pd.DataFrame([payload])
+        if not all(feature in transaction.columns for feature in EXPECTED_FEATURES):
+            raise ValueError('Invalid transaction data')
+        return transaction
+
+    # Predictions have to match bit for bit before timing means anything
+    for payload in payloads:
+        expected = model.predict_proba(dataframe_extract(payload))
+        actual = model.predict_proba(extractor.extract(payload).reshape(1, -1))
+        if not np.array_equal(expected, actual):
+            raise AssertionError(f'Prediction mismatch for payload {payload}')
+    print(f'Verified identical predict_proba output on {len(payloads)} payloads')
+
+    payload = payloads[0]
+    cases = [
+        ('extract: DataFrame', lambda: dataframe_extract(payload)),
+        ('extract: FeatureExtractor', lambda: extractor.extract(payload)),
+        ('extract+predict: DataFrame', lambda: model.predict_proba(dataframe_extract(payload))),
+        ('extract+predict: FeatureExtractor',
+         lambda: model.predict_proba(extractor.extract(payload).reshape(1, -1))),
+    ]
+    for name, fn in cases:
+        repeat = args.repeat if name.startswith('extract:') else max(1, args.repeat // 10)
+        best = min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+        print(f'{name:<36} {best * 1e6:10.1f} us/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Latency and memory of the pickled RandomForestClassifier vs the flat array forest.
+
+Usage: python bench_forest.py [path/to/fraud_detection_model.pkl] [--rows 1000]
+Without a model path a synthetic 100-tree depth-20 forest with the creditcard schema is trained.
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import timeit
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_export import FlatForest, export_forest
+
+
+def synthetic_model(rng):
+    columns = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+    X = pd.DataFrame(rng.normal(size=(20000, len(columns))), columns=columns)
+    y = (X['V14'] + rng.normal(scale=0.8, size=len(X)) < -1.5).astype(int)
+    model = RandomForestClassifier(n_estimators=100, max_depth=20, random_state=42, n_jobs=1)
+    return model.fit(X, y)
+
+
+def traced_load(load):
+    tracemalloc.start()
+    obj = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, peak
+
+
+def best_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    # Benchmark inputs are plain arrays in training column order
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('model_path', nargs='?')
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model_path
+        if model_path is None:
+            model_path = os.path.join(tmp, 'model.pkl')
+            joblib.dump(synthetic_model(rng), model_path)
+        flat_path = export_forest(joblib.load(model_path), os.path.join(tmp, 'model.npz'))
+
+        model, model_peak = traced_load(lambda: joblib.load(model_path))
+        model.n_jobs = 1
+        flat, flat_peak = traced_load(lambda: FlatForest.load(flat_path))
+
+        X = rng.normal(size=(args.rows, model.n_features_in_)).astype(np.float32)
+        diff = np.abs(model.predict_proba(X) - flat.predict_proba(X)).max()
+        print(f"max |sklearn - flat| predict_proba over {args.rows} rows: {diff:.2e}")
+        if diff > 1e-9:
+            raise AssertionError('Flat forest does not match sklearn predict_proba')
+
+        print(f"{'':<22}{'sklearn':>14}{'flat':>14}")
+        print(f"{'file size (MB)':<22}{os.path.getsize(model_path) / 1e6:>14.2f}"
+              f"{os.path.getsize(flat_path) / 1e6:>14.2f}")
+        print(f"{'in-memory (MB)':<22}{len(pickle.dumps(model)) / 1e6:>14.2f}{flat.nbytes / 1e6:>14.2f}")
+        print(f"{'load peak alloc (MB)':<22}{model_peak / 1e6:>14.2f}{flat_peak / 1e6:>14.2f}")
+        one = X[:1]
+        print(f"{'1 row (us)':<22}{best_us(lambda: model.predict_proba(one), 50):>14.1f}"
+              f"{best_us(lambda: flat.predict_proba(one), 200):>14.1f}")
+        print(f"{f'{args.rows} rows (us/row)':<22}"
+              f"{best_us(lambda: model.predict_proba(X), 3) / args.rows:>14.2f}"
+              f"{best_us(lambda: flat.predict_proba(X), 3) / args.rows:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Dataset load time and peak RSS: pd.read_csv (as ok.py did) vs ingest.py cold and warm.
+
+Each measurement runs in a fresh process. Every path ends with the same
+X.sum() / y.sum() pass, so the memory-mapped cache is actually read.
+
+Usage: python bench_ingest.py [path/to/creditcard.csv] [--rows 284807]
+Without a CSV a synthetic one with the creditcard schema is written first.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import load_dataset
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path, cache_dir, how, results):
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if how == 'read_csv':
+        data = pd.read_csv(path)
+        X = data.drop(columns=['Class'])
+        y = data['Class']
+    else:
+        X, y = load_dataset(path, cache_dir)
+    loaded = time.perf_counter() - started
+    float(X.to_numpy().sum())
+    int(y.sum())
+    results.put({'seconds': loaded, 'peakRssMb': peak_rss_mb() - baseline,
+                 'dtype': str(X.dtypes.iloc[0])})
+
+
+def run(path, cache_dir, how):
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    process = ctx.Process(target=measure, args=(path, cache_dir, how, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def write_synthetic_csv(path, rows, rng):
+    columns = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+    frame = pd.DataFrame(rng.normal(size=(rows, len(columns))), columns=columns)
+    frame['Class'] = (rng.random(rows) < 0.0017).astype(int)
+    frame.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('csv', nargs='?')
+    parser.add_argument('--rows', type=int, default=284807)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = args.csv
+        if path is None:
+            path = os.path.join(tmp, 'creditcard.csv')
+            write_synthetic_csv(path, args.rows, np.random.default_rng(42))
+        cache_dir = os.path.join(tmp, 'cache')
+        results = {
+            'pd.read_csv': run(path, cache_dir, 'read_csv'),
+            'ingest (cold)': run(path, cache_dir, 'ingest'),
+            'ingest (warm)': run(path, cache_dir, 'ingest'),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{'':<16}{'load (s)':>12}{'peak RSS (MB)':>16}{'dtype':>10}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['seconds']:>12.3f}{result['peakRssMb']:>16.1f}{result['dtype']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Cost of the always-on instrumentation: one stage span, one counter increment, one scrape.
+
+Usage: python bench_metrics.py [--ops 200000] [--threads 8]
+"""
+import argparse
+import threading
+import time
+
+from metrics import REGISTRY, span
+
+checks = REGISTRY.counter('bench_checks_total', 'Benchmark counter', ('result',))
+
+
+def per_op_us(fn, ops, threads):
+    def work():
+        for _ in range(ops // threads):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / ops * 1e6
+
+
+def empty_span():
+    with span('bench'):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    for threads in (1, args.threads):
+        print(f"{threads} thread(s): span {per_op_us(empty_span, args.ops, threads):.2f} us/op, "
+              f"counter {per_op_us(lambda: checks.inc(result='fraud'), args.ops, threads):.2f} us/op")
+    started = time.perf_counter()
+    text = REGISTRY.render()
+    print(f"render: {(time.perf_counter() - started) * 1000:.2f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""RPC round trips and latency per fraud-check read: plain HTTPProvider, pooled, and pooled + batched.
+
+Runs against a local stand-in JSON-RPC node that answers eth_getBalance and the
+UserAuth users() eth_call, adds --latency-ms per HTTP request and counts HTTP
+requests and TCP connections. The pooled column sends the same sequential calls
+as the plain one, so it isolates pooling from batching.
+
+Usage: python bench_rpc.py [--threads 16] [--checks 200] [--latency-ms 2]
+
+Measured with the defaults on one CPU core (two runs):
+
+                             plain HTTPProvider        pooled    pooled + batch
+    httpRequestsPerCheck                   4.00          4.00              1.00
+    rpcCallsPerCheck                       4.00          4.00              2.00
+    connectionsOpened                        16            15                15
+    p50Ms                         258.0 - 259.0 255.6 - 255.7       76.4 - 85.6
+    p95Ms                         301.8 - 311.2 303.9 - 321.4     117.1 - 122.2
+    checksPerSec                    58.5 - 59.2   59.2 - 61.1     176.1 - 193.4
+
+The plain HTTPProvider already reuses its connections, so pooling alone changes
+nothing at this concurrency. The gain comes from batching: one HTTP request
+per check instead of four.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web3 import Web3
+
+from rpc import pooled_http_provider, read_user_state
+
+USERS_ABI = [{
+    "inputs": [{"internalType": "address", "name": "", "type": "address"}],
+    "name": "users",
+    "outputs": [
+        {"internalType": "bytes32", "name": "usernameHash", "type": "bytes32"},
+        {"internalType": "bytes32", "name": "passwordHash", "type": "bytes32"},
+        {"internalType": "bool", "name": "exists", "type": "bool"},
+        {"internalType": "bool", "name": "isFraudulent", "type": "bool"}
+    ],
+    "stateMutability": "view",
+    "type": "function"
+}]
+CONTRACT_ADDRESS = '0x0127bc5cf311B88FD6e9349d0977b8Cf98C9862c'
+USER_ADDRESS = '0xa29FC23Fa33F1D3c566bD3459Ce17225EadF109A'
+# users() -> (hash, hash, exists=true, isFraudulent=false)
+USERS_RESULT = '0x' + '11' * 32 + '22' * 32 + '%064x' % 1 + '%064x' % 0
+RESULTS = {
+    'eth_chainId': '0x539',
+    'net_version': '1337',
+    'eth_blockNumber': '0x10',
+    'eth_getBalance': hex(10 ** 18),
+    'eth_call': USERS_RESULT,
+}
+
+
+class StandInNode(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.http_requests = 0
+        self.rpc_calls = 0
+        self.connections = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def reset(self):
+        with self.lock:
+            self.http_requests = self.rpc_calls = self.connections = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        calls = payload if isinstance(payload, list) else [payload]
+        with self.server.lock:
+            self.server.http_requests += 1
+            self.server.rpc_calls += len(calls)
+        time.sleep(self.server.latency)
+        responses = [{'jsonrpc': '2.0', 'id': call['id'], 'result': RESULTS[call['method']]}
+                     if call['method'] in RESULTS else
+                     {'jsonrpc': '2.0', 'id': call['id'], 'error': {'code': -32601, 'message': 'Method not found'}}
+                     for call in calls]
+        body = json.dumps(responses if isinstance(payload, list) else responses[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(node, w3, read, threads, checks):
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=USERS_ABI)
+    read(w3, contract)  # warm-up (chain id lookups, connection)
+    node.reset()
+    latencies = []
+
+    def one_check(_):
+        started = time.perf_counter()
+        read(w3, contract)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(one_check, range(checks)))
+    elapsed = time.perf_counter() - started
+    return {
+        'httpRequestsPerCheck': node.http_requests / checks,
+        'rpcCallsPerCheck': node.rpc_calls / checks,
+        'connectionsOpened': node.connections,
+        'p50Ms': statistics.median(latencies) * 1000,
+        'p95Ms': sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+        'checksPerSec': checks / elapsed
+    }
+
+
+def sequential_read(w3, contract):
+    return w3.eth.get_balance(USER_ADDRESS), contract.functions.users(USER_ADDRESS).call()
+
+
+def batched_read(w3, contract):
+    return read_user_state(w3, contract, USER_ADDRESS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--checks', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    node = StandInNode(args.latency_ms / 1000.0)
+    threading.Thread(target=node.serve_forever, daemon=True).start()
+    try:
+        results = {
+            'plain HTTPProvider': run(node, Web3(Web3.HTTPProvider(node.url)), sequential_read,
+                                      args.threads, args.checks),
+            # Pooling alone, so its share of the gain is separate from batching's
+            'pooled': run(node, Web3(pooled_http_provider(node.url, pool_size=args.threads)),
+                          sequential_read, args.threads, args.checks),
+            'pooled + batch': run(node, Web3(pooled_http_provider(node.url, pool_size=args.threads)),
+                                  batched_read, args.threads, args.checks),
+        }
+    finally:
+        node.shutdown()
+
+    names = list(results)
+    print(f"{'':<24}" + ''.join(f'{name:>22}' for name in names))
+    for metric in results[names[0]]:
+        print(f'{metric:<24}' + ''.join(f'{results[name][metric]:>22.2f}' for name in names))
+
+
+if __name__ == '__main__':
+    main()
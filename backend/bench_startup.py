@@ -0,0 +1,77 @@
+"""Cold-start time of server.py: process spawn -> /healthz -> /readyz.
+
+Each run starts a fresh `python server.py` (needs the usual .env, the node and
+the saved model) and polls until the model is warm. "serial estimate" is the
+time to bind plus the sum of the startup task durations, i.e. roughly what the
+old import-time setup cost when every step ran one after another.
+
+Usage: python bench_startup.py [--runs 5] [--port 5055] [--timeout 120]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+
+def wait_for(url, deadline, process):
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server.py exited with code {process.returncode}')
+        try:
+            response = requests.get(url, timeout=1)
+            if response.status_code == 200:
+                return response
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f'{url} not ready before the timeout')
+
+
+def one_run(port, timeout):
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, PORT=str(port))
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, 'server.py'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        wait_for(f'{base}/healthz', deadline, process)
+        healthy = time.monotonic() - started
+        status = wait_for(f'{base}/readyz', deadline, process).json()
+        ready = time.monotonic() - started
+        # The chain task does not gate readiness; wait for it so the estimate covers every step
+        while status['tasks']['chain']['status'] != 'ready' and time.monotonic() < deadline:
+            time.sleep(0.05)
+            status = requests.get(f'{base}/readyz', timeout=1).json()
+        task_seconds = {name: task['seconds'] or 0.0 for name, task in status['tasks'].items()}
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        'healthzSec': healthy,
+        'readyzSec': ready,
+        'serialEstimateSec': healthy + sum(task_seconds.values()),
+        **{f'{name}TaskSec': seconds for name, seconds in task_seconds.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    runs = [one_run(args.port, args.timeout) for _ in range(args.runs)]
+    print(f"{'':<22}{'median':>10}{'min':>10}{'max':>10}")
+    for metric in runs[0]:
+        values = [run[metric] for run in runs]
+        print(f'{metric:<22}{statistics.median(values):>10.2f}{min(values):>10.2f}{max(values):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Offline bulk scoring of a transaction CSV or Parquet file of any size.
+
+The input is read in chunks. A process pool scores them: every worker maps
+the same model artifacts (artifacts.py) read-only, so the forest sits in the
+page cache once. Results are written in input order as each chunk completes,
+to Parquet or CSV (by extension). At most two chunks per worker are in flight,
+so memory stays bounded whatever the file size. The output gets fraudScore
+and isFraud plus the columns passed through with --keep.
+
+With --flag, the distinct addresses scored as fraud go into the server's job
+queue in one transaction. The server's flag workers then write them on chain
+with batchUpdateFraudStatus (FLAG_BATCH_SIZE).
+
+Parquet input and output need pyarrow.
+
+Usage: python bulk_score.py transactions.csv scores.parquet [--artifacts DIR] [--chunk-rows 100000]
+                            [--workers N] [--threshold 0.5] [--scaler savedresult/scaler.pkl]
+                            [--address-column userAddress] [--keep col1,col2] [--flag]
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import joblib
+from dotenv import load_dotenv
+
+from artifacts import load_forest, read_manifest
+from jobs import JobQueue
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+forest = None
+fraud_col = None
+
+
+def init_worker(artifact_dir):
+    global forest, fraud_col
+    forest = load_forest(artifact_dir)
+    fraud_col = list(forest.classes_).index(1)
+
+
+def score(features):
+    return forest.predict_proba(features)[:, fraud_col]
+
+
+def is_parquet(path):
+    return path.lower().endswith(PARQUET_EXTENSIONS)
+
+
+def input_columns(path):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def input_rows(path):
+    # Parquet footers carry the row count; a CSV would have to be read once to know it
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def read_chunks(path, columns, feature_columns, chunk_rows):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=dict.fromkeys(feature_columns, np.float32),
+                               chunksize=chunk_rows, engine='c')
+
+
+class ChunkWriter:
+    """Appends frames to a Parquet or CSV file under a temporary name, renamed into place on close."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f'{path}.tmp{os.getpid()}'
+        self._parquet = None
+        self._started = False
+
+    def write(self, frame):
+        if is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.tmp_path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.tmp_path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._started:
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def main():
+    load_dotenv()
+    model_path = os.getenv('MODEL_PATH') or r"C:\do\fraud-detection-dapp\savedresult\fraud_detection_model.pkl"
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input', help='transactions as .csv or .parquet')
+    parser.add_argument('output', help='scores as .csv or .parquet')
+    parser.add_argument('--artifacts', default=os.getenv('ARTIFACT_DIR') or
+                        os.path.join(os.path.dirname(model_path), 'artifacts'))
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threshold', type=float, default=0.5, help='fraud when fraudScore is above this')
+    parser.add_argument('--scaler', help='scaler.pkl to apply to a raw Amount column, as in training')
+    parser.add_argument('--address-column', default='userAddress')
+    parser.add_argument('--keep', default='', help='comma-separated input columns copied to the output')
+    parser.add_argument('--flag', action='store_true', help='queue on-chain fraud flags for flagged addresses')
+    args = parser.parse_args()
+
+    feature_columns = read_manifest(args.artifacts)['featureColumns']
+    if not feature_columns:
+        raise ValueError(f"{args.artifacts} does not record the model's feature columns")
+    available = input_columns(args.input)
+    missing = [column for column in feature_columns if column not in available]
+    if missing:
+        raise ValueError(f"{args.input} is missing feature columns: {', '.join(missing)}")
+    keep = [column for column in args.keep.split(',') if column]
+    if args.address_column in available and args.address_column not in keep:
+        keep.insert(0, args.address_column)
+    if args.flag and args.address_column not in available:
+        parser.error(f"--flag needs an address column ({args.address_column!r} not in {args.input})")
+    unknown = [column for column in keep if column not in available]
+    if unknown:
+        parser.error(f"--keep columns not in {args.input}: {', '.join(unknown)}")
+    scaler = joblib.load(args.scaler) if args.scaler else None
+    total = input_rows(args.input)
+
+    writer = ChunkWriter(args.output)
+    flagged = set()
+    rows = frauds = 0
+    started = time.perf_counter()
+
+    def write_result(kept, future):
+        nonlocal rows, frauds
+        scores = future.result()
+        out = kept.reset_index(drop=True)
+        out['fraudScore'] = scores.astype(np.float32)
+        out['isFraud'] = scores > args.threshold
+        writer.write(out)
+        if args.flag:
+            flagged.update(out.loc[out['isFraud'], args.address_column].dropna())
+        rows += len(out)
+        frauds += int(out['isFraud'].sum())
+        elapsed = time.perf_counter() - started
+        progress = f"{rows}/{total} rows ({rows / total:.0%})" if total else f"{rows} rows"
+        print(f"{progress}, {frauds} fraud, {rows / elapsed:,.0f} rows/s", flush=True)
+
+    in_flight = deque()
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.artifacts,)) as pool:
+            for chunk in read_chunks(args.input, feature_columns + [c for c in keep if c not in feature_columns],
+                                     feature_columns, args.chunk_rows):
+                if scaler is not None:
+                    chunk['Amount'] = scaler.transform(chunk[['Amount']])
+                features = chunk[feature_columns].to_numpy(np.float32)
+                in_flight.append((chunk[keep], pool.submit(score, features)))
+                # Results are written in submission order; waiting on the oldest bounds what is held
+                if len(in_flight) >= 2 * args.workers:
+                    write_result(*in_flight.popleft())
+            while in_flight:
+                write_result(*in_flight.popleft())
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+
+    elapsed = time.perf_counter() - started
+    print(f"Scored {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"{frauds} fraud; wrote {args.output}")
+
+    if args.flag and flagged:
+        job_queue = JobQueue(os.getenv('JOB_DB_PATH') or
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.sqlite3'))
+        job_ids = job_queue.enqueue_many((address, True) for address in sorted(flagged))
+        print(f"Queued {len(job_ids)} fraud flags in {job_queue.db_path}; the server's flag workers send them")
+
+
+if __name__ == '__main__':
+    main()
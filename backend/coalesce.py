@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class FlagCoalescer:
+    """Collapses repeated fraud flags for the same address and skips no-op writes.
+
+    ``submit(address, is_fraud, send)`` calls ``send()`` only when no flag with the same
+    value was sent for that address within ``window`` seconds and
+    ``state_lookup(address)`` (if given) does not already report that value. Otherwise
+    it returns the earlier send's result. Every skipped call is one transaction saved.
+    """
+
+    def __init__(self, window=30.0, state_lookup=None):
+        self.window = window
+        self.state_lookup = state_lookup
+        self.submitted = 0
+        self.coalesced = 0
+        self.noop = 0
+        self._recent = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        expired = [key for key, (sent_at, _) in self._recent.items() if now - sent_at >= self.window]
+        for key in expired:
+            del self._recent[key]
+
+    def submit(self, address, is_fraud, send):
+        """Returns (result, sent); result is send()'s return value or the earlier one's.
+
+        The state lookup and send() run outside the lock, so flags for other
+        addresses never wait on them. A concurrent flag for the same address waits
+        for the in-flight send and shares its result (or sends itself if it raised).
+        """
+        key = (address.lower(), bool(is_fraud))
+        in_flight = self._recent_send(key)
+        if in_flight is None:
+            if self.state_lookup is not None and self.state_lookup(address) == bool(is_fraud):
+                with self._lock:
+                    self.noop += 1
+                return None, False
+            with self._lock:
+                in_flight = self._recent_send(key, locked=True)
+                if in_flight is None:
+                    sending = Future()
+                    now = time.monotonic()
+                    if len(self._recent) > 10000:
+                        self._prune(now)
+                    self._recent[key] = (now, sending)
+                    self.submitted += 1
+        if in_flight is not None:
+            try:
+                return in_flight.result(), False
+            except Exception:
+                return self.submit(address, is_fraud, send)
+        try:
+            result = send()
+        except BaseException as e:
+            with self._lock:
+                if self._recent.get(key, (None, None))[1] is sending:
+                    del self._recent[key]
+                self.submitted -= 1
+            sending.set_exception(e)
+            raise
+        sending.set_result(result)
+        return result, True
+
+    def _recent_send(self, key, locked=False):
+        # Future of a send for key within the window (counted as coalesced), else None
+        if not locked:
+            with self._lock:
+                return self._recent_send(key, locked=True)
+        recent = self._recent.get(key)
+        if recent is not None and time.monotonic() - recent[0] < self.window:
+            self.coalesced += 1
+            return recent[1]
+        return None
+
+    def forget(self, address, is_fraud):
+        # Lets the next flag for address go out again, e.g. after its transaction failed
+        with self._lock:
+            self._recent.pop((address.lower(), bool(is_fraud)), None)
+
+    def record_noop(self):
+        with self._lock:
+            self.noop += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'skippedNoop': self.noop,
+                'transactionsSaved': self.coalesced + self.noop,
+                'windowSeconds': self.window
+            }
@@ -0,0 +1,246 @@
+"""Post-training forest compaction: prune trees, cap depth, quantize, distill.
+
+Starts from the saved forest and produces one memory-mappable artifact
+directory (see artifacts.py) per setting:
+- --trees: keep the K trees picked by greedy forward selection on the
+  ensemble's AUC.
+- --max-depth: turn every node at depth D into a leaf that predicts the class
+  distribution of the samples that reached it, then drop unreachable nodes.
+- --precision: store thresholds and leaf values as float32 or float16.
+  Thresholds round down, so float32 is exact for the float32 features the
+  trees compare.
+- --distill: fit a small student on the forest's fraud probability over the
+  rows of --distill-data. The student is a regression forest served as a
+  FlatForest, or a gradient-boosted classifier trained on soft labels and
+  saved as a pickle.
+
+X_test is split in half. Tree selection uses one half; the AUC in the report
+is measured on the other. The report gives AUC, single-row latency, batch
+throughput and artifact size for each setting, next to the original model.
+
+Usage: python compact.py savedresult_dir [--out compacted] [--trees 100,50,25] [--max-depth none,12,8]
+                         [--precision float64,float32,float16] [--distill forest,gbm --distill-data creditcard.csv]
+                         [--report compact_report.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestRegressor
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from artifacts import write_artifacts
+from forest_export import FlatForest, flatten_forest
+from bench_forest import best_us
+from train import SEED, load_split, parse_values
+
+
+def fraud_scores(model, X):
+    return model.predict_proba(X)[:, list(model.classes_).index(1)]
+
+
+def select_trees(forest, X, y, k):
+    """Indices of k trees, added one at a time by how much each raises the ensemble AUC on (X, y)."""
+    fraud_col = list(forest.classes_).index(1)
+    # rows x trees matrix of each tree's fraud probability, so every candidate is one column add
+    per_tree = np.asarray(forest.value[forest.apply(X), fraud_col], dtype=np.float64)
+    chosen, total = [], np.zeros(len(X))
+    remaining = list(range(per_tree.shape[1]))
+    for _ in range(min(k, len(remaining))):
+        best = max(remaining, key=lambda tree: roc_auc_score(y, total + per_tree[:, tree]))
+        remaining.remove(best)
+        chosen.append(best)
+        total += per_tree[:, best]
+    return chosen
+
+
+def rebuild(arrays, trees, max_depth=None):
+    """Node arrays holding only the given trees, cut at max_depth, in breadth-first order."""
+    left, right = arrays['left'], arrays['right']
+    is_leaf = left == np.arange(len(left))
+    frontier = arrays['roots'][np.asarray(trees)]
+    old_ids, new_left, new_right, leaves = [], [], [], []
+    next_id = depth = 0
+    while len(frontier):
+        n = len(frontier)
+        ids = np.arange(next_id, next_id + n)
+        leaf = is_leaf[frontier] | (max_depth is not None and depth >= max_depth)
+        internal = np.flatnonzero(~leaf)
+        # Level-major layout: this level's left children, then its right children
+        left_ids, right_ids = ids.copy(), ids.copy()
+        left_ids[internal] = next_id + n + np.arange(len(internal))
+        right_ids[internal] = next_id + n + len(internal) + np.arange(len(internal))
+        old_ids.append(frontier)
+        new_left.append(left_ids)
+        new_right.append(right_ids)
+        leaves.append(leaf)
+        frontier = np.concatenate([left[frontier[internal]], right[frontier[internal]]])
+        next_id += n
+        depth += 1
+    old, leaf = np.concatenate(old_ids), np.concatenate(leaves)
+    rebuilt = {
+        'feature': np.where(leaf, 0, arrays['feature'][old]).astype(np.int32),
+        'threshold': np.where(leaf, np.inf, arrays['threshold'][old]),
+        'left': np.concatenate(new_left).astype(np.int32),
+        'right': np.concatenate(new_right).astype(np.int32),
+        # Internal nodes carry the class distribution of the samples that reached them
+        'value': arrays['value'][old],
+        'roots': np.arange(len(trees), dtype=np.int32),
+        'classes': arrays['classes'],
+        'max_depth': np.array(depth - 1, dtype=np.int32),
+    }
+    for name in ('feature_names', 'n_features'):
+        if name in arrays:
+            rebuilt[name] = arrays[name]
+    return rebuilt
+
+
+def quantize(arrays, precision):
+    if precision == 'float64':
+        return arrays
+    dtype = np.dtype(precision)
+    threshold = arrays['threshold']
+    finite = np.isfinite(threshold)
+    limit = np.finfo(dtype).max
+    quantized = np.where(finite, np.clip(threshold, -limit, limit), np.inf).astype(dtype)
+    # Round down: for inputs representable in dtype, x <= q decides exactly as x <= t
+    too_high = finite & (quantized.astype(np.float64) > threshold)
+    quantized[too_high] = np.nextafter(quantized[too_high], dtype.type(-np.inf))
+    return dict(arrays, threshold=quantized, value=arrays['value'].astype(dtype))
+
+
+def distill_forest(teacher, X, trees, depth):
+    student = RandomForestRegressor(n_estimators=trees, max_depth=depth, random_state=SEED, n_jobs=-1)
+    student.fit(X, fraud_scores(teacher, X))
+    return FlatForest.from_arrays(flatten_forest(student))
+
+
+def distill_gbm(teacher, X, iterations, depth):
+    # Soft labels as weights: each row appears once as fraud (weight p) and once as legitimate (1 - p)
+    p = fraud_scores(teacher, X)
+    student = HistGradientBoostingClassifier(max_iter=iterations, max_depth=depth, random_state=SEED)
+    student.fit(pd.concat([X, X], ignore_index=True), np.r_[np.zeros(len(X), np.int8), np.ones(len(X), np.int8)],
+                sample_weight=np.r_[1 - p, p])
+    return student
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure(model, X, y, size_bytes, baseline_auc=None):
+    one = X[:1]
+    with warnings.catch_warnings():
+        # X is a float32 array in the model's column order; models fitted on DataFrames warn about its names
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        auc = float(roc_auc_score(y, fraud_scores(model, X)))
+        batch_us = best_us(lambda: model.predict_proba(X), 1)
+        single_us = best_us(lambda: model.predict_proba(one), 100)
+    result = {
+        'auc': auc,
+        'aucDelta': None if baseline_auc is None else auc - baseline_auc,
+        'singleRowUs': single_us,
+        'rowsPerSec': len(X) / batch_us * 1e6,
+        'sizeBytes': size_bytes,
+    }
+    if isinstance(model, FlatForest):
+        result.update(trees=model.n_estimators, nodes=model.n_nodes, maxDepth=model.max_depth,
+                      precision=model.threshold.dtype.name)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('saved_dir')
+    parser.add_argument('--out', default='compacted', help='one artifact directory per setting goes here')
+    parser.add_argument('--trees', default='100,50,25')
+    parser.add_argument('--max-depth', default='none,12,8')
+    parser.add_argument('--precision', default='float64,float32,float16')
+    parser.add_argument('--distill', default='', help='comma-separated students: forest, gbm')
+    parser.add_argument('--distill-data', metavar='CSV', help='dataset whose training split the students learn from')
+    parser.add_argument('--distill-rows', type=int, default=200000)
+    parser.add_argument('--student-trees', type=int, default=20)
+    parser.add_argument('--student-depth', type=int, default=8)
+    parser.add_argument('--report', default='compact_report.json')
+    args = parser.parse_args()
+
+    model_path = os.path.join(args.saved_dir, 'fraud_detection_model.pkl')
+    teacher = joblib.load(model_path)
+    teacher.n_jobs = 1
+    columns = list(teacher.feature_names_in_)
+    X_test = joblib.load(os.path.join(args.saved_dir, 'X_test.pkl'))[columns].to_numpy(np.float32)
+    y_test = np.asarray(joblib.load(os.path.join(args.saved_dir, 'y_test.pkl')))
+    X_select, X_eval, y_select, y_eval = train_test_split(X_test, y_test, test_size=0.5,
+                                                          stratify=y_test, random_state=SEED)
+    arrays = flatten_forest(teacher)
+    forest = FlatForest.from_arrays(arrays)
+
+    results = [dict(measure(teacher, X_eval, y_eval, os.path.getsize(model_path)), name='original (sklearn pickle)')]
+    baseline_auc = results[0]['auc']
+
+    tree_counts = sorted({min(k or forest.n_estimators, forest.n_estimators)
+                          for k in parse_values(args.trees, int)}, reverse=True)
+    # The full forest keeps its original order, so only the pruned counts need selecting
+    pruned = [k for k in tree_counts if k < forest.n_estimators]
+    order = []
+    if pruned:
+        started = time.perf_counter()
+        order = select_trees(forest, X_select, y_select, max(pruned))
+        print(f"Tree selection in {time.perf_counter() - started:.1f}s")
+
+    for trees, depth, precision in itertools.product(tree_counts, parse_values(args.max_depth, int),
+                                                     args.precision.split(',')):
+        # All trees keep their original order; fewer are the first picks of the greedy selection
+        kept = list(range(forest.n_estimators)) if trees == forest.n_estimators else order[:trees]
+        compacted = FlatForest.from_arrays(quantize(rebuild(arrays, kept, depth), precision))
+        name = f"t{trees}-d{depth or 'full'}-{precision}"
+        out_dir = os.path.join(args.out, name)
+        write_artifacts(out_dir, compacted)
+        results.append(dict(measure(compacted, X_eval, y_eval, dir_size(out_dir), baseline_auc),
+                            name=name, path=out_dir))
+
+    students = [student for student in args.distill.split(',') if student]
+    if students:
+        if not args.distill_data:
+            parser.error('--distill needs --distill-data')
+        X_distill = load_split(args.distill_data)[0][columns]
+        if len(X_distill) > args.distill_rows:
+            X_distill = X_distill.sample(args.distill_rows, random_state=SEED)
+        for student in students:
+            started = time.perf_counter()
+            name = f"distill-{student}-t{args.student_trees}-d{args.student_depth}"
+            out_dir = os.path.join(args.out, name)
+            if student == 'forest':
+                model = distill_forest(forest, X_distill, args.student_trees, args.student_depth)
+                write_artifacts(out_dir, model)
+            elif student == 'gbm':
+                model = distill_gbm(forest, X_distill, args.student_trees, args.student_depth)
+                os.makedirs(out_dir, exist_ok=True)
+                joblib.dump(model, os.path.join(out_dir, 'fraud_detection_model.pkl'))
+            else:
+                parser.error(f'Unknown student {student!r}; use forest or gbm')
+            fit_seconds = time.perf_counter() - started
+            results.append(dict(measure(model, X_eval, y_eval, dir_size(out_dir), baseline_auc),
+                                name=name, path=out_dir, fitSeconds=fit_seconds))
+
+    with open(args.report, 'w') as f:
+        json.dump({'model': os.path.abspath(model_path), 'evalRows': len(X_eval), 'settings': results}, f, indent=2)
+
+    print(f"{'setting':<34}{'AUC':>8}{'dAUC':>9}{'1 row (us)':>12}{'rows/s':>12}{'size (MB)':>11}")
+    for result in results:
+        delta = '' if result['aucDelta'] is None else f"{result['aucDelta']:+.4f}"
+        print(f"{result['name']:<34}{result['auc']:>8.4f}{delta:>9}{result['singleRowUs']:>12.1f}"
+              f"{result['rowsPerSec']:>12.0f}{result['sizeBytes'] / 1e6:>11.2f}")
+    print(f"Report in {args.report}; serve a setting with MODEL_BACKEND=mmap ARTIFACT_DIR=<path> "
+          f"(gbm students: MODEL_BACKEND=sklearn MODEL_PATH=<path>/fraud_detection_model.pkl)")
+
+
+if __name__ == '__main__':
+    main()
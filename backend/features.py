@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+
+class FeatureError(ValueError):
+    def __init__(self, missing=(), non_numeric=(), message=None, non_finite=()):
+        self.missing = list(missing)
+        self.non_numeric = list(non_numeric)
+        self.non_finite = list(non_finite)
+        if message is None:
+            problems = []
+            if self.missing:
+                problems.append(f"missing fields: {', '.join(self.missing)}")
+            if self.non_numeric:
+                problems.append(f"non-numeric fields: {', '.join(self.non_numeric)}")
+            if self.non_finite:
+                problems.append(f"non-finite fields: {', '.join(self.non_finite)}")
+            message = 'Invalid transaction data: ' + '; '.join(problems)
+        super().__init__(message)
+
+
+def _parse_number(value):
+    # Numeric strings ("1.5") are accepted as the DataFrame path always did; NaN is not a value
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if number == number else None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except OverflowError:
+        # An int beyond float64 (JSON allows any length)
+        return np.inf
+
+
+_value_type = np.frompyfunc(type, 1, 1)
+_parse_numbers = np.frompyfunc(_parse_number, 1, 1)
+_to_floats = np.frompyfunc(_to_float, 1, 1)
+
+
+class FeatureExtractor:
+    """Maps a JSON transaction straight into a NumPy row in training column order.
+
+    The tree ensemble compares features as float32, so extracting into float32
+    (or float64, which sklearn casts to float32) gives the same predictions as
+    going through a one-row DataFrame. This is the one validator for both
+    /check-fraud and /check-fraud/batch: JSON numbers and numeric strings are
+    accepted; booleans, NaN and anything else are non-numeric. Values that are
+    infinite in the row's dtype (inf, "Infinity", or 1e300 in float32) are
+    non-finite, since predict_proba rejects the whole input over one of them.
+    """
+
+    def __init__(self, feature_names, dtype=np.float32):
+        self.feature_names = tuple(feature_names)
+        self.dtype = np.dtype(dtype)
+        self._fields = tuple(enumerate(self.feature_names))
+
+    def __len__(self):
+        return len(self.feature_names)
+
+    def empty(self, n_rows=None):
+        shape = (len(self.feature_names),) if n_rows is None else (n_rows, len(self.feature_names))
+        return np.empty(shape, dtype=self.dtype)
+
+    def extract(self, payload, out=None):
+        if not isinstance(payload, dict):
+            raise FeatureError(message='Invalid transaction data: transaction must be a JSON object')
+        row = self.empty() if out is None else out
+        missing = None
+        non_numeric = None
+        # Out-of-range values become inf in the row and are reported below, not warned about
+        with np.errstate(over='ignore'):
+            for i, name in self._fields:
+                value = payload.get(name)
+                # bool is an int subclass, but True/False is never a valid amount or component
+                if type(value) is int or (type(value) is float and value == value):
+                    try:
+                        row[i] = value
+                    except OverflowError:
+                        # An int beyond float64 (JSON allows any length)
+                        row[i] = np.inf
+                elif value is None:
+                    missing = (missing or []) + [name]
+                elif type(value) is str and (number := _parse_number(value)) is not None:
+                    row[i] = number
+                else:
+                    non_numeric = (non_numeric or []) + [name]
+        if missing or non_numeric:
+            raise FeatureError(missing or (), non_numeric or ())
+        if not np.isfinite(row).all():
+            raise FeatureError(non_finite=[self.feature_names[i] for i in np.flatnonzero(~np.isfinite(row))])
+        return row
+
+    def extract_many(self, payloads):
+        """(rows, errors): errors maps the index of each invalid payload to the message
+        extract() raises for it; those rows are left unset.
+
+        The batch is validated column-wise in one pass over an object array of the raw
+        values, with the same rules as extract(). Only string cells and NaNs are
+        looked at one by one.
+        """
+        n, names = len(payloads), np.asarray(self.feature_names, dtype=object)
+        errors = {i: 'Invalid transaction data: transaction must be a JSON object'
+                  for i, payload in enumerate(payloads) if not isinstance(payload, dict)}
+        records = [payload if isinstance(payload, dict) else {} for payload in payloads]
+        # dtype=object keeps every JSON value as it came; absent keys become NaN
+        cells = pd.DataFrame(records, columns=list(self.feature_names), dtype=object).to_numpy()
+        kinds = _value_type(cells)
+        # Exact types: bool is an int subclass but never a valid amount or component
+        numbers = (kinds == float) | (kinds == int)
+        values = np.full((n, len(names)), np.nan)
+        try:
+            values[numbers] = cells[numbers].astype(np.float64)
+        except OverflowError:
+            values[numbers] = _to_floats(cells[numbers]).astype(np.float64)
+        if numbers.all():
+            missing = np.zeros_like(numbers)
+            non_numeric = np.zeros_like(numbers)
+        else:
+            strings = kinds == str
+            missing = kinds == type(None)
+            with np.errstate(invalid='ignore'):
+                # Parsing "nan" sets the FP invalid flag numpy checks after the loop
+                parsed = _parse_numbers(cells[strings])
+            unparsed = np.equal(parsed, None)
+            values[strings] = np.where(unparsed, np.nan, parsed).astype(np.float64)
+            non_numeric = ~(numbers | strings | missing)
+            non_numeric[strings] = unparsed
+        # A NaN is an absent key (missing) or a NaN the client sent (non-numeric)
+        for i, j in zip(*np.nonzero(numbers & np.isnan(values))):
+            if names[j] in records[i]:
+                non_numeric[i, j] = True
+            else:
+                missing[i, j] = True
+
+        rows = self.empty(n)
+        with np.errstate(over='ignore', invalid='ignore'):
+            rows[:] = values
+        non_finite = ~np.isfinite(rows) & ~missing & ~non_numeric
+        invalid = missing.any(axis=1) | non_numeric.any(axis=1)
+        for i in np.flatnonzero(invalid | non_finite.any(axis=1)):
+            if i in errors:
+                continue
+            if invalid[i]:
+                error = FeatureError(names[missing[i]], names[non_numeric[i]])
+            else:
+                error = FeatureError(non_finite=names[non_finite[i]])
+            errors[int(i)] = str(error)
+        return rows, errors
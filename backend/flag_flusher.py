@@ -0,0 +1,117 @@
+import threading
+
+
+class FraudFlagFlusher:
+    """Collects fraud flags and writes them with batchUpdateFraudStatus in gas-bounded chunks.
+
+    Chunk sizes start from a per-flag gas estimate and are checked with
+    estimate_gas before sending. A chunk over the gas budget is split in half.
+    All chunks are sent back to back through the nonce manager and then
+    confirmed together.
+    """
+
+    def __init__(self, w3, contract, nonces, owner_address, private_key, gas_budget=3000000,
+                 base_gas=30000, gas_per_flag=32000, gas_price_gwei=20, receipts=None):
+        self.w3 = w3
+        self.receipts = receipts
+        self.contract = contract
+        self.nonces = nonces
+        self.owner_address = owner_address
+        self.private_key = private_key
+        self.gas_budget = gas_budget
+        self.base_gas = base_gas
+        self.gas_per_flag = gas_per_flag
+        self.gas_price = w3.to_wei(gas_price_gwei, 'gwei')
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, user_address, is_fraud=True):
+        with self._lock:
+            self._pending.append((user_address, bool(is_fraud)))
+
+    def flush(self):
+        with self._lock:
+            entries, self._pending = self._pending, []
+        return self.submit(entries) if entries else []
+
+    def chunks(self, entries):
+        """Split entries into (chunk, gas) pairs that fit the gas budget.
+
+        Single entries the node refuses to estimate come back separately as
+        (chunk, error).
+        """
+        per_chunk = max(1, (self.gas_budget - self.base_gas) // self.gas_per_flag)
+        pending = [entries[i:i + per_chunk] for i in range(0, len(entries), per_chunk)]
+        ready, rejected = [], []
+        while pending:
+            chunk = pending.pop(0)
+            addresses, flags = zip(*chunk)
+            try:
+                estimate = self.contract.functions.batchUpdateFraudStatus(
+                    list(addresses), list(flags)
+                ).estimate_gas({'from': self.owner_address})
+            except Exception as e:
+                # Split until the entry the node refuses (e.g. an unregistered
+                # address, which would revert the whole chunk) is on its own
+                if len(chunk) > 1:
+                    half = len(chunk) // 2
+                    pending[:0] = [chunk[:half], chunk[half:]]
+                else:
+                    rejected.append((chunk, str(e)))
+                continue
+            # 20% headroom over the node's estimate
+            gas = int(estimate * 1.2)
+            if gas > self.gas_budget and len(chunk) > 1:
+                half = len(chunk) // 2
+                pending[:0] = [chunk[:half], chunk[half:]]
+                continue
+            ready.append((chunk, gas))
+        return ready, rejected
+
+    def _send(self, chunk, gas):
+        addresses, flags = zip(*chunk)
+        call = self.contract.functions.batchUpdateFraudStatus(list(addresses), list(flags))
+        return self.nonces.send(self.owner_address, self.private_key, lambda nonce: call.build_transaction({
+            'from': self.owner_address,
+            'nonce': nonce,
+            'gas': gas,
+            'gasPrice': self.gas_price
+        }))
+
+    def submit(self, entries, on_sent=None):
+        """Send entries as batched transactions and wait for all of them.
+
+        ``on_sent(chunk, tx_hash)`` runs as each transaction is sent. Returns one
+        dict per chunk with ``entries``, ``status`` ('mined', 'reverted' or
+        'failed'), ``txHash``, ``gasUsed`` and ``error``.
+        """
+        ready, rejected = self.chunks(entries)
+        results = [{'entries': chunk, 'status': 'failed', 'error': error} for chunk, error in rejected]
+        sent = []
+        for chunk, gas in ready:
+            try:
+                sent.append((chunk, self._send(chunk, gas)))
+            except Exception as e:
+                results.append({'entries': chunk, 'status': 'failed', 'error': str(e)})
+                continue
+            if on_sent is not None:
+                on_sent(chunk, sent[-1][1])
+        if self.receipts is not None:
+            sent = [(chunk, tx_hash, self.receipts.track(tx_hash)) for chunk, tx_hash in sent]
+        for chunk, tx_hash, *tracked in sent:
+            try:
+                receipt = tracked[0].result() if tracked else self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            except Exception as e:
+                results.append({'entries': chunk, 'status': 'failed', 'txHash': tx_hash.hex(), 'error': str(e)})
+                continue
+            mined = receipt['status'] == 1
+            results.append({
+                'entries': chunk,
+                'status': 'mined' if mined else 'reverted',
+                'txHash': tx_hash.hex(),
+                'gasUsed': receipt['gasUsed'],
+                'error': None if mined else 'Batch fraud status update reverted'
+            })
+            print(f"Batch fraud status update for {len(chunk)} users "
+                  f"{'mined' if mined else 'reverted'}. Tx Hash: {tx_hash.hex()}")
+        return results
@@ -0,0 +1,147 @@
+"""Flatten a fitted RandomForestClassifier into plain node arrays and evaluate it with NumPy.
+
+Usage: python forest_export.py path/to/fraud_detection_model.pkl [out.npz]
+"""
+import os
+import sys
+
+import numpy as np
+import joblib
+
+
+def flatten_forest(model):
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        index = np.arange(offset, offset + n_nodes, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+        # Leaves point at themselves with an infinite threshold, so a fixed number
+        # of vectorized steps leaves every row parked on its leaf
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, index, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, index, tree.children_right + offset).astype(np.int32))
+        value = tree.value[:, 0, :]
+        if value.shape[1] == 1:
+            # Regression trees on the fraud probability (compact.py's distilled students)
+            value = np.hstack([1 - value, value])
+        values.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'classes': np.asarray(getattr(model, 'classes_', [0, 1])),
+        'max_depth': np.array(max_depth, dtype=np.int32),
+        # Stored, not derived: a forest need not split on its last feature
+        'n_features': np.array(model.n_features_in_, dtype=np.int32),
+    }
+    if hasattr(model, 'feature_names_in_'):
+        arrays['feature_names'] = np.asarray(model.feature_names_in_, dtype=str)
+    return arrays
+
+
+def export_forest(model, path):
+    np.savez(path, **flatten_forest(model))
+    return path
+
+
+class FlatForest:
+    """Array-backed forest with the predict/predict_proba surface of the sklearn model."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth,
+                 feature_names=None, is_leaf=None, n_features=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+            self.n_features_in_ = len(feature_names)
+        elif n_features is not None:
+            self.n_features_in_ = int(n_features)
+        else:
+            # Exports from before n_features was stored
+            self.n_features_in_ = int(feature.max()) + 1
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(**{name: arrays[name] for name in arrays})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
+
+    def arrays(self):
+        """The node arrays in flatten_forest's layout (dtypes as stored, e.g. quantized)."""
+        arrays = {name: getattr(self, name) for name in ('feature', 'threshold', 'left', 'right', 'value', 'roots')}
+        arrays.update(classes=self.classes_, max_depth=np.array(self.max_depth, dtype=np.int32),
+                      n_features=np.array(self.n_features_in_, dtype=np.int32))
+        if hasattr(self, 'feature_names_in_'):
+            arrays['feature_names'] = np.asarray(self.feature_names_in_, dtype=str)
+        return arrays
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.value, self.roots, self.is_leaf))
+
+    def apply(self, X):
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            if self.is_leaf[nodes].all():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        proba = self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+        if self.value.dtype != np.float64:
+            # Quantized leaf values no longer sum to exactly one
+            proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    model_path = sys.argv[1]
+    out_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + '.npz'
+    model = joblib.load(model_path)
+    export_forest(model, out_path)
+    flat = FlatForest.load(out_path)
+    print(f"Exported {flat.n_estimators} trees / {flat.n_nodes} nodes "
+          f"({flat.nbytes / 1e6:.1f} MB) to {out_path}")
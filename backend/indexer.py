@@ -0,0 +1,197 @@
+import sqlite3
+import threading
+import time
+
+from eth_utils import event_abi_to_log_topic
+
+INDEXED_EVENTS = ('FraudStatusUpdated', 'UserRegistered', 'UserLoggedIn')
+
+
+def _hex(value):
+    return '0x' + bytes(value).hex()
+
+
+class EventIndexer:
+    """Follows UserAuth events into a local SQLite index keyed by address and block.
+
+    Logs are read in fixed block ranges up to ``confirmations`` blocks behind the
+    head. The hash of the last indexed block is checkpointed with every range. If
+    the node later reports a different hash for that block, the index rewinds
+    ``reorg_depth`` blocks and re-reads them. Restarts continue from the checkpoint.
+    """
+
+    def __init__(self, w3, contract, db_path, start_block=0, block_range=1000, confirmations=0,
+                 reorg_depth=12, poll_interval=2.0):
+        self.w3 = w3
+        self.contract = contract
+        self.start_block = start_block
+        self.block_range = block_range
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.poll_interval = poll_interval
+        self.error = None
+        self._thread = None
+        self._events = {}
+        for name in INDEXED_EVENTS:
+            event = getattr(contract.events, name)
+            self._events[_hex(event_abi_to_log_topic(event.abi))] = event
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    block_number INTEGER NOT NULL,
+                    log_index INTEGER NOT NULL,
+                    block_hash TEXT NOT NULL,
+                    tx_hash TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    is_fraudulent INTEGER,
+                    username TEXT,
+                    time TEXT,
+                    PRIMARY KEY (block_number, log_index)
+                )
+            """)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS events_address ON events (address, block_number)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS events_event ON events (event, address, block_number)')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    contract TEXT NOT NULL,
+                    last_block INTEGER NOT NULL,
+                    block_hash TEXT
+                )
+            """)
+            # A redeployed contract starts a fresh index
+            self._conn.execute('DELETE FROM events WHERE NOT EXISTS '
+                               '(SELECT 1 FROM checkpoint WHERE contract = ?)', (contract.address,))
+            self._conn.execute('DELETE FROM checkpoint WHERE contract != ?', (contract.address,))
+
+    @property
+    def last_block(self):
+        with self._lock:
+            row = self._conn.execute('SELECT last_block, block_hash FROM checkpoint WHERE id = 1').fetchone()
+        return (row['last_block'], row['block_hash']) if row else (self.start_block - 1, None)
+
+    def _save(self, rows, last_block, block_hash, rewind_to=None):
+        with self._lock, self._conn:
+            if rewind_to is not None:
+                self._conn.execute('DELETE FROM events WHERE block_number > ?', (rewind_to,))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checkpoint (id, contract, last_block, block_hash) VALUES (1, ?, ?, ?)',
+                (self.contract.address, last_block, block_hash)
+            )
+
+    def _check_reorg(self):
+        last_block, block_hash = self.last_block
+        if block_hash is None or last_block < self.start_block:
+            return
+        current = self.w3.eth.get_block(last_block)['hash']
+        if _hex(current) == block_hash:
+            return
+        rewind_to = max(self.start_block - 1, last_block - self.reorg_depth)
+        print(f"Reorg detected at block {last_block}; rewinding event index to block {rewind_to}")
+        rewind_hash = None
+        if rewind_to >= self.start_block:
+            rewind_hash = _hex(self.w3.eth.get_block(rewind_to)['hash'])
+        self._save([], rewind_to, rewind_hash, rewind_to=rewind_to)
+
+    def _row(self, log):
+        decoded = self._events[_hex(log['topics'][0])]().process_log(log)
+        args = decoded['args']
+        return (
+            decoded['blockNumber'],
+            decoded['logIndex'],
+            _hex(decoded['blockHash']),
+            _hex(decoded['transactionHash']),
+            decoded['event'],
+            args['user'].lower(),
+            int(args['isFraudulent']) if 'isFraudulent' in args else None,
+            args.get('username'),
+            args.get('time')
+        )
+
+    def step(self):
+        """Index the next block range; returns the number of events stored."""
+        self._check_reorg()
+        head = self.w3.eth.block_number - self.confirmations
+        last_block, _ = self.last_block
+        if head <= last_block:
+            return 0
+        to_block = min(head, last_block + self.block_range)
+        logs = self.w3.eth.get_logs({
+            'address': self.contract.address,
+            'fromBlock': last_block + 1,
+            'toBlock': to_block
+        })
+        rows = [self._row(log) for log in logs if log['topics'] and _hex(log['topics'][0]) in self._events]
+        block_hash = _hex(self.w3.eth.get_block(to_block)['hash'])
+        self._save(rows, to_block, block_hash)
+        return len(rows)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='event-indexer', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                caught_up = self.step() == 0 and self.last_block[0] >= self.w3.eth.block_number - self.confirmations
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                print(f"Error indexing events: {e}")
+                caught_up = True
+            if caught_up:
+                time.sleep(self.poll_interval)
+
+    def flagged(self, page=1, per_page=50):
+        # Latest FraudStatusUpdated per address decides whether it is flagged now
+        latest = """
+            SELECT address, block_number, log_index, tx_hash, ROW_NUMBER() OVER (
+                PARTITION BY address ORDER BY block_number DESC, log_index DESC
+            ) AS rn, is_fraudulent
+            FROM events WHERE event = 'FraudStatusUpdated'
+        """
+        with self._lock:
+            total = self._conn.execute(
+                f'SELECT COUNT(*) FROM ({latest}) WHERE rn = 1 AND is_fraudulent = 1'
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT address, block_number, tx_hash FROM ({latest}) WHERE rn = 1 AND is_fraudulent = 1 '
+                'ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?',
+                (per_page, (page - 1) * per_page)
+            ).fetchall()
+        return total, [{'address': row['address'], 'flaggedAtBlock': row['block_number'], 'txHash': row['tx_hash']}
+                       for row in rows]
+
+    def history(self, address, page=1, per_page=50, event=None):
+        where, params = 'address = ?', [address.lower()]
+        if event:
+            where += ' AND event = ?'
+            params.append(event)
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM events WHERE {where}', params).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT * FROM events WHERE {where} ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        events = []
+        for row in rows:
+            entry = {'event': row['event'], 'blockNumber': row['block_number'], 'logIndex': row['log_index'],
+                     'txHash': row['tx_hash']}
+            if row['event'] == 'FraudStatusUpdated':
+                entry['isFraudulent'] = bool(row['is_fraudulent'])
+            else:
+                entry['username'] = row['username']
+            if row['event'] == 'UserLoggedIn':
+                entry['time'] = row['time']
+            events.append(entry)
+        return total, events
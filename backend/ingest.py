@@ -0,0 +1,141 @@
+"""Chunked, typed CSV ingestion into a memory-mapped .npy cache keyed by the file's hash.
+
+The first run streams the CSV in chunks with explicit dtypes: float32 features
+and an int8 label. Rows go straight into a column-major .npy file, so peak
+memory is one chunk rather than the whole float64 frame. Later runs with the
+same file content map that cache copy-on-write, skipping the parse entirely.
+
+Usage: python ingest.py path/to/creditcard.csv [cache_dir]
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def file_digest(path, chunk_size=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _count_rows(path, chunk_size=1 << 20):
+    # Upper bound used to size the output; the exact count is recorded after parsing
+    newlines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            newlines += chunk.count(b'\n')
+            last = chunk
+    if last and not last.endswith(b'\n'):
+        newlines += 1
+    return max(newlines - 1, 0)
+
+
+def _cached_digest(csv_path, cache_dir):
+    # Hashing a large CSV costs more than mapping the cache, so remember the digest
+    # per (path, size, mtime) and only rehash when the file has been touched
+    st = os.stat(csv_path)
+    stat_key = f'{os.path.abspath(csv_path)}|{st.st_size}|{st.st_mtime_ns}'
+    index_path = os.path.join(cache_dir, 'index.json')
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    if stat_key not in index:
+        index[stat_key] = file_digest(csv_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{index_path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, index_path)
+    return index[stat_key]
+
+
+def default_cache_dir(csv_path):
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.ingest_cache')
+
+
+def ingest_csv(csv_path, cache_dir=None, label='Class', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Build (or find) the cache for csv_path and return its directory."""
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    digest = _cached_digest(csv_path, cache_dir)
+    out_dir = os.path.join(cache_dir, digest[:16])
+    if os.path.exists(os.path.join(out_dir, 'meta.json')):
+        return out_dir
+
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    if label not in columns:
+        raise ValueError(f"Label column {label!r} not found in {csv_path}")
+    features = [column for column in columns if column != label]
+    capacity = _count_rows(csv_path)
+
+    tmp_dir = f'{out_dir}.tmp{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    started = time.time()
+    try:
+        # Column-major, so each feature column is one contiguous run (and pandas wraps it without a copy)
+        X = np.lib.format.open_memmap(os.path.join(tmp_dir, 'features.npy'), mode='w+', dtype=np.float32,
+                                      shape=(capacity, len(features)), fortran_order=True)
+        y = np.lib.format.open_memmap(os.path.join(tmp_dir, 'labels.npy'), mode='w+', dtype=np.int8,
+                                      shape=(capacity,))
+        dtypes = dict.fromkeys(features, np.float32)
+        dtypes[label] = np.int8
+        rows = 0
+        for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=chunk_size, engine='c'):
+            n = len(chunk)
+            if rows + n > capacity:
+                raise ValueError(f"{csv_path} has more rows than counted; was it modified while reading?")
+            X[rows:rows + n] = chunk[features].to_numpy(dtype=np.float32)
+            y[rows:rows + n] = chunk[label].to_numpy(dtype=np.int8)
+            rows += n
+        X.flush()
+        y.flush()
+        del X, y
+
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({'source': os.path.abspath(csv_path), 'sha256': digest, 'rows': rows,
+                       'features': features, 'label': label}, f, indent=2)
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    print(f"Ingested {rows} rows from {csv_path} in {time.time() - started:.1f}s: {out_dir}")
+    return out_dir
+
+
+def load_cached(out_dir):
+    """(X, y) as a DataFrame and Series over copy-on-write memory maps of the cache."""
+    with open(os.path.join(out_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    rows = meta['rows']
+    # mode 'c': pages are shared until written, and writes never reach the cache file
+    X = np.load(os.path.join(out_dir, 'features.npy'), mmap_mode='c')[:rows]
+    y = np.load(os.path.join(out_dir, 'labels.npy'), mmap_mode='c')[:rows]
+    return pd.DataFrame(X, columns=meta['features'], copy=False), pd.Series(y, name=meta['label'], copy=False)
+
+
+def load_dataset(csv_path, cache_dir=None, label='Class', chunk_size=DEFAULT_CHUNK_SIZE):
+    return load_cached(ingest_csv(csv_path, cache_dir, label, chunk_size))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    started = time.time()
+    X, y = load_dataset(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"{len(X)} rows x {X.shape[1]} features, {int(y.sum())} positives, "
+          f"ready in {time.time() - started:.2f}s")
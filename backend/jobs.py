@@ -0,0 +1,248 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+class JobQueue:
+    """Persistent queue of on-chain fraud-flag writes backed by SQLite.
+
+    Job status moves pending -> running -> mined | reverted | noop | failed. Several
+    processes can share one database: a claim takes a lease (``owner`` and
+    ``claimed_at``) inside a write transaction, and a running job is only claimed
+    again once its lease is older than ``lease_seconds``, i.e. its process crashed.
+    A job's transaction hash is stored as soon as it is sent (``record_tx``) and
+    kept through retries, so whoever claims the job next can wait for that
+    transaction instead of sending another.
+    """
+
+    def __init__(self, db_path, max_attempts=3, lease_seconds=600):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Transactions are opened explicitly, so a claim can hold the write lock from its first read
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    user_address TEXT NOT NULL,
+                    is_fraud INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    tx_hash TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+            for column, kind in (('owner', 'TEXT'), ('claimed_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            'id': row['id'],
+            'userAddress': row['user_address'],
+            'isFraud': bool(row['is_fraud']),
+            'status': row['status'],
+            'txHash': row['tx_hash'],
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'createdAt': row['created_at'],
+            'updatedAt': row['updated_at']
+        }
+
+    def enqueue(self, user_address, is_fraud):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, user_address, is_fraud, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)",
+                (job_id, user_address, int(bool(is_fraud)), now, now)
+            )
+        self._wakeup.set()
+        return job_id
+
+    def enqueue_many(self, entries):
+        """Queue (user_address, is_fraud) pairs in one transaction; returns their job ids."""
+        now = time.time()
+        rows = [(uuid.uuid4().hex, user_address, int(bool(is_fraud)), now, now) for user_address, is_fraud in entries]
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT INTO jobs (id, user_address, is_fraud, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)",
+                rows
+            )
+        self._wakeup.set()
+        return [row[0] for row in rows]
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def claim(self, limit=1):
+        now = time.time()
+        # BEGIN IMMEDIATE takes the database write lock before the SELECT, so no
+        # other process can claim the same rows between the read and the update
+        with self._lock, self._transaction():
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' OR (status = 'running' AND claimed_at < ?) "
+                "ORDER BY created_at LIMIT ?", (now - self.lease_seconds, limit)
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, owner = ?, claimed_at = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    [(self.owner, now, now, row['id']) for row in rows]
+                )
+        jobs = [self._to_dict(row) for row in rows]
+        for job in jobs:
+            job['status'] = 'running'
+            job['attempts'] += 1
+        return jobs
+
+    def record_tx(self, job_id, tx_hash):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET tx_hash = ?, updated_at = ? WHERE id = ?", (tx_hash, time.time(), job_id)
+            )
+
+    def complete(self, job_id, status, tx_hash=None, error=None):
+        # Without a tx_hash the recorded one stays, e.g. for a retry after a receipt timeout
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, tx_hash = COALESCE(?, tx_hash), error = ?, updated_at = ? WHERE id = ?",
+                (status, tx_hash, error, time.time(), job_id)
+            )
+
+    def retry_or_fail(self, job, error):
+        # Transient failures (node down, nonce races) go back on the queue until max_attempts
+        status = 'pending' if job['attempts'] < self.max_attempts else 'failed'
+        self.complete(job['id'], status, error=error)
+        if status == 'pending':
+            self._wakeup.set()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def wait_for_work(self, timeout):
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+
+class JobWorkers:
+    """Background threads that drain a JobQueue.
+
+    ``handler(job)`` processes one job at a time; ``batch_handler(jobs)`` gets up
+    to batch_size jobs and returns a dict of job id -> result. A result is a dict
+    with ``status`` ('mined', 'reverted', 'noop' or 'failed') and optionally ``txHash``
+    and ``error``, or a Future of one, so a worker can move on while the
+    transaction is mined. Failed jobs are retried by the queue.
+    """
+
+    def __init__(self, job_queue, handler=None, workers=1, poll_interval=1.0, batch_handler=None, batch_size=1):
+        self.job_queue = job_queue
+        self.handler = handler
+        self.batch_handler = batch_handler
+        self.batch_size = batch_size if batch_handler else 1
+        self.poll_interval = poll_interval
+        self._threads = [
+            threading.Thread(target=self._run, name=f'chain-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            if thread.ident is None:
+                thread.start()
+        return self
+
+    def _handle(self, jobs):
+        if self.batch_handler:
+            try:
+                return self.batch_handler(jobs)
+            except Exception as e:
+                return {job['id']: {'status': 'failed', 'error': str(e)} for job in jobs}
+        results = {}
+        for job in jobs:
+            try:
+                results[job['id']] = self.handler(job)
+            except Exception as e:
+                results[job['id']] = {'status': 'failed', 'error': str(e)}
+        return results
+
+    def _run(self):
+        backoff = self.poll_interval
+        while True:
+            try:
+                jobs = self.job_queue.claim(self.batch_size)
+            except sqlite3.Error as e:
+                # e.g. "database is locked" with many writers; the jobs stay pending for the next try
+                print(f"Claiming jobs failed, retrying in {backoff:.1f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = self.poll_interval
+            if not jobs:
+                self.job_queue.wait_for_work(self.poll_interval)
+                continue
+            results = self._handle(jobs)
+            for job in jobs:
+                result = results.get(job['id'])
+                if isinstance(result, Future):
+                    # Sent and waiting on the receipt tracker; finish when it resolves
+                    result.add_done_callback(lambda future, job=job: self._finish(job, self._future_result(future)))
+                else:
+                    self._finish(job, result)
+
+    @staticmethod
+    def _future_result(future):
+        try:
+            return future.result()
+        except Exception as e:
+            return {'status': 'failed', 'error': str(e)}
+
+    def _finish(self, job, result):
+        result = result or {'status': 'failed', 'error': 'No result from handler'}
+        try:
+            if result['status'] == 'failed':
+                self.job_queue.retry_or_fail(job, result.get('error'))
+            else:
+                self.job_queue.complete(job['id'], result['status'], result.get('txHash'), result.get('error'))
+        except sqlite3.Error as e:
+            # The job stays running under this process's lease and is claimed again once it expires
+            print(f"Recording result of job {job['id']} failed: {e}")
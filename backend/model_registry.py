@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+
+from features import FeatureExtractor
+from roc_cache import artifact_digest
+
+
+class ModelVersion:
+    """One loaded model with the feature order and extractor that belong to it."""
+
+    def __init__(self, version, model, feature_columns, source):
+        self.version = version
+        self.model = model
+        self.feature_columns = feature_columns
+        self.feature_extractor = FeatureExtractor(feature_columns, dtype=np.float32)
+        self.fraud_col = list(model.classes_).index(1)
+        self.source = source
+        self.loaded_at = time.time()
+        self._named = isinstance(model, BaseEstimator) and hasattr(model, 'feature_names_in_')
+
+    def predict_proba(self, rows):
+        # Rows come from feature_extractor, in feature_columns order. An sklearn model
+        # fitted on a DataFrame gets them named, so it checks the order instead of warning.
+        if self._named:
+            rows = pd.DataFrame(rows, columns=self.feature_columns, copy=False)
+        return self.model.predict_proba(rows)
+
+    def describe(self):
+        return {'version': self.version, 'source': self.source, 'loadedAt': self.loaded_at,
+                'features': len(self.feature_columns)}
+
+
+class ModelRegistry:
+    """Active model version, swapped atomically when the artifact on disk changes.
+
+    ``load(source)`` returns a fitted model and ``source_files(source)`` the files
+    whose content identifies it. A new version is loaded, validated and warmed up
+    with ``warmup_rows(columns)`` on a background thread while the old one keeps
+    serving. Only then does ``active`` point at it. Requests read ``active`` once
+    and keep that ModelVersion, so in-flight requests finish on the model they
+    started with. A version that fails to load or validate is never swapped in.
+    """
+
+    def __init__(self, source, load, source_files, warmup_rows, default_columns, check_interval=5.0, history=10):
+        self.source = source
+        self.load = load
+        self.source_files = source_files
+        self.warmup_rows = warmup_rows
+        self.default_columns = list(default_columns)
+        self.check_interval = check_interval
+        self.active = None
+        self.error = None
+        self.history = []
+        self._history_size = history
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+
+    def _stat_signature(self, source):
+        return tuple((path, st.st_size, st.st_mtime_ns)
+                     for path, st in ((p, os.stat(p)) for p in self.source_files(source)))
+
+    def _validate(self, candidate):
+        model = candidate.model
+        if not hasattr(model, 'predict_proba') or 1 not in list(model.classes_):
+            raise ValueError('Model must be a fitted classifier with a fraud class (1)')
+        n_features = getattr(model, 'n_features_in_', len(candidate.feature_columns))
+        if n_features != len(candidate.feature_columns):
+            raise ValueError(f'Model expects {n_features} features, feature order has {len(candidate.feature_columns)}')
+        rows = self.warmup_rows(candidate.feature_columns)
+        # The warm-up doubles as a smoke test: shape, range and normalisation of the output
+        proba = np.asarray(candidate.predict_proba(rows))
+        if proba.shape != (len(rows), len(model.classes_)) or not np.isfinite(proba).all() \
+                or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-6):
+            raise ValueError('Model produced invalid probabilities on the warm-up rows')
+
+    def reload(self, source=None, force=False):
+        """Load source (default: the current one) and swap it in; returns the active ModelVersion."""
+        with self._reload_lock:
+            source = source or self.source
+            signature = self._stat_signature(source)
+            if not force and source == self.source and signature == self._signature:
+                return self.active
+            try:
+                started = time.time()
+                version = artifact_digest(self.source_files(source))[:12]
+                if self.active is not None and version == self.active.version and source == self.source:
+                    self._signature = signature
+                    return self.active
+                model = self.load(source)
+                candidate = ModelVersion(
+                    version, model, list(getattr(model, 'feature_names_in_', self.default_columns)), source
+                )
+                self._validate(candidate)
+            except Exception as e:
+                self.error = str(e)
+                # Remember the signature so a broken file is not retried every check
+                if source == self.source:
+                    self._signature = signature
+                print(f"Model reload from {source} failed; keeping the active version: {e}")
+                raise
+            previous = self.active
+            self.active = candidate
+            self.source = source
+            self._signature = signature
+            self.error = None
+            self.history.append(candidate.describe())
+            del self.history[:-self._history_size]
+            print(f"Model version {version} active after {time.time() - started:.1f}s "
+                  f"(was {previous.version if previous else 'none'})")
+            return candidate
+
+    def start_watcher(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self._watcher.start()
+        return self
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.reload()
+            except Exception:
+                pass
+
+    def status(self):
+        return {
+            'active': self.active.describe() if self.active else None,
+            'source': self.source,
+            'error': self.error,
+            'history': list(self.history)
+        }
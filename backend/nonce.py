@@ -0,0 +1,119 @@
+import threading
+import time
+
+from metrics import span
+
+NONCE_ERRORS = ('nonce too low', 'nonce too high', 'invalid nonce', 'replacement transaction underpriced')
+# The node already holds this exact signed transaction, e.g. a send retried after
+# a timeout whose first attempt did reach it
+ALREADY_KNOWN_ERRORS = ('already known', 'known transaction')
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+
+def is_already_known(error):
+    message = str(error).lower()
+    return any(marker in message for marker in ALREADY_KNOWN_ERRORS)
+
+
+class NonceManager:
+    """Hands out nonces per signing account locally instead of asking the node each time.
+
+    The first nonce for an account comes from its pending transaction count. After
+    that nonces are allocated in memory, so several transactions from one account
+    can be in the mempool at once. A nonce error from the node (replaced
+    transaction, or another process sending from the same account) resyncs the
+    counter from the node. Every ``gap_check_interval`` seconds an allocation also
+    compares the counter with the node, because a dropped transaction leaves a gap
+    that holds back every later one without any send failing.
+    """
+
+    def __init__(self, w3, gap_check_interval=30.0):
+        self.w3 = w3
+        self.gap_check_interval = gap_check_interval
+        self._lock = threading.Lock()
+        self._accounts = {}
+
+    def _account(self, address):
+        with self._lock:
+            return self._accounts.setdefault(
+                address.lower(), {'lock': threading.Lock(), 'next': None, 'unsent': set(), 'checked_at': 0.0}
+            )
+
+    def allocate(self, address):
+        account = self._account(address)
+        with account['lock']:
+            now = time.monotonic()
+            if account['next'] is None:
+                account['next'] = self.w3.eth.get_transaction_count(address, 'pending')
+                account['checked_at'] = now
+            elif now - account['checked_at'] >= self.gap_check_interval:
+                self._check_gap(address, account)
+                account['checked_at'] = now
+            nonce = account['next']
+            account['next'] += 1
+            account['unsent'].add(nonce)
+            return nonce
+
+    def _check_gap(self, address, account):
+        # Every nonce below the lowest one still being sent has reached the node,
+        # so a lower pending count means one of them was dropped
+        sent_until = min(account['unsent'], default=account['next'])
+        pending = self.w3.eth.get_transaction_count(address, 'pending')
+        if pending < sent_until:
+            print(f"Nonce gap for {address}: node expects {pending}, sent up to {sent_until - 1}; refilling")
+            account['next'] = pending
+        elif pending > account['next']:
+            # Another process sent from this account
+            account['next'] = pending
+
+    def _finished(self, address, nonce):
+        # The nonce reached the node or was rejected by it; either way it is no longer in flight
+        account = self._account(address)
+        with account['lock']:
+            account['unsent'].discard(nonce)
+
+    def release(self, address, nonce):
+        # A nonce that never reached the node can be reused only if nothing was
+        # allocated after it; otherwise resync from the node on the next allocation
+        account = self._account(address)
+        with account['lock']:
+            account['unsent'].discard(nonce)
+            account['next'] = nonce if account['next'] == nonce + 1 else None
+
+    def resync(self, address):
+        account = self._account(address)
+        with account['lock']:
+            account['next'] = self.w3.eth.get_transaction_count(address, 'pending')
+            account['checked_at'] = time.monotonic()
+            return account['next']
+
+    def send(self, address, private_key, build_tx, retries=2):
+        """Sign and send ``build_tx(nonce)`` from address, resyncing and retrying on nonce errors."""
+        for attempt in range(retries + 1):
+            nonce = self.allocate(address)
+            signed_tx = None
+            try:
+                with span('build_tx'):
+                    tx = build_tx(nonce)
+                with span('sign'):
+                    signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
+                with span('send_raw_transaction'):
+                    tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception as e:
+                if signed_tx is not None and is_already_known(e):
+                    print(f"Transaction {signed_tx.hash.hex()} with nonce {nonce} already known to the node")
+                    self._finished(address, nonce)
+                    return signed_tx.hash
+                if is_nonce_error(e) and attempt < retries:
+                    print(f"Nonce {nonce} rejected for {address} ({e}); resyncing")
+                    self._finished(address, nonce)
+                    self.resync(address)
+                    continue
+                self.release(address, nonce)
+                raise
+            self._finished(address, nonce)
+            return tx_hash
@@ -9,6 +9,11 @@ import matplotlib.pyplot as plt
 from web3 import Web3
 import os
 from dotenv import load_dotenv
+from nonce import NonceManager
+from coalesce import FlagCoalescer
+from receipts import ReceiptTracker
+from artifacts import write_artifacts
+from ingest import load_dataset
 
 # Load environment variables
 load_dotenv()
@@ -208,6 +213,24 @@ contract_abi = [
       "stateMutability": "nonpayable",
       "type": "function"
     },
+    {
+      "inputs": [
+        {
+          "internalType": "address[]",
+          "name": "userAddresses",
+          "type": "address[]"
+        },
+        {
+          "internalType": "bool[]",
+          "name": "isFraud",
+          "type": "bool[]"
+        }
+      ],
+      "name": "batchUpdateFraudStatus",
+      "outputs": [],
+      "stateMutability": "nonpayable",
+      "type": "function"
+    },
     {
       "inputs": [
         {
@@ -230,6 +253,9 @@ contract_abi = [
     }
   ]
 contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+# Local per-account nonces let several transactions from one account be in flight
+nonces = NonceManager(w3)
+receipts = ReceiptTracker(w3).start()
 
 # Verify contract deployment and owner
 code = w3.eth.get_code(contract_address)
@@ -247,22 +273,13 @@ print(f"Owner {owner_address} balance: {w3.from_wei(owner_balance, 'ether')} ETH
 if owner_balance < w3.to_wei(0.01, 'ether'):
     raise ValueError(f"Insufficient funds in {owner_address}. Required: 0.01 ETH")
 
-try:
-    print("Starting ML processing...")
-    data = pd.read_csv(r"C:\Users\Shankar\Downloads\creditcard.csv")
-    print("Dataset loaded successfully.")
-    print("ML processing completed.")
-except Exception as e:
-    print(f"Error in ML section: {e}")
-
-# Load dataset
+# Load dataset: parsed once into a float32 .npy cache keyed by the CSV's hash, memory-mapped afterwards
 file_path = r"C:\Users\Shankar\Downloads\creditcard.csv"
 if not os.path.exists(file_path):
     raise FileNotFoundError(f"Dataset not found at: {file_path}")
-data = pd.read_csv(file_path)
-
-X = data.drop(columns=["Class"])
-y = data["Class"]
+print("Starting ML processing...")
+X, y = load_dataset(file_path)
+print("Dataset loaded successfully.")
 
 scaler = StandardScaler()
 X["Amount"] = scaler.fit_transform(X["Amount"].values.reshape(-1, 1))
@@ -296,8 +313,13 @@ print(f"Results saved to: {excel_path}")
 joblib.dump(X_test, r"C:\do\fraud-detection-dapp\savedresult\X_test.pkl")
 joblib.dump(y_test, r"C:\do\fraud-detection-dapp\savedresult\y_test.pkl")
 
+# Same model and test set as memory-mappable arrays, shared by all server workers (MODEL_BACKEND=mmap)
+artifact_dir = r"C:\do\fraud-detection-dapp\savedresult\artifacts"
+write_artifacts(artifact_dir, model, X_test, y_test)
+print(f"Memory-mapped artifacts saved to: {artifact_dir}")
+
 # Function to update fraud status
-def update_fraud_status(user_address, is_fraud):
+def update_fraud_status(user_address, is_fraud, wait=True):
     try:
         # Check user balance
         user_balance = w3.eth.get_balance(user_address)
@@ -312,43 +334,80 @@ def update_fraud_status(user_address, is_fraud):
             if user_balance < w3.to_wei(0.01, 'ether'):
                 print(f"Insufficient funds in {user_address} for registration")
                 return None
-            tx = contract.functions.register("testuser", "testpass").build_transaction({
+            tx_hash = nonces.send(user_address, user_private_key, lambda nonce: contract.functions.register(
+                "testuser", "testpass"
+            ).build_transaction({
                 'from': user_address,
-                'nonce': w3.eth.get_transaction_count(user_address),
+                'nonce': nonce,
                 'gas': 3000000,
                 'gasPrice': w3.to_wei('20', 'gwei')
-            })
-            signed_tx = w3.eth.account.sign_transaction(tx, user_private_key)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+            }))
+            receipt = receipts.wait(tx_hash)
             print(f"User {user_address} registered. Tx Hash: {tx_hash.hex()}")
             if receipt['status'] == 0:
                 print("Registration transaction reverted")
                 return None
 
         # Update fraud status
-        tx = contract.functions.updateFraudStatus(user_address, is_fraud).build_transaction({
+        tx_hash = nonces.send(owner_address, private_key, lambda nonce: contract.functions.updateFraudStatus(
+            user_address, is_fraud
+        ).build_transaction({
             'from': owner_address,
-            'nonce': w3.eth.get_transaction_count(owner_address),  # Corrected typo
+            'nonce': nonce,
             'gas': 2000000,
             'gasPrice': w3.to_wei('20', 'gwei')
-        })
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        if receipt['status'] == 0:
-            print("Fraud status update reverted")
-        else:
-            print(f"Fraud status updated for {user_address}. Tx Hash: {tx_hash.hex()}")
+        }))
+        if not wait:
+            return tx_hash
+        report_fraud_status_receipt(user_address, receipts.wait(tx_hash))
+        return tx_hash
     except Exception as e:
         print(f"Error updating fraud status for {user_address}: {str(e)}")
         return None
 
+def report_fraud_status_receipt(user_address, receipt):
+    if receipt['status'] == 0:
+        print("Fraud status update reverted")
+    else:
+        print(f"Fraud status updated for {user_address}. Tx Hash: {receipt['transactionHash'].hex()}")
+    return receipt
+
+def forget_failed_flag(user_address, pending_flag):
+    # Runs as soon as the receipt resolves, so the next fraud row for the address sends again
+    try:
+        failed = pending_flag.result()['status'] == 0
+    except Exception:
+        failed = True
+    if failed:
+        coalescer.forget(user_address, True)
+
 # Assign user address to predictions
 user_address = '0xa29FC23Fa33F1D3c566bD3459Ce17225EadF109A'
+# Every fraud row maps to the same address, so collapse the flags per address and
+# skip addresses that are already flagged on chain
+coalescer = FlagCoalescer(window=float('inf'),
+                          state_lookup=lambda address: contract.functions.users(address).call()[3])
+# Send the remaining flags back to back with locally allocated nonces, then confirm them together
+pending_flags = []
 for i, pred in enumerate(y_pred):
     if pred == 1:  # Fraud detected
-        update_fraud_status(user_address, True)
+        tx_hash, sent = coalescer.submit(user_address, True, lambda: update_fraud_status(user_address, True, wait=False))
+        if sent and tx_hash is None:
+            # A failed send must not suppress the next flag for this address
+            coalescer.forget(user_address, True)
+        elif sent:
+            pending_flag = receipts.track(tx_hash)
+            pending_flag.add_done_callback(lambda future, address=user_address: forget_failed_flag(address, future))
+            pending_flags.append(pending_flag)
+# All in-flight flags resolve through the tracker's single poll loop
+for pending_flag in pending_flags:
+    try:
+        report_fraud_status_receipt(user_address, pending_flag.result())
+    except Exception as e:
+        print(f"Error waiting for fraud status update of {user_address}: {str(e)}")
+flag_stats = coalescer.stats()
+print(f"Fraud flags: {flag_stats['submitted']} transactions sent, "
+      f"{flag_stats['transactionsSaved']} saved by coalescing")
 
 # Plot and save ROC curve
 y_scores = model.predict_proba(X_test)[:, 1]
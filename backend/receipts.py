@@ -0,0 +1,192 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from web3.exceptions import TransactionNotFound
+
+
+def _hex(tx_hash):
+    return tx_hash.lower() if isinstance(tx_hash, str) else '0x' + bytes(tx_hash).hex()
+
+
+def replace_transaction(w3, tx_hash, private_key, bump=1.125):
+    """Resend a stuck transaction with the same nonce and a higher gas price.
+
+    Returns the replacement's hash, or None if the original can no longer be
+    replaced (already mined, or the node rejected the replacement). Raises
+    TransactionNotFound if the node has dropped the original.
+    """
+    tx = w3.eth.get_transaction(tx_hash)
+    replacement = {
+        'to': tx['to'],
+        'data': tx['input'],
+        'value': tx['value'],
+        'gas': tx['gas'],
+        'gasPrice': int(tx['gasPrice'] * bump) + 1,
+        'nonce': tx['nonce'],
+        'chainId': w3.eth.chain_id
+    }
+    try:
+        signed_tx = w3.eth.account.sign_transaction(replacement, private_key)
+        return w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception as e:
+        print(f"Could not replace stuck transaction {_hex(tx_hash)}: {e}")
+        return None
+
+
+class ReceiptTracker:
+    """One polling thread that resolves receipts for every in-flight transaction.
+
+    ``track(tx_hash)`` returns a Future that resolves to the receipt. Each new
+    transaction gets one direct receipt lookup, because it may already be mined.
+    After that the thread only reads each new block's transaction list and fetches
+    receipts for hashes that show up there. Futures still pending after timeout
+    seconds fail with TimeoutError. When an ``on_stuck(tx_hash)`` callback is
+    given, it runs once after stuck_after seconds and may return a replacement
+    hash. Whichever of the two transactions is mined first resolves the future.
+    """
+
+    def __init__(self, w3, poll_interval=0.5, timeout=120.0, stuck_after=60.0):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.stuck_after = stuck_after
+        self._pending = {}
+        self._new = []
+        self._last_block = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='receipt-tracker', daemon=True)
+            self._thread.start()
+        return self
+
+    def track(self, tx_hash, timeout=None, on_stuck=None):
+        now = time.monotonic()
+        record = {
+            'future': Future(),
+            'hashes': [_hex(tx_hash)],
+            'deadline': now + (timeout or self.timeout),
+            'stuck_at': now + self.stuck_after if on_stuck else None,
+            'on_stuck': on_stuck
+        }
+        with self._lock:
+            # e.g. several jobs waiting again for the one batch transaction that carries them
+            tracked = self._pending.get(record['hashes'][0])
+            if tracked is not None:
+                return tracked['future']
+            self._pending[record['hashes'][0]] = record
+            self._new.append(record['hashes'][0])
+        self._wakeup.set()
+        return record['future']
+
+    def wait(self, tx_hash, timeout=None, on_stuck=None):
+        return self.track(tx_hash, timeout, on_stuck).result()
+
+    def pending_count(self):
+        with self._lock:
+            return len({id(record) for record in self._pending.values()})
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Error polling receipts: {e}")
+
+    def _resolve(self, tx_hash, receipt):
+        with self._lock:
+            record = self._pending.get(tx_hash)
+            if record is None:
+                return
+            for pending_hash in record['hashes']:
+                self._pending.pop(pending_hash, None)
+        if not record['future'].done():
+            record['future'].set_result(receipt)
+
+    def _fetch(self, tx_hash):
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return
+        if receipt is not None:
+            self._resolve(tx_hash, receipt)
+
+    def _poll(self):
+        # Deadlines and stuck transactions are handled even when the node is unreachable
+        try:
+            self._scan()
+        finally:
+            self._check_deadlines()
+
+    def _fail(self, record, error):
+        with self._lock:
+            for pending_hash in record['hashes']:
+                self._pending.pop(pending_hash, None)
+        if not record['future'].done():
+            record['future'].set_exception(error)
+
+    def _scan(self):
+        with self._lock:
+            new, self._new = self._new, []
+            new_hashes = set(new)
+            # Only transactions tracked before this round need the blocks since the last scan
+            waiting = any(tx_hash not in new_hashes for tx_hash in self._pending)
+        if not new and not waiting:
+            return
+
+        # Head first: anything mined up to here is found by the direct lookups
+        # below, anything mined later by the next block scan
+        try:
+            latest = self.w3.eth.block_number
+        except Exception:
+            # Keep the direct lookups for the next round
+            with self._lock:
+                self._new[:0] = new
+            raise
+        if self._last_block is None or not waiting:
+            # Blocks mined while idle hold nothing we track; skip them
+            self._last_block = latest
+        for tx_hash in new:
+            self._fetch(tx_hash)
+        with self._lock:
+            if not self._pending:
+                return
+        for number in range(self._last_block + 1, latest + 1):
+            block = self.w3.eth.get_block(number)
+            with self._lock:
+                mined = [_hex(h) for h in block['transactions'] if _hex(h) in self._pending]
+            for tx_hash in mined:
+                self._fetch(tx_hash)
+        self._last_block = max(self._last_block, latest)
+
+    def _check_deadlines(self):
+        now = time.monotonic()
+        with self._lock:
+            records = list({id(record): record for record in self._pending.values()}.values())
+        for record in records:
+            if now >= record['deadline']:
+                self._fail(record, TimeoutError(
+                    f"Transaction {record['hashes'][0]} not mined before the receipt timeout"))
+            elif record['stuck_at'] is not None and now >= record['stuck_at']:
+                record['stuck_at'] = None
+                try:
+                    replacement = record['on_stuck'](record['hashes'][0])
+                except TransactionNotFound as e:
+                    # Dropped by the node, so it can never be mined; fail it now instead of at the deadline
+                    self._fail(record, e)
+                    continue
+                except Exception as e:
+                    print(f"Replacing stuck transaction {record['hashes'][0]} failed: {e}")
+                    continue
+                if replacement is not None:
+                    replacement = _hex(replacement)
+                    print(f"Replaced stuck transaction {record['hashes'][0]} with {replacement}")
+                    with self._lock:
+                        record['hashes'].append(replacement)
+                        self._pending[replacement] = record
@@ -0,0 +1,186 @@
+"""Incremental retraining on newly labeled transactions.
+
+Instead of rerunning ok.py end to end, this updates the saved forest in one of
+two ways:
+- add: grow --trees extra trees on the new labels (warm_start).
+- replace: drop the --trees oldest trees and grow the same number on the most
+  recent --window labeled rows, so the forest follows recent behaviour at a
+  fixed size.
+
+The new labels get the saved Amount scaler (scaler.pkl from train.py), and
+SMOTE when there are enough fraud rows. The new model goes to
+savedresult/versions/<version>/ with its memory-mapped artifacts and a report.
+The report gives holdout AUC before and after, and optionally a full retrain
+on the original CSV plus the new labels as the baseline. --promote then swaps
+it in as fraud_detection_model.pkl and as the artifacts/ directory, which a
+running server picks up. New labels are scaled with train.py's scaler.pkl, so
+a saved_dir from ok.py needs one train.py --save run first.
+
+Usage: python retrain.py new_labels.csv [--saved-dir savedresult] [--mode add|replace] [--trees 20]
+                         [--window 50000] [--full-retrain creditcard.csv] [--promote]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from imblearn.over_sampling import SMOTE
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+
+from artifacts import swap_in, write_artifacts
+from train import SEED, load_split
+
+MODEL_FILE = 'fraud_detection_model.pkl'
+
+
+def fraud_auc(model, X, y):
+    if len(np.unique(y)) < 2:
+        return None
+    return float(roc_auc_score(y, model.predict_proba(X)[:, list(model.classes_).index(1)]))
+
+
+def load_labels(path, feature_columns, scaler, window=None):
+    labels = pd.read_csv(path, dtype=dict.fromkeys(feature_columns, np.float32))
+    missing = [column for column in feature_columns + ['Class'] if column not in labels.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    if window:
+        labels = labels.tail(window)
+    X = labels[feature_columns].copy()
+    X['Amount'] = scaler.transform(X[['Amount']])
+    return X, labels['Class'].astype(np.int8)
+
+
+def resample(X, y):
+    # SMOTE needs more minority rows than its neighbour count; tiny batches train as they are
+    minority = int(min(np.bincount(y, minlength=2)))
+    if minority > 5:
+        return SMOTE(random_state=SEED).fit_resample(X, y)
+    return X, y
+
+
+def grow(model, X, y, trees, mode):
+    if mode == 'replace':
+        # Oldest trees are at the front of estimators_; keep the newest ones
+        model.estimators_ = model.estimators_[trees:]
+        model.n_estimators = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + trees, n_jobs=-1)
+    started = time.perf_counter()
+    model.fit(X, y)
+    fit_seconds = time.perf_counter() - started
+    # Trees grow in parallel, but the saved model is served one row at a time,
+    # where a per-call joblib pool would dominate predict_proba latency
+    model.set_params(warm_start=False, n_jobs=None)
+    return model, fit_seconds
+
+
+def new_version_dir(versions_dir):
+    """Create and return (path, name) of a fresh version directory; same-second runs get a suffix."""
+    os.makedirs(versions_dir, exist_ok=True)
+    base = time.strftime('%Y%m%d-%H%M%S')
+    for attempt in range(1000):
+        version = base if attempt == 0 else f'{base}-{attempt}'
+        try:
+            os.mkdir(os.path.join(versions_dir, version))
+        except FileExistsError:
+            continue
+        return os.path.join(versions_dir, version), version
+    raise RuntimeError(f"No free version name for {base} in {versions_dir}")
+
+
+def promote(version_dir, saved_dir):
+    # Copy then rename, so a watcher never sees a half-written model file
+    model_path = os.path.join(saved_dir, MODEL_FILE)
+    tmp_path = f'{model_path}.tmp'
+    shutil.copyfile(os.path.join(version_dir, MODEL_FILE), tmp_path)
+    os.replace(tmp_path, model_path)
+    # The artifact directory is memory-mapped by running servers, so it is never
+    # rewritten in place: the new one is copied beside it and swapped in by rename
+    artifact_dir = os.path.join(saved_dir, 'artifacts')
+    staged = f'{artifact_dir}.new-{os.getpid()}'
+    shutil.rmtree(staged, ignore_errors=True)
+    shutil.copytree(os.path.join(version_dir, 'artifacts'), staged)
+    swap_in(staged, artifact_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('labels', help='CSV of newly labeled transactions (model features + Class)')
+    parser.add_argument('--saved-dir', default=r"C:\do\fraud-detection-dapp\savedresult")
+    parser.add_argument('--mode', choices=('add', 'replace'), default='add')
+    parser.add_argument('--trees', type=int, default=20)
+    parser.add_argument('--window', type=int, help='only use the most recent N labeled rows')
+    parser.add_argument('--full-retrain', metavar='CSV', help='original dataset, to time and score a full retrain')
+    parser.add_argument('--promote', action='store_true', help='make the new version the served model')
+    args = parser.parse_args()
+
+    model_path = os.path.join(args.saved_dir, MODEL_FILE)
+    scaler_path = os.path.join(args.saved_dir, 'scaler.pkl')
+    if not os.path.exists(scaler_path):
+        raise SystemExit(f"{scaler_path} not found. retrain.py scales new labels with the scaler train.py saves; "
+                         f"models saved by ok.py have none. Run train.py --save {args.saved_dir} first.")
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    X_test = joblib.load(os.path.join(args.saved_dir, 'X_test.pkl'))
+    y_test = joblib.load(os.path.join(args.saved_dir, 'y_test.pkl'))
+    feature_columns = list(model.feature_names_in_)
+
+    X_new, y_new = load_labels(args.labels, feature_columns, scaler, args.window)
+    report = {
+        'mode': args.mode,
+        'labels': os.path.abspath(args.labels),
+        'newRows': len(X_new),
+        'newFraudRows': int(y_new.sum()),
+        'treesBefore': len(model.estimators_),
+        'holdoutAucBefore': fraud_auc(model, X_test, y_test),
+        'newLabelsAucBefore': fraud_auc(model, X_new, y_new),
+    }
+    if args.trees > len(model.estimators_) and args.mode == 'replace':
+        raise ValueError(f"Cannot replace {args.trees} of {len(model.estimators_)} trees")
+    # warm_start refits classes_ from the new y, so both classes must be present
+    if y_new.nunique() < 2:
+        raise ValueError(f"{args.labels} needs both fraud and legitimate rows to grow new trees")
+
+    X_fit, y_fit = resample(X_new, y_new)
+    model, fit_seconds = grow(model, X_fit, y_fit, args.trees, args.mode)
+    report.update({
+        'incrementalFitSeconds': fit_seconds,
+        'treesAfter': len(model.estimators_),
+        'holdoutAucAfter': fraud_auc(model, X_test, y_test),
+    })
+
+    if args.full_retrain:
+        X_train, _, y_train, _, _, _ = load_split(args.full_retrain)
+        X_full, y_full = SMOTE(random_state=SEED).fit_resample(
+            pd.concat([X_train, X_new], ignore_index=True), pd.concat([y_train, y_new], ignore_index=True)
+        )
+        baseline = clone(model).set_params(warm_start=False, n_estimators=report['treesBefore'])
+        started = time.perf_counter()
+        baseline.fit(X_full, y_full)
+        report['fullRetrainSeconds'] = time.perf_counter() - started
+        report['fullRetrainHoldoutAuc'] = fraud_auc(baseline, X_test, y_test)
+        report['speedup'] = report['fullRetrainSeconds'] / fit_seconds
+
+    version_dir, version = new_version_dir(os.path.join(args.saved_dir, 'versions'))
+    joblib.dump(model, os.path.join(version_dir, MODEL_FILE))
+    write_artifacts(os.path.join(version_dir, 'artifacts'), model, X_test, y_test)
+    report['version'] = version
+    with open(os.path.join(version_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.promote:
+        promote(version_dir, args.saved_dir)
+        print(f"Promoted version {version} to {model_path} and {os.path.join(args.saved_dir, 'artifacts')}")
+
+    for name, value in report.items():
+        print(f"{name:<24}{value:.4f}" if isinstance(value, float) else f"{name:<24}{value}")
+    print(f"Saved version {version} to {version_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from sklearn.metrics import roc_curve, auc
+
+from roc_downsample import StreamingRoc, downsample_curve
+
+
+def artifact_digest(paths, chunk_size=1 << 20):
+    sha = hashlib.sha256()
+    for path in paths:
+        sha.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+def compute_roc(model, X_test, y_test, mode='exact', bins=1000, chunk_size=20000):
+    # Scores are produced chunk by chunk; histogram mode keeps only bin counts, so
+    # test sets too large to hold and sort in memory can still get a curve
+    fraud_col = list(model.classes_).index(1)
+    y_test = np.asarray(y_test)
+    streaming = StreamingRoc(bins)
+    scores = []
+    for start in range(0, len(y_test), chunk_size):
+        chunk = X_test.iloc[start:start + chunk_size] if hasattr(X_test, 'iloc') else X_test[start:start + chunk_size]
+        chunk_scores = model.predict_proba(chunk)[:, fraud_col]
+        streaming.update(y_test[start:start + chunk_size], chunk_scores)
+        if mode == 'exact':
+            scores.append(chunk_scores)
+
+    data = {'mode': mode, 'histogram': streaming.curve()}
+    if mode == 'exact':
+        fpr, tpr, thresholds = roc_curve(y_test, np.concatenate(scores))
+        data.update({
+            'fpr': fpr.tolist(),
+            'tpr': tpr.tolist(),
+            # roc_curve starts at an infinite threshold, which JSON cannot carry
+            'thresholds': [float(t) if np.isfinite(t) else None for t in thresholds],
+            'roc_auc': float(auc(fpr, tpr))
+        })
+    else:
+        data.update({name: data['histogram'][name] for name in ('fpr', 'tpr', 'thresholds', 'roc_auc')})
+    return data
+
+
+class RocCache:
+    """ROC data computed once per model/test-set content and stored in cache_dir.
+
+    Requests only stat the artifacts; when their size or mtime changes the cache
+    is rebuilt on a background thread while the previous result keeps being served.
+    ``version()``, when given, names the active model version; it is part of the
+    cache key, so a model swap rebuilds the curve and nothing is built before a
+    model is active.
+    """
+
+    def __init__(self, artifact_paths, cache_dir, compute, check_interval=5.0, version=None):
+        self.artifact_paths = list(artifact_paths)
+        self.cache_dir = cache_dir
+        self.compute = compute
+        self.check_interval = check_interval
+        self.version = version
+        self.key = None
+        self.data = None
+        self.error = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._building = None
+        self._views = {}
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, f"roc_{key[:16]}.json")
+
+    def _stat_signature(self):
+        signature = tuple((path, st.st_size, st.st_mtime_ns)
+                          for path, st in ((p, os.stat(p)) for p in self.artifact_paths))
+        return signature + ((self.version(),) if self.version else ())
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_check < self.check_interval:
+                return
+            if self.version and self.version() is None:
+                return
+            self._last_check = now
+            try:
+                signature = self._stat_signature()
+            except OSError as e:
+                self.error = str(e)
+                return
+            if signature == self._signature or (self._building and self._building.is_alive()):
+                return
+            self._signature = signature
+            self._building = threading.Thread(target=self._build, name='roc-cache', daemon=True)
+            self._building.start()
+
+    def _build(self):
+        try:
+            key = artifact_digest(self.artifact_paths)
+            version = self.version() if self.version else None
+            if version:
+                key = hashlib.sha256(f'{key}|{version}'.encode()).hexdigest()
+            path = self.cache_path(key)
+            if os.path.exists(path):
+                with open(path) as f:
+                    data = json.load(f)
+            else:
+                started = time.time()
+                data = self.compute()
+                data['artifactKey'] = key
+                data['modelVersion'] = version
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+                print(f"ROC cache built in {time.time() - started:.1f}s: {path}")
+            self.key, self.data, self.error = key, data, None
+        except Exception as e:
+            # Forget the signature so the next check retries the build
+            self._signature = None
+            self.error = str(e)
+            print(f"Error building ROC cache: {e}")
+
+    def get(self):
+        self.refresh()
+        return self.data
+
+    def view(self, max_points=None, mode='exact'):
+        data = self.get()
+        if data is None:
+            return None
+        key = (self.key, mode, max_points)
+        cached = self._views.get(key)
+        if cached is None:
+            curve = data['histogram'] if mode == 'histogram' else data
+            cached = downsample_curve(curve['fpr'], curve['tpr'], curve['thresholds'], max_points)
+            cached.update({
+                'roc_auc': curve['roc_auc'],
+                'mode': 'histogram' if mode == 'histogram' else data.get('mode', 'exact'),
+                'totalPoints': len(curve['fpr']),
+                'modelVersion': data.get('modelVersion')
+            })
+            if len(self._views) > 32:
+                self._views.clear()
+            self._views[key] = cached
+        return cached
@@ -0,0 +1,71 @@
+import numpy as np
+from sklearn.metrics import auc
+
+
+def drop_collinear(fpr, tpr):
+    fpr, tpr = np.asarray(fpr, dtype=float), np.asarray(tpr, dtype=float)
+    if len(fpr) <= 2:
+        return np.arange(len(fpr))
+    # A point is redundant when it lies on the segment between its neighbours
+    cross = (fpr[1:-1] - fpr[:-2]) * (tpr[2:] - tpr[:-2]) - (tpr[1:-1] - tpr[:-2]) * (fpr[2:] - fpr[:-2])
+    keep = np.concatenate([[True], np.abs(cross) > 1e-12, [True]])
+    return np.flatnonzero(keep)
+
+
+def downsample_curve(fpr, tpr, thresholds, max_points):
+    """Reduce a ROC curve to at most max_points points, spread evenly along its length.
+
+    Collinear points are dropped first, so curves that are already short come back
+    unchanged apart from redundant points. Endpoints are always kept.
+    """
+    fpr = np.asarray(fpr, dtype=float)
+    tpr = np.asarray(tpr, dtype=float)
+    thresholds = list(thresholds)
+    idx = drop_collinear(fpr, tpr)
+    if max_points and len(idx) > max_points:
+        max_points = max(2, int(max_points))
+        steps = np.hypot(np.diff(fpr[idx]), np.diff(tpr[idx]))
+        length = np.concatenate([[0.0], np.cumsum(steps)])
+        targets = np.linspace(0.0, length[-1], max_points)
+        picked = np.unique(np.searchsorted(length, targets, side='left').clip(0, len(idx) - 1))
+        idx = idx[picked]
+    return {
+        'fpr': fpr[idx].tolist(),
+        'tpr': tpr[idx].tolist(),
+        'thresholds': [thresholds[i] for i in idx]
+    }
+
+
+class StreamingRoc:
+    """ROC curve from per-class score histograms, so scores never have to be sorted or kept.
+
+    Scores are bucketed into n_bins equal-width bins over [0, 1]; the curve has one
+    point per bin edge and its AUC is exact for the binned scores.
+    """
+
+    def __init__(self, n_bins=1000):
+        self.n_bins = int(n_bins)
+        self.positives = np.zeros(self.n_bins, dtype=np.int64)
+        self.negatives = np.zeros(self.n_bins, dtype=np.int64)
+
+    def update(self, y_true, scores):
+        y_true = np.asarray(y_true).astype(bool)
+        bins = np.minimum((np.asarray(scores, dtype=float) * self.n_bins).astype(np.int64), self.n_bins - 1)
+        bins = np.maximum(bins, 0)
+        self.positives += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.negatives += np.bincount(bins[~y_true], minlength=self.n_bins)
+
+    def curve(self):
+        tp = np.concatenate([[0], np.cumsum(self.positives[::-1])])
+        fp = np.concatenate([[0], np.cumsum(self.negatives[::-1])])
+        tpr = tp / max(tp[-1], 1)
+        fpr = fp / max(fp[-1], 1)
+        edges = np.arange(self.n_bins, -1, -1) / self.n_bins
+        thresholds = [None] + edges[1:].tolist()
+        return {
+            'fpr': fpr.tolist(),
+            'tpr': tpr.tolist(),
+            'thresholds': thresholds,
+            'roc_auc': float(auc(fpr, tpr)),
+            'bins': self.n_bins
+        }
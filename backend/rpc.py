@@ -0,0 +1,60 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers import JSONBaseProvider
+
+from metrics import REGISTRY
+
+rpc_seconds = REGISTRY.histogram('rpc_request_seconds', 'JSON-RPC round trip time by method', ('method',))
+rpc_errors = REGISTRY.counter('rpc_errors_total', 'JSON-RPC requests that raised or returned an error', ('method',))
+
+
+class InstrumentedHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider that times every JSON-RPC call and counts failures per method."""
+
+    def _timed(self, method, send):
+        started = time.perf_counter()
+        try:
+            response = send()
+        except Exception:
+            rpc_errors.inc(method=method)
+            raise
+        finally:
+            rpc_seconds.observe(time.perf_counter() - started, method=method)
+        if isinstance(response, dict) and 'error' in response:
+            rpc_errors.inc(method=method)
+        return response
+
+    def make_request(self, method, params):
+        return self._timed(method, lambda: super(InstrumentedHTTPProvider, self).make_request(method, params))
+
+    def make_batch_request(self, batch):
+        return self._timed('batch', lambda: super(InstrumentedHTTPProvider, self).make_batch_request(batch))
+
+
+def pooled_http_provider(endpoint, timeout=10.0, pool_size=32):
+    """HTTPProvider whose keep-alive connection pool is sized for every Flask/worker thread.
+
+    requests keeps at most 10 connections per host by default; threads beyond that
+    open and drop a fresh TCP connection per call.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return InstrumentedHTTPProvider(endpoint, request_kwargs={'timeout': timeout}, session=session)
+
+
+def read_user_state(w3, contract, address):
+    # Balance and users() for one address in one JSON-RPC batch round trip.
+    # web3 before v7 has no batch_requests, and providers that do not speak
+    # JSON-RPC (EthereumTesterProvider) cannot batch, so fall back to two calls there.
+    if hasattr(w3, 'batch_requests') and isinstance(w3.provider, JSONBaseProvider):
+        with w3.batch_requests() as batch:
+            batch.add(w3.eth.get_balance(address))
+            batch.add(contract.functions.users(address))
+            balance, user = batch.execute()
+        return balance, user
+    return w3.eth.get_balance(address), contract.functions.users(address).call()
@@ -1,14 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import pandas as pd
+import numpy as np
 import joblib
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
+import hmac
 import os
+import time
+from concurrent.futures import Future
 from dotenv import load_dotenv
-from sklearn.metrics import roc_curve, auc
+from nonce import NonceManager
+from batching import MicroBatcher
+from features import FeatureError
+from forest_export import FlatForest
+from artifacts import load_forest, load_test_set, read_manifest, MANIFEST
+from model_registry import ModelRegistry
+from roc_cache import RocCache, compute_roc
+from jobs import JobQueue, JobWorkers
+from flag_flusher import FraudFlagFlusher
+from user_cache import UserStateCache
+from coalesce import FlagCoalescer
+from rpc import pooled_http_provider
+from receipts import ReceiptTracker, replace_transaction
+from indexer import EventIndexer, INDEXED_EVENTS
+from startup import Startup
+from metrics import REGISTRY, span, observe_stage
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+# Routes live on a blueprint; create_app() builds the Flask app and starts the
+# model load and chain checks in the background, so nothing here blocks on I/O
+api = Blueprint('api', __name__)
+
+http_requests = REGISTRY.counter('http_requests_total', 'HTTP requests by route and status', ('route', 'status'))
+http_seconds = REGISTRY.histogram('http_request_seconds', 'HTTP request latency by route', ('route',))
+fraud_checks = REGISTRY.counter('fraud_checks_total', 'Scored transactions by model verdict', ('result',))
+chain_transactions = REGISTRY.counter(
+    'chain_transactions_total', 'Fraud status transactions by outcome (mined, reverted, failed)', ('status',)
+)
 
 # Load environment variables
 load_dotenv()
@@ -20,12 +48,14 @@ if not owner_address or not private_key or not user_private_key:
     raise ValueError("OWNER_ADDRESS, PRIVATE_KEY, and USER_PRIVATE_KEY must be set in .env file")
 
 # Blockchain setup
-w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:7545'))
-if not w3.is_connected():
-    raise ConnectionError("Failed to connect to Ethereum node")
-print(f"Connected to blockchain. Latest block: {w3.eth.block_number}")
+# Keep-alive connections shared by all worker threads; independent reads go out as JSON-RPC batches
+w3 = Web3(pooled_http_provider(
+    os.getenv('RPC_URL', 'http://127.0.0.1:7545'),
+    timeout=float(os.getenv('RPC_TIMEOUT', '10')),
+    pool_size=int(os.getenv('RPC_POOL_SIZE', '32'))
+))
 
-contract_address = '0x0127bc5cf311B88FD6e9349d0977b8Cf98C9862c'
+contract_address = os.getenv('CONTRACT_ADDRESS') or '0x0127bc5cf311B88FD6e9349d0977b8Cf98C9862c'
 contract_abi = [
     {
       "inputs": [],
@@ -209,6 +239,24 @@ contract_abi = [
       "stateMutability": "nonpayable",
       "type": "function"
     },
+    {
+      "inputs": [
+        {
+          "internalType": "address[]",
+          "name": "userAddresses",
+          "type": "address[]"
+        },
+        {
+          "internalType": "bool[]",
+          "name": "isFraud",
+          "type": "bool[]"
+        }
+      ],
+      "name": "batchUpdateFraudStatus",
+      "outputs": [],
+      "stateMutability": "nonpayable",
+      "type": "function"
+    },
     {
       "inputs": [
         {
@@ -231,117 +279,658 @@ contract_abi = [
     }
   ] # Your ABI (unchanged from your version)
 contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+# Local per-account nonces let several transactions from one account be in flight
+nonces = NonceManager(w3, gap_check_interval=float(os.getenv('NONCE_GAP_CHECK_INTERVAL', '30')))
+# One polling thread resolves receipts for every in-flight transaction
+receipts = ReceiptTracker(
+    w3,
+    timeout=float(os.getenv('RECEIPT_TIMEOUT', '120')),
+    stuck_after=float(os.getenv('RECEIPT_STUCK_AFTER', '60'))
+)
+
+# ML model and test data
+model_path = os.getenv('MODEL_PATH') or r"C:\do\fraud-detection-dapp\savedresult\fraud_detection_model.pkl"
+x_test_path = os.path.join(os.path.dirname(model_path), 'X_test.pkl')
+y_test_path = os.path.join(os.path.dirname(model_path), 'y_test.pkl')
+
+# MODEL_BACKEND=flat serves the forest from arrays exported by forest_export.py;
+# MODEL_BACKEND=mmap maps the artifact directory written by ok.py / artifacts.py
+# read-only, so every worker process shares one page-cache copy
+model_backend = os.getenv('MODEL_BACKEND', 'sklearn')
+artifact_dir = os.getenv('ARTIFACT_DIR') or os.path.join(os.path.dirname(model_path), 'artifacts')
+if model_backend == 'flat':
+    model_source = os.getenv('FLAT_MODEL_PATH') or os.path.splitext(model_path)[0] + '.npz'
+elif model_backend == 'mmap':
+    model_source = artifact_dir
+else:
+    model_source = model_path
 
-# Verify contract deployment and owner
-code = w3.eth.get_code(contract_address)
-if code == b'':
-    raise ValueError(f"No contract found at {contract_address}. Redeploy the contract.")
-print(f"Contract code at {contract_address}: {code.hex()}")
-
-contract_owner = contract.functions.owner().call()
-if contract_owner.lower() != owner_address.lower():
-    raise ValueError(f"Owner mismatch: .env owner {owner_address}, contract owner {contract_owner}")
-
-# Load ML model and test data
-model_path = r"C:\do\fraud-detection-dapp\savedresult\fraud_detection_model.pkl"
-x_test_path = r"C:\do\fraud-detection-dapp\savedresult\X_test.pkl"
-y_test_path = r"C:\do\fraud-detection-dapp\savedresult\y_test.pkl"
-
-if not os.path.exists(model_path):
-    raise FileNotFoundError(f"Model file not found: {model_path}")
-if not os.path.exists(x_test_path):
-    raise FileNotFoundError(f"X_test file not found: {x_test_path}")
-if not os.path.exists(y_test_path):
-    raise FileNotFoundError(f"y_test file not found: {y_test_path}")
-
-model = joblib.load(model_path)
-X_test = joblib.load(x_test_path)
-y_test = joblib.load(y_test_path)
-
-def update_fraud_status(user_address, is_fraud):
+# POST /admin/reload-model only loads from under this directory: unpickling a
+# model file runs its code
+model_source_root = os.path.realpath(os.getenv('MODEL_SOURCE_ROOT') or os.path.dirname(os.path.abspath(model_source)))
+
+def allowed_model_source(source):
+    path = os.path.realpath(source)
     try:
-        user_balance = w3.eth.get_balance(user_address)
-        print(f"User {user_address} balance: {w3.from_wei(user_balance, 'ether')} ETH")
-        
-        user = contract.functions.users(user_address).call()
-        print(f"User {user_address} exists: {user[2]}, isFraud: {user[3]}")
-        if not user[2]:
-            print(f"User {user_address} not registered. Registering now...")
-            if user_balance < w3.to_wei(0.01, 'ether'):
-                print(f"Insufficient funds in {user_address} for registration")
-                return None
-            tx = contract.functions.register("testuser", "testpass").build_transaction({
-                'from': user_address,
-                'nonce': w3.eth.get_transaction_count(user_address),
-                'gas': 3000000,
-                'gasPrice': w3.to_wei('20', 'gwei')
-            })
-            signed_tx = w3.eth.account.sign_transaction(tx, user_private_key)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"User {user_address} registered. Tx Hash: {tx_hash.hex()}")
-            if receipt['status'] == 0:
-                print("Registration transaction reverted")
-                return None
-
-        tx = contract.functions.updateFraudStatus(user_address, is_fraud).build_transaction({
+        return os.path.commonpath([model_source_root, path]) == model_source_root
+    except ValueError:
+        # Different drives on Windows
+        return False
+
+expected_features = ['V1', 'V2', 'V3', 'V4', 'V5', 'V6', 'V7', 'V8', 'V9', 'V10',
+                     'V11', 'V12', 'V13', 'V14', 'V15', 'V16', 'V17', 'V18', 'V19',
+                     'V20', 'V21', 'V22', 'V23', 'V24', 'V25', 'V26', 'V27', 'V28', 'Amount']
+
+def load_model_from(source):
+    if model_backend == 'mmap':
+        return load_forest(source, verify=os.getenv('ARTIFACT_VERIFY', '0') == '1')
+    if not os.path.exists(source):
+        hint = ' Run forest_export.py first.' if model_backend == 'flat' else ''
+        raise FileNotFoundError(f"Model file not found: {source}.{hint}")
+    return FlatForest.load(source) if model_backend == 'flat' else joblib.load(source)
+
+def model_source_files(source):
+    # The manifest carries every array's checksum, so it alone identifies an artifact directory
+    return [os.path.join(source, MANIFEST)] if model_backend == 'mmap' else [source]
+
+warmup_size = int(os.getenv('MODEL_WARMUP_ROWS', '1000'))
+warmup_frames = []
+
+def warmup_rows(columns):
+    # The first load warms up on one zero row so startup still never reads X_test;
+    # reloads warm the new trees with real test rows before taking traffic
+    if model_registry.active is None:
+        return np.zeros((1, len(columns)), dtype=np.float32)
+    if not warmup_frames:
+        try:
+            if model_backend == 'mmap':
+                X, _ = load_test_set(artifact_dir)
+                frame = pd.DataFrame(np.array(X[:warmup_size]), columns=read_manifest(artifact_dir)['featureColumns'])
+            else:
+                # A copy, so the sample does not keep the whole X_test frame alive
+                frame = joblib.load(x_test_path).iloc[:warmup_size].copy()
+        except Exception as e:
+            print(f"No test rows for model warm-up ({e}); warming up on zeros")
+            frame = None
+        warmup_frames.append(frame)
+    frame = warmup_frames[0]
+    if frame is None or not set(columns) <= set(frame.columns):
+        return np.zeros((1, len(columns)), dtype=np.float32)
+    return frame[columns].to_numpy(dtype=np.float32)
+
+# Active model version. A changed artifact on disk (or POST /admin/reload-model)
+# is loaded, validated and warmed up in the background, then swapped in; requests
+# keep the version they started with. Requests that need a model get a 503 until
+# the first version is active.
+model_registry = ModelRegistry(
+    model_source, load_model_from, model_source_files, warmup_rows, expected_features,
+    check_interval=float(os.getenv('MODEL_CHECK_INTERVAL', '5'))
+)
+
+def load_model():
+    model_registry.reload(force=True)
+    model_registry.start_watcher()
+    print(f"Model backend: {model_backend}")
+
+def active_version():
+    return model_registry.active.version if model_registry.active else None
+
+# ROC data is computed once per active model version and test set and cached in
+# savedresult/. X_test/y_test are only read when /roc-data first asks for the curve.
+if model_backend == 'mmap':
+    roc_cache = RocCache(
+        [os.path.join(artifact_dir, MANIFEST)],
+        os.path.dirname(model_path),
+        lambda: compute_roc(
+            model_registry.active.model, *load_test_set(model_registry.active.source),
+            mode=os.getenv('ROC_MODE', 'exact'), bins=int(os.getenv('ROC_HISTOGRAM_BINS', '1000'))
+        ),
+        version=active_version
+    )
+else:
+    roc_cache = RocCache(
+        [x_test_path, y_test_path],
+        os.path.dirname(model_path),
+        lambda: compute_roc(
+            model_registry.active.model, joblib.load(x_test_path), joblib.load(y_test_path),
+            mode=os.getenv('ROC_MODE', 'exact'), bins=int(os.getenv('ROC_HISTOGRAM_BINS', '1000'))
+        ),
+        version=active_version
+    )
+roc_default_max_points = int(os.getenv('ROC_MAX_POINTS', '1000'))
+
+def check_chain(start_workers=True):
+    if not w3.is_connected():
+        raise ConnectionError("Failed to connect to Ethereum node")
+    print(f"Connected to blockchain. Latest block: {w3.eth.block_number}")
+
+    # Verify contract deployment and owner
+    code = w3.eth.get_code(contract_address)
+    if code == b'':
+        raise ValueError(f"No contract found at {contract_address}. Redeploy the contract.")
+    print(f"Contract found at {contract_address} ({len(code)} bytes of code)")
+
+    contract_owner = contract.functions.owner().call()
+    if contract_owner.lower() != owner_address.lower():
+        raise ValueError(f"Owner mismatch: .env owner {owner_address}, contract owner {contract_owner}")
+
+    # Chain-side background threads only start against a verified contract. Each
+    # start() is a no-op once its thread runs, so a retried check starts the rest
+    user_cache.start()
+    receipts.start()
+    event_indexer.start()
+    if start_workers:
+        job_workers.start()
+
+def predict_proba_rows(rows, active=None):
+    # The batcher groups rows by the ModelVersion each request started on
+    active = active or model_registry.active
+    with span('model_predict_proba'):
+        return active.predict_proba(rows)
+
+# Concurrent /check-fraud requests share one predict_proba call per micro-batch
+batcher = MicroBatcher(
+    predict_proba_rows,
+    max_batch_size=int(os.getenv('BATCH_MAX_SIZE', '64')),
+    max_wait_ms=float(os.getenv('BATCH_MAX_WAIT_MS', '5'))
+)
+
+def ensure_registered(user_address):
+    # Returns None once user_address is registered, otherwise the failed job result
+    with span('user_state'):
+        user = user_cache.get(user_address)
+    print(f"User {user_address} exists: {user['exists']}, isFraud: {user['isFraudulent']}")
+    if not user['exists']:
+        print(f"User {user_address} not registered. Registering now...")
+        user = user_cache.get(user_address, need_balance=True)
+        if user['balanceTier'] != 'funded':
+            print(f"Insufficient funds in {user_address} for registration")
+            return {'status': 'failed', 'error': f"Insufficient funds in {user_address} for registration"}
+        tx_hash = nonces.send(user_address, user_private_key, lambda nonce: contract.functions.register(
+            "testuser", "testpass"
+        ).build_transaction({
+            'from': user_address,
+            'nonce': nonce,
+            'gas': 3000000,
+            'gasPrice': w3.to_wei('20', 'gwei')
+        }))
+        with span('registration_receipt_wait'):
+            receipt = receipts.wait(tx_hash)
+        print(f"User {user_address} registered. Tx Hash: {tx_hash.hex()}")
+        if receipt['status'] == 0:
+            print("Registration transaction reverted")
+            return {'status': 'reverted', 'txHash': tx_hash.hex(), 'error': 'Registration transaction reverted'}
+        user_cache.update(user_address, exists=True)
+    return None
+
+def update_fraud_status(user_address, is_fraud, on_sent=None):
+    # on_sent(tx_hash) runs as soon as the transaction (or a replacement) is sent
+    try:
+        failure = ensure_registered(user_address)
+        if failure:
+            return failure
+        with span('user_state'):
+            already_set = user_cache.get(user_address)['isFraudulent'] == is_fraud
+        if already_set:
+            print(f"User {user_address} already has isFraud={is_fraud}; skipping transaction")
+            coalescer.record_noop()
+            return {'status': 'noop'}
+        tx_hash = nonces.send(owner_address, private_key, lambda nonce: contract.functions.updateFraudStatus(
+            user_address, is_fraud
+        ).build_transaction({
             'from': owner_address,
-            'nonce': w3.eth.get_transaction_count(owner_address),
+            'nonce': nonce,
             'gas': 500000,
             'gasPrice': w3.to_wei('20', 'gwei')
-        })
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        }))
+        if on_sent:
+            on_sent(tx_hash)
+        return fraud_status_outcome(tx_hash, user_address, is_fraud, on_sent)
+    except Exception as e:
+        print(f"Error updating fraud status for {user_address}: {str(e)}")
+        chain_transactions.inc(status='failed')
+        return {'status': 'failed', 'error': str(e)}
+
+def resume_fraud_status(job, on_sent=None):
+    # A job claimed again after a receipt timeout or a crashed process waits for
+    # the transaction it already sent. None means the node no longer knows it.
+    tx_hash = Web3.to_bytes(hexstr=job['txHash'])
+    try:
+        w3.eth.get_transaction(tx_hash)
+    except TransactionNotFound:
+        print(f"Transaction {job['txHash']} for job {job['id']} was dropped; sending again")
+        return None
+    except Exception as e:
+        print(f"Error looking up transaction {job['txHash']} for job {job['id']}: {str(e)}")
+        chain_transactions.inc(status='failed')
+        return {'status': 'failed', 'error': str(e)}
+    return fraud_status_outcome(tx_hash, job['userAddress'], job['isFraud'], on_sent)
+
+def fraud_status_outcome(tx_hash, user_address, is_fraud, on_sent=None):
+    # Future of the job result, resolved by the receipt tracker instead of a parked worker thread
+    outcome = Future()
+    tracked_at = time.perf_counter()
+
+    def on_receipt(receipt_future):
+        observe_stage('receipt_wait', time.perf_counter() - tracked_at)
+        try:
+            receipt = receipt_future.result()
+        except Exception as e:
+            print(f"Error waiting for fraud status update of {user_address}: {str(e)}")
+            chain_transactions.inc(status='failed')
+            outcome.set_result({'status': 'failed', 'txHash': tx_hash.hex(), 'error': str(e)})
+            return
+        mined_hash = receipt['transactionHash'].hex()
         if receipt['status'] == 0:
             print("Fraud status update reverted")
-            return None
-        print(f"Fraud status updated for {user_address}. Tx Hash: {tx_hash.hex()}")
-        return tx_hash.hex()
+            chain_transactions.inc(status='reverted')
+            outcome.set_result({'status': 'reverted', 'txHash': mined_hash, 'error': 'Fraud status update reverted'})
+            return
+        print(f"Fraud status updated for {user_address}. Tx Hash: {mined_hash}")
+        user_cache.update(user_address, isFraudulent=is_fraud)
+        chain_transactions.inc(status='mined')
+        outcome.set_result({'status': 'mined', 'txHash': mined_hash})
+
+    def replace(stuck_hash):
+        replacement = replace_transaction(w3, stuck_hash, private_key)
+        if replacement is not None and on_sent:
+            on_sent(replacement)
+        return replacement
+
+    receipts.track(tx_hash, on_stuck=replace).add_done_callback(on_receipt)
+    return outcome
+
+# exists/isFraudulent per address, kept current from UserRegistered and
+# FraudStatusUpdated logs so repeat lookups cost no RPC
+user_cache = UserStateCache(
+    w3, contract,
+    max_size=int(os.getenv('USER_CACHE_SIZE', '10000')),
+    sync_interval=float(os.getenv('USER_CACHE_SYNC_INTERVAL', '2'))
+)
+
+# Repeated flags for one address within the window share a single job, and
+# addresses already flagged on chain are not written again
+coalescer = FlagCoalescer(
+    window=float(os.getenv('FLAG_COALESCE_WINDOW', '30')),
+    state_lookup=lambda address: (user_cache.peek(address) or {}).get('isFraudulent')
+)
+
+def enqueue_flag(user_address, is_fraud=True):
+    # Returns (job id or None when the address is already flagged, whether a new job was queued)
+    return coalescer.submit(user_address, is_fraud, lambda: job_queue.enqueue(user_address, is_fraud))
+
+def forget_failed_flag(job, result):
+    if isinstance(result, Future):
+        result.add_done_callback(lambda future: forget_failed_flag(job, future.result()))
+    elif result is None or result['status'] in ('failed', 'reverted'):
+        coalescer.forget(job['userAddress'], job['isFraud'])
+
+def record_job_tx(job_id, tx_hash):
+    try:
+        job_queue.record_tx(job_id, tx_hash.hex())
     except Exception as e:
-        print(f"Error updating fraud status for {user_address}: {str(e)}")
-        return str(e)
+        # Only costs a resend if this job has to be retried
+        print(f"Recording tx {tx_hash.hex()} for job {job_id} failed: {str(e)}")
+
+def process_flag_job(job):
+    on_sent = lambda tx_hash: record_job_tx(job['id'], tx_hash)
+    result = resume_fraud_status(job, on_sent) if job['txHash'] else None
+    if result is None:
+        result = update_fraud_status(job['userAddress'], job['isFraud'], on_sent)
+    forget_failed_flag(job, result)
+    return result
+
+def process_flag_jobs(jobs):
+    results = update_fraud_status_batch(jobs)
+    for job in jobs:
+        forget_failed_flag(job, results.get(job['id']))
+    return results
+
+flag_flusher = FraudFlagFlusher(
+    w3, contract, nonces, owner_address, private_key,
+    gas_budget=int(os.getenv('FLAG_GAS_BUDGET', '3000000')),
+    receipts=receipts
+)
+
+def update_fraud_status_batch(jobs):
+    # Register whoever needs it, then write all flags with batchUpdateFraudStatus
+    results = {}
+    job_ids = {}
+    for job in jobs:
+        on_sent = lambda tx_hash, job_id=job['id']: record_job_tx(job_id, tx_hash)
+        resumed = resume_fraud_status(job, on_sent) if job['txHash'] else None
+        if resumed is not None:
+            results[job['id']] = resumed
+            continue
+        try:
+            failure = ensure_registered(job['userAddress'])
+        except Exception as e:
+            failure = {'status': 'failed', 'error': str(e)}
+        if failure:
+            results[job['id']] = failure
+        elif user_cache.get(job['userAddress'])['isFraudulent'] == job['isFraud']:
+            coalescer.record_noop()
+            results[job['id']] = {'status': 'noop'}
+        else:
+            job_ids.setdefault((job['userAddress'], job['isFraud']), []).append(job['id'])
+    if job_ids:
+        def on_sent(chunk, tx_hash):
+            for entry in chunk:
+                for job_id in job_ids[entry]:
+                    record_job_tx(job_id, tx_hash)
+
+        for chunk in flag_flusher.submit(list(job_ids), on_sent):
+            result = {name: chunk.get(name) for name in ('status', 'txHash', 'error')}
+            chain_transactions.inc(status=result['status'])
+            for entry in chunk['entries']:
+                if result['status'] == 'mined':
+                    user_cache.update(entry[0], isFraudulent=entry[1])
+                for job_id in job_ids[entry]:
+                    results[job_id] = result
+    return results
+
+# Local SQLite index of UserAuth events so history queries never touch the node
+event_indexer = EventIndexer(
+    w3, contract,
+    os.getenv('INDEX_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.sqlite3'),
+    start_block=int(os.getenv('INDEX_START_BLOCK', '0')),
+    block_range=int(os.getenv('INDEX_BLOCK_RANGE', '1000')),
+    confirmations=int(os.getenv('INDEX_CONFIRMATIONS', '0'))
+)
+
+# Chain writes are queued in SQLite and sent by background workers, so
+# /check-fraud returns as soon as the model has answered. FLAG_BATCH_SIZE > 1
+# drains up to that many jobs per batchUpdateFraudStatus round.
+# Several processes can share the queue; a running job whose lease outlives
+# JOB_LEASE_SECONDS (well past RECEIPT_TIMEOUT) belonged to a crashed process.
+job_queue = JobQueue(
+    os.getenv('JOB_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.sqlite3'),
+    lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', '600'))
+)
+flag_batch_size = int(os.getenv('FLAG_BATCH_SIZE', '1'))
+if flag_batch_size > 1:
+    job_workers = JobWorkers(
+        job_queue,
+        batch_handler=process_flag_jobs,
+        batch_size=flag_batch_size,
+        workers=int(os.getenv('CHAIN_WORKERS', '4'))
+    )
+else:
+    job_workers = JobWorkers(
+        job_queue,
+        process_flag_job,
+        workers=int(os.getenv('CHAIN_WORKERS', '4'))
+    )
 
-@app.route('/')
+# The model gates readiness. Flags queue in SQLite while the chain task is
+# still retrying, so an unreachable node does not keep traffic away.
+startup = Startup(retry_interval=float(os.getenv('STARTUP_RETRY_INTERVAL', '5')))
+startup.add('model', load_model)
+startup.add('chain', check_chain, required=False)
+
+# Scrape-time views of state the other modules already track
+REGISTRY.gauge('flag_jobs', 'Fraud flag jobs by status', lambda: {(status,): count for status, count in job_queue.counts().items()}, ('status',))
+REGISTRY.gauge('receipts_pending', 'Transactions waiting for a receipt', lambda: receipts.pending_count())
+REGISTRY.gauge('user_cache_entries', 'Addresses in the on-chain user state cache', lambda: user_cache.stats()['size'])
+REGISTRY.gauge('model_ready', '1 once the model is loaded and warm', lambda: int(model_registry.active is not None))
+REGISTRY.gauge('model_info', 'Active model version', lambda: {(active_version(),): 1} if model_registry.active else {}, ('version',))
+
+@api.before_app_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_app_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if 'request_started' in g:
+        http_seconds.observe(time.perf_counter() - g.request_started, route=route)
+    http_requests.inc(route=route, status=response.status_code)
+    return response
+
+def create_app():
+    app = Flask(__name__)
+    CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+    app.register_blueprint(api)
+    startup.start()
+    return app
+
+@api.route('/')
 def home():
     return jsonify({
         "message": "Welcome to the Fraud Detection DApp API",
         "endpoints": {
+            "/healthz": "GET - Liveness; 200 as soon as the process serves requests",
+            "/readyz": "GET - Readiness; 200 once the model is loaded and warm, with per-task startup status",
             "/check-fraud": "POST - Check if a transaction is fraudulent",
-            "/roc-data": "GET - Retrieve ROC curve data"
+            "/check-fraud/batch": "POST - Score an array of {transaction, userAddress} records",
+            "/roc-data": "GET - Retrieve ROC curve data (?max_points=N, ?mode=exact|histogram)",
+            "/batch-stats": "GET - Micro-batching batch size and queue wait statistics",
+            "/user-cache-stats": "GET - On-chain user state cache size and hit rate",
+            "/flag-stats": "GET - Fraud flag coalescing counters (transactions saved) and job counts",
+            "/flagged": "GET - Currently flagged addresses from the local event index (?page=&per_page=)",
+            "/users/<address>/history": "GET - Registration, login and fraud-status events for an address (?event=&page=&per_page=)",
+            "/model": "GET - Active model version, source and reload history",
+            "/admin/reload-model": "POST - Load, validate, warm up and swap in a model (X-Admin-Token; optional {\"source\": path})",
+            "/metrics": "GET - Prometheus metrics: per-stage latency histograms, request, fraud, transaction and RPC counters",
+            "/jobs/<id>": "GET - Status of a queued on-chain fraud flag (pending, running, mined, reverted, noop, failed)"
         }
     }), 200
 
-@app.route('/check-fraud', methods=['POST'])
+@api.route('/check-fraud', methods=['POST'])
 def check_fraud():
+    # One version for the whole request, even if a reload swaps in another meanwhile
+    active = model_registry.active
+    if active is None:
+        return jsonify({'error': 'Model is still loading, retry shortly'}), 503
     try:
-        data = request.json
-        transaction = pd.DataFrame([data['transaction']])
+        with span('parse_json'):
+            data = request.json
         user_address = data['userAddress']
-        expected_features = ['V1', 'V2', 'V3', 'V4', 'V5', 'V6', 'V7', 'V8', 'V9', 'V10', 
-                            'V11', 'V12', 'V13', 'V14', 'V15', 'V16', 'V17', 'V18', 'V19', 
-                            'V20', 'V21', 'V22', 'V23', 'V24', 'V25', 'V26', 'V27', 'V28', 'Amount']
-        if not all(feature in transaction.columns for feature in expected_features):
-            return jsonify({'error': 'Invalid transaction data'}), 400
-        is_fraud = model.predict(transaction)[0]
+        try:
+            with span('extract_features'):
+                row = active.feature_extractor.extract(data['transaction'])
+        except FeatureError as e:
+            return jsonify({'error': str(e)}), 400
+        # Includes the wait for the micro-batch; model_predict_proba is the call itself
+        with span('predict'):
+            is_fraud = active.model.classes_[np.argmax(batcher.predict(row, key=active))]
+        fraud_checks.inc(result='fraud' if is_fraud else 'legit')
         if is_fraud:
-            tx_hash = update_fraud_status(user_address, True)
-            if tx_hash and not isinstance(tx_hash, str):
-                return jsonify({'isFraud': True, 'txHash': tx_hash}), 200
-            return jsonify({'error': tx_hash}), 500
+            with span('enqueue'):
+                job_id, queued = enqueue_flag(user_address)
+            if job_id is None:
+                return jsonify({'isFraud': True, 'alreadyFlagged': True}), 200
+            return jsonify({'isFraud': True, 'jobId': job_id, 'coalesced': not queued}), 200
         return jsonify({'isFraud': False}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/roc-data', methods=['GET'])
+def score_rows(active, rows):
+    # (proba, errors): one predict_proba call for all rows; if it raises, the rows are
+    # scored one at a time and errors maps the position of each failing row to its message
+    try:
+        return active.predict_proba(rows), {}
+    except Exception:
+        proba = np.zeros((len(rows), len(active.model.classes_)))
+        errors = {}
+        for i in range(len(rows)):
+            try:
+                proba[i] = active.predict_proba(rows[i:i + 1])[0]
+            except Exception as e:
+                errors[i] = str(e)
+        return proba, errors
+
+@api.route('/check-fraud/batch', methods=['POST'])
+def check_fraud_batch():
+    active = model_registry.active
+    if active is None:
+        return jsonify({'error': 'Model is still loading, retry shortly'}), 503
+    try:
+        records = request.json
+        if isinstance(records, dict):
+            records = records.get('records')
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': 'Expected a non-empty array of {transaction, userAddress} records'}), 400
+
+        results = [None] * len(records)
+        transactions = []
+        for i, record in enumerate(records):
+            if not isinstance(record, dict) or not isinstance(record.get('transaction'), dict) \
+                    or not record.get('userAddress'):
+                results[i] = {'index': i, 'error': 'Record must contain a transaction object and a userAddress'}
+                transactions.append({})
+            else:
+                transactions.append(record['transaction'])
+
+        # Same validation as /check-fraud, so a record is accepted or rejected identically on both
+        features, errors = active.feature_extractor.extract_many(transactions)
+        for i, error in errors.items():
+            if results[i] is None:
+                results[i] = {'index': i, 'error': error}
+
+        valid = np.array([result is None for result in results])
+        if valid.any():
+            proba, failed = score_rows(active, features[valid])
+            scores = proba[:, active.fraud_col]
+            labels = active.model.classes_.take(np.argmax(proba, axis=1))
+            for position, (i, score, label) in enumerate(zip(np.flatnonzero(valid), scores, labels)):
+                if position in failed:
+                    valid[i] = False
+                    results[i] = {'index': int(i), 'error': f'Scoring failed: {failed[position]}'}
+                    continue
+                result = {'index': int(i), 'score': float(score), 'isFraud': bool(label)}
+                fraud_checks.inc(result='fraud' if label else 'legit')
+                if label:
+                    job_id, queued = enqueue_flag(records[i]['userAddress'])
+                    if job_id is None:
+                        result['chainAction'] = 'alreadyFlagged'
+                    else:
+                        result['chainAction'] = 'queued' if queued else 'coalesced'
+                        result['jobId'] = job_id
+                else:
+                    result['chainAction'] = 'none'
+                results[i] = result
+
+        return jsonify({
+            'results': results,
+            'scored': int(valid.sum()),
+            'rejected': int(len(records) - valid.sum())
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/roc-data', methods=['GET'])
 def get_roc_data():
     try:
-        y_scores = model.predict_proba(X_test)[:, 1]
-        fpr, tpr, thresholds = roc_curve(y_test, y_scores)
-        roc_auc = auc(fpr, tpr)
-        return jsonify({'fpr': fpr.tolist(), 'tpr': tpr.tolist(), 'roc_auc': roc_auc}), 200
+        max_points = request.args.get('max_points', request.args.get('points', roc_default_max_points), type=int)
+        mode = request.args.get('mode', 'exact')
+        if mode not in ('exact', 'histogram'):
+            return jsonify({'error': "mode must be 'exact' or 'histogram'"}), 400
+        if max_points is None or max_points < 0 or max_points == 1:
+            return jsonify({'error': 'max_points must be 0 (all points) or at least 2'}), 400
+        roc_data = roc_cache.view(max_points or None, mode)
+        if roc_data is None:
+            if roc_cache.error:
+                return jsonify({'error': roc_cache.error}), 500
+            return jsonify({'error': 'ROC data is being computed, retry shortly'}), 503
+        return jsonify(roc_data), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok', 'uptimeSeconds': startup.status()['uptimeSeconds']}), 200
+
+@api.route('/readyz', methods=['GET'])
+def readyz():
+    status = startup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@api.route('/model', methods=['GET'])
+def get_model():
+    return jsonify(model_registry.status()), 200
+
+@api.route('/admin/reload-model', methods=['POST'])
+def reload_model():
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({'error': 'Admin endpoints are disabled; set ADMIN_TOKEN to enable them'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), admin_token.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    source = (request.get_json(silent=True) or {}).get('source')
+    if source is not None and (not isinstance(source, str) or not allowed_model_source(source)):
+        return jsonify({'error': f'source must be a path under {model_source_root}'}), 400
+    try:
+        # Loads and warms up on this request's thread; other requests keep using the old version
+        model_registry.reload(source, force=True)
+    except Exception as e:
+        return jsonify({'error': str(e), 'model': model_registry.status()}), 500
+    return jsonify(model_registry.status()), 200
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job), 200
+
+def page_args():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    if page < 1 or not 1 <= per_page <= 500:
+        raise ValueError('page must be >= 1 and per_page between 1 and 500')
+    return page, per_page
+
+@api.route('/flagged', methods=['GET'])
+def get_flagged():
+    try:
+        page, per_page = page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    total, addresses = event_indexer.flagged(page, per_page)
+    return jsonify({
+        'addresses': addresses,
+        'page': page,
+        'perPage': per_page,
+        'total': total,
+        'indexedBlock': event_indexer.last_block[0]
+    }), 200
+
+@api.route('/users/<address>/history', methods=['GET'])
+def get_user_history(address):
+    try:
+        page, per_page = page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    event = request.args.get('event')
+    if event and event not in INDEXED_EVENTS:
+        return jsonify({'error': f"event must be one of {', '.join(INDEXED_EVENTS)}"}), 400
+    total, events = event_indexer.history(address, page, per_page, event)
+    return jsonify({
+        'address': address,
+        'events': events,
+        'page': page,
+        'perPage': per_page,
+        'total': total,
+        'indexedBlock': event_indexer.last_block[0]
+    }), 200
+
+@api.route('/user-cache-stats', methods=['GET'])
+def get_user_cache_stats():
+    return jsonify(user_cache.stats()), 200
+
+@api.route('/flag-stats', methods=['GET'])
+def get_flag_stats():
+    return jsonify({'coalescing': coalescer.stats(), 'jobs': job_queue.counts()}), 200
+
+@api.route('/batch-stats', methods=['GET'])
+def get_batch_stats():
+    return jsonify(batcher.stats()), 200
+
 if __name__ == '__main__':
-    app.run(port=5000, debug=True)
\ No newline at end of file
+    # The reloader would import this module twice and run every startup task in both processes
+    create_app().run(port=int(os.getenv('PORT', '5000')), debug=True, use_reloader=False)
\ No newline at end of file
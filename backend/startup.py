@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+class Startup:
+    """Runs independent startup tasks concurrently and tracks readiness.
+
+    Each task runs on its own thread, so the model load and the chain checks
+    overlap instead of running one after another before the server can bind.
+    A failing task is retried every retry_interval seconds instead of taking
+    the process down. Only ``required`` tasks gate ``ready()``.
+    """
+
+    def __init__(self, retry_interval=5.0):
+        self.retry_interval = retry_interval
+        self.started_at = time.monotonic()
+        self.ready_after = None
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def add(self, name, fn, required=True):
+        self._tasks[name] = {'fn': fn, 'required': required, 'status': 'pending',
+                             'attempts': 0, 'seconds': None, 'error': None}
+        return self
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        for name in self._tasks:
+            threading.Thread(target=self._run, args=(name,), name=f'startup-{name}', daemon=True).start()
+        return self
+
+    def _run(self, name):
+        task = self._tasks[name]
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                task['status'] = 'running'
+                task['attempts'] += 1
+            try:
+                task['fn']()
+            except Exception as e:
+                with self._lock:
+                    task['status'] = 'failed'
+                    task['error'] = str(e)
+                print(f"Startup task {name} failed (attempt {task['attempts']}): {e}")
+                time.sleep(self.retry_interval)
+                continue
+            with self._lock:
+                task['status'] = 'ready'
+                task['seconds'] = time.monotonic() - started
+                task['error'] = None
+                if self.ready_after is None and self._all_ready():
+                    self.ready_after = time.monotonic() - self.started_at
+                    print(f"Startup complete in {self.ready_after:.2f}s")
+            print(f"Startup task {name} ready in {task['seconds']:.2f}s")
+            return
+
+    def _all_ready(self):
+        return all(task['status'] == 'ready' for task in self._tasks.values() if task['required'])
+
+    def ready(self):
+        with self._lock:
+            return self._all_ready()
+
+    def status(self):
+        with self._lock:
+            return {
+                'ready': self._all_ready(),
+                'uptimeSeconds': time.monotonic() - self.started_at,
+                'readyAfterSeconds': self.ready_after,
+                'tasks': {
+                    name: {key: task[key] for key in ('status', 'required', 'attempts', 'seconds', 'error')}
+                    for name, task in self._tasks.items()
+                }
+            }
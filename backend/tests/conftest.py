@@ -0,0 +1,39 @@
+import importlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from eth_account import Account
+from sklearn.ensemble import RandomForestClassifier
+
+# The backend modules import each other as top-level modules (python server.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    # server.py (and asgi.py on top of it) is configured once per process, at import
+    tmp = tmp_path_factory.mktemp('server')
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000, len(COLUMNS))), columns=COLUMNS)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, (X['V14'] < -1.5).astype(int))
+    joblib.dump(model, tmp / 'fraud_detection_model.pkl')
+    account = Account.create()
+    with pytest.MonkeyPatch.context() as env:
+        # Nothing here reaches a node
+        env.setenv('OWNER_ADDRESS', account.address)
+        env.setenv('PRIVATE_KEY', account.key.hex())
+        env.setenv('USER_PRIVATE_KEY', account.key.hex())
+        env.setenv('MODEL_PATH', str(tmp / 'fraud_detection_model.pkl'))
+        env.setenv('MODEL_BACKEND', 'sklearn')
+        env.setenv('JOB_DB_PATH', str(tmp / 'jobs.sqlite3'))
+        env.setenv('INDEX_DB_PATH', str(tmp / 'events.sqlite3'))
+        env.setenv('RPC_URL', 'http://127.0.0.1:9')
+        module = importlib.import_module('server')
+    module.model_registry.reload(force=True)
+    return module
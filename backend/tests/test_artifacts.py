@@ -0,0 +1,66 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from artifacts import MANIFEST, load_forest, load_test_set, verify_artifacts, write_artifacts
+
+COLUMNS = ['V%d' % i for i in range(1, 6)]
+
+
+def forest(seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(500, len(COLUMNS))), columns=COLUMNS)
+    model = RandomForestClassifier(n_estimators=4, max_depth=3, random_state=seed).fit(X, (X['V1'] > 0).astype(int))
+    return model, X
+
+
+def test_loaded_forest_matches_the_sklearn_model(tmp_path):
+    model, X = forest(0)
+    manifest = write_artifacts(str(tmp_path / 'artifacts'), model, X[::-1][COLUMNS[::-1]], np.zeros(len(X)))
+    assert manifest['featureColumns'] == COLUMNS
+    loaded = load_forest(str(tmp_path / 'artifacts'), verify=True)
+    rows = X.to_numpy(dtype=np.float32)
+    np.testing.assert_allclose(loaded.predict_proba(rows), model.predict_proba(X), atol=1e-6)
+    X_test, y_test = load_test_set(str(tmp_path / 'artifacts'))
+    np.testing.assert_array_equal(X_test, X[::-1].to_numpy(dtype=np.float32))
+    assert y_test.dtype == np.int8
+
+
+def test_rewrite_leaves_mapped_files_of_the_previous_set_intact(tmp_path):
+    out_dir = str(tmp_path / 'artifacts')
+    first, X = forest(0)
+    write_artifacts(out_dir, first)
+    mapped = load_forest(out_dir)
+    before = mapped.predict_proba(X.to_numpy(dtype=np.float32))
+    second, _ = forest(1)
+    write_artifacts(out_dir + os.sep, second)
+    # The old maps still read the old trees; a fresh load reads the new ones
+    np.testing.assert_array_equal(mapped.predict_proba(X.to_numpy(dtype=np.float32)), before)
+    np.testing.assert_allclose(load_forest(out_dir, verify=True).predict_proba(X.to_numpy(dtype=np.float32)),
+                               second.predict_proba(X), atol=1e-6)
+    assert sorted(os.listdir(tmp_path)) == ['artifacts']
+
+
+def test_failed_write_keeps_the_current_set(tmp_path):
+    out_dir = str(tmp_path / 'artifacts')
+    model, X = forest(0)
+    manifest = write_artifacts(out_dir, model)
+    with pytest.raises(KeyError):
+        write_artifacts(out_dir, model, X.drop(columns='V3'))
+    assert verify_artifacts(out_dir) == manifest
+    assert sorted(os.listdir(tmp_path)) == ['artifacts']
+
+
+def test_verify_detects_a_changed_array(tmp_path):
+    out_dir = str(tmp_path / 'artifacts')
+    write_artifacts(out_dir, forest(0)[0])
+    with open(os.path.join(out_dir, MANIFEST)) as f:
+        threshold = json.load(f)['arrays']['threshold']['file']
+    array = np.load(os.path.join(out_dir, threshold))
+    np.save(os.path.join(out_dir, threshold), array + 1)
+    with pytest.raises(ValueError, match='Checksum mismatch for threshold'):
+        verify_artifacts(out_dir)
@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+COLUMNS = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+USER = '0xa29FC23Fa33F1D3c566bD3459Ce17225EadF109A'
+
+
+@pytest.fixture
+def asgi(server):
+    import asgi
+    return asgi
+
+
+class FakeQueue:
+    def __init__(self):
+        self.calls = []
+
+    def complete(self, job_id, status, tx_hash=None, error=None):
+        self.calls.append(('complete', job_id, status, tx_hash))
+
+    def retry_or_fail(self, job, error):
+        self.calls.append(('retry_or_fail', job['id'], error))
+
+
+def post(asgi, payload):
+    async def request():
+        response = await asgi.app.test_client().post('/check-fraud', json=payload)
+        return response.status_code, await response.get_json()
+    return asyncio.run(request())
+
+
+def run_job(asgi, job):
+    async def run():
+        slots = asyncio.Semaphore(1)
+        await slots.acquire()
+        await asgi.run_job(job, slots)
+        # The slot is handed back however the job ended
+        assert not slots.locked()
+    asyncio.run(run())
+
+
+def test_check_fraud_scores_a_valid_transaction(asgi):
+    payload = {'transaction': dict.fromkeys(COLUMNS, 0.0), 'userAddress': USER}
+    assert post(asgi, payload) == (200, {'isFraud': False})
+
+
+def test_check_fraud_rejects_an_invalid_field(asgi):
+    status, body = post(asgi, {'transaction': dict(dict.fromkeys(COLUMNS, 0.0), V5='abc'), 'userAddress': USER})
+    assert status == 400
+    assert 'V5' in body['error']
+
+
+def test_job_completes_once_its_receipt_future_resolves(asgi, monkeypatch):
+    queue = FakeQueue()
+    receipt = Future()
+    monkeypatch.setattr(asgi.server, 'job_queue', queue)
+    monkeypatch.setattr(asgi.server, 'process_flag_job', lambda job: receipt)
+    receipt.set_result({'status': 'confirmed', 'txHash': '0xab'})
+    run_job(asgi, {'id': 'job-1', 'userAddress': USER, 'isFraud': True})
+    assert queue.calls == [('complete', 'job-1', 'confirmed', '0xab')]
+
+
+def test_failed_send_is_retried_and_forgotten(asgi, monkeypatch):
+    queue = FakeQueue()
+    forgotten = []
+
+    def fail(job):
+        raise ValueError('insufficient funds')
+
+    monkeypatch.setattr(asgi.server, 'job_queue', queue)
+    monkeypatch.setattr(asgi.server, 'process_flag_job', fail)
+    monkeypatch.setattr(asgi.server, 'forget_failed_flag', lambda job, result: forgotten.append(result))
+    run_job(asgi, {'id': 'job-2', 'userAddress': USER, 'isFraud': True})
+    assert queue.calls == [('retry_or_fail', 'job-2', 'insufficient funds')]
+    assert forgotten == [{'status': 'failed', 'error': 'insufficient funds'}]
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batching import MicroBatcher
+
+
+def fraud_proba(rows):
+    score = 1 / (1 + np.exp(-rows[:, 0]))
+    return np.column_stack([1 - score, score])
+
+
+def test_concurrent_rows_are_batched_and_answered_in_order():
+    calls = []
+
+    def predict_proba(rows):
+        calls.append(len(rows))
+        return fraud_proba(rows)
+
+    batcher = MicroBatcher(predict_proba, max_batch_size=16, max_wait_ms=50)
+    rows = np.random.default_rng(0).normal(size=(40, 3))
+    futures = [batcher.submit(row) for row in rows]
+    np.testing.assert_allclose(np.stack([future.result(5) for future in futures]), fraud_proba(rows))
+    assert max(calls) == 16
+    assert sum(calls) == 40
+    assert batcher.stats()['rows'] == 40
+
+
+def test_rows_are_predicted_with_their_own_key():
+    seen = []
+
+    def predict_proba(rows, key):
+        seen.append((key, len(rows)))
+        return fraud_proba(rows) if key == 'v1' else 1 - fraud_proba(rows)
+
+    batcher = MicroBatcher(predict_proba, max_batch_size=8, max_wait_ms=50)
+    row = np.array([2.0])
+    v1, v2 = batcher.submit(row, key='v1'), batcher.submit(row, key='v2')
+    assert v1.result(5)[1] == pytest.approx(1 - v2.result(5)[1])
+    assert sorted(key for key, _ in seen) == ['v1', 'v2']
+
+
+def test_a_failing_row_fails_only_its_own_request():
+    calls = []
+
+    def predict_proba(rows):
+        calls.append(len(rows))
+        if not np.isfinite(rows).all():
+            raise ValueError('Input X contains infinity')
+        return fraud_proba(rows)
+
+    batcher = MicroBatcher(predict_proba, max_batch_size=4, max_wait_ms=200)
+    rows = [np.zeros(3), np.full(3, np.inf), np.ones(3)]
+    good, bad, other = [batcher.submit(row) for row in rows]
+    np.testing.assert_allclose(good.result(5), fraud_proba(rows[0].reshape(1, -1))[0])
+    np.testing.assert_allclose(other.result(5), fraud_proba(rows[2].reshape(1, -1))[0])
+    with pytest.raises(ValueError, match='infinity'):
+        bad.result(5)
+    assert calls == [3, 1, 1, 1]
+
+
+def test_a_single_row_error_is_raised_without_a_retry():
+    calls = []
+
+    def predict_proba(rows):
+        calls.append(len(rows))
+        raise ValueError('bad model')
+
+    batcher = MicroBatcher(predict_proba, max_batch_size=4, max_wait_ms=0)
+    with pytest.raises(ValueError, match='bad model'):
+        batcher.predict(np.zeros(3), timeout=5)
+    assert calls == [1]
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import bulk_score
+from artifacts import load_forest, write_artifacts
+from jobs import JobQueue
+
+COLUMNS = ['V1', 'V2', 'Amount']
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame(rng.normal(size=(500, len(COLUMNS))), columns=COLUMNS)
+    model = RandomForestClassifier(n_estimators=4, max_depth=4, random_state=0).fit(train, train['V1'] > 1)
+    write_artifacts(str(tmp_path / 'artifacts'), model)
+    frame = pd.DataFrame(rng.normal(size=(1000, len(COLUMNS))), columns=COLUMNS)
+    frame.insert(0, 'txId', np.arange(len(frame)))
+    # Ten addresses, so flagged rows repeat addresses
+    frame['userAddress'] = ['0x%040x' % (i % 10) for i in range(len(frame))]
+    frame.to_csv(tmp_path / 'transactions.csv', index=False)
+    return tmp_path
+
+
+def run(tmp_path, output, *args):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('JOB_DB_PATH', str(tmp_path / 'jobs.sqlite3'))
+        patch.setattr(sys, 'argv', ['bulk_score.py', str(tmp_path / 'transactions.csv'), str(tmp_path / output),
+                                    '--artifacts', str(tmp_path / 'artifacts'), '--chunk-rows', '128',
+                                    '--workers', '2', *args])
+        bulk_score.main()
+
+
+def test_scores_are_written_in_input_order(inputs):
+    run(inputs, 'scores.csv', '--keep', 'txId')
+    scores = pd.read_csv(inputs / 'scores.csv')
+    frame = pd.read_csv(inputs / 'transactions.csv')
+    assert list(scores.columns) == ['userAddress', 'txId', 'fraudScore', 'isFraud']
+    assert scores['txId'].tolist() == list(range(1000))
+    expected = load_forest(str(inputs / 'artifacts')).predict_proba(frame[COLUMNS].to_numpy(np.float32))[:, 1]
+    np.testing.assert_allclose(scores['fraudScore'], expected.astype(np.float32), rtol=1e-6)
+    assert (scores['isFraud'] == (scores['fraudScore'] > 0.5)).all()
+    assert os.listdir(inputs).count('scores.csv') == 1
+    assert not [name for name in os.listdir(inputs) if '.tmp' in name]
+
+
+def test_flag_queues_each_flagged_address_once(inputs):
+    run(inputs, 'scores.csv', '--flag')
+    scores = pd.read_csv(inputs / 'scores.csv')
+    flagged = set(scores.loc[scores['isFraud'], 'userAddress'])
+    assert flagged
+    queue = JobQueue(str(inputs / 'jobs.sqlite3'))
+    assert queue.counts() == {'pending': len(flagged)}
+    assert {job['userAddress'] for job in queue.claim(100)} == flagged
+
+
+def test_missing_feature_column_is_refused_before_writing(inputs):
+    pd.read_csv(inputs / 'transactions.csv').drop(columns='V2').to_csv(inputs / 'transactions.csv', index=False)
+    with pytest.raises(ValueError, match='missing feature columns: V2'):
+        run(inputs, 'scores.csv')
+    assert not (inputs / 'scores.csv').exists()
+
+
+def test_bad_row_late_in_the_file_leaves_no_partial_output(inputs):
+    frame = pd.read_csv(inputs / 'transactions.csv')
+    frame['V1'] = frame['V1'].astype(object)
+    frame.loc[900, 'V1'] = 'abc'
+    frame.to_csv(inputs / 'transactions.csv', index=False)
+    # The earlier chunks were already scored and written when the bad one is read
+    with pytest.raises(ValueError):
+        run(inputs, 'scores.csv')
+    assert not [name for name in os.listdir(inputs) if name.startswith('scores.csv')]
+
+
+def test_parquet_round_trip(inputs):
+    pytest.importorskip('pyarrow')
+    pd.read_csv(inputs / 'transactions.csv').to_parquet(inputs / 'transactions.parquet')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sys, 'argv', ['bulk_score.py', str(inputs / 'transactions.parquet'),
+                                    str(inputs / 'scores.parquet'), '--artifacts', str(inputs / 'artifacts'),
+                                    '--chunk-rows', '128', '--workers', '1'])
+        bulk_score.main()
+    assert len(pd.read_parquet(inputs / 'scores.parquet')) == 1000
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from coalesce import FlagCoalescer
+
+
+def test_repeated_flags_share_one_send():
+    coalescer = FlagCoalescer(window=30)
+    sends = []
+
+    def send():
+        sends.append(1)
+        return f'job{len(sends)}'
+
+    assert coalescer.submit('0xABC', True, send) == ('job1', True)
+    assert coalescer.submit('0xabc', True, send) == ('job1', False)
+    assert coalescer.submit('0xabc', False, send) == ('job2', True)
+    assert len(sends) == 2
+    assert coalescer.stats()['coalesced'] == 1
+
+
+def test_concurrent_flags_wait_for_the_in_flight_send():
+    coalescer = FlagCoalescer(window=30)
+    release = threading.Event()
+    sends = []
+    results = []
+
+    def send():
+        sends.append(1)
+        release.wait(5)
+        return 'job1'
+
+    threads = [threading.Thread(target=lambda: results.append(coalescer.submit('0xabc', True, send)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(sends) == 1
+    assert sorted(results) == [('job1', False)] * 4 + [('job1', True)]
+
+
+def test_flag_already_set_on_chain_is_skipped():
+    coalescer = FlagCoalescer(window=30, state_lookup=lambda address: True)
+    assert coalescer.submit('0xabc', True, lambda: pytest.fail('sent a no-op flag')) == (None, False)
+    assert coalescer.stats()['skippedNoop'] == 1
+
+
+def test_failed_send_is_not_coalesced():
+    coalescer = FlagCoalescer(window=30)
+
+    def failing():
+        raise RuntimeError('queue unavailable')
+
+    with pytest.raises(RuntimeError):
+        coalescer.submit('0xabc', True, failing)
+    assert coalescer.submit('0xabc', True, lambda: 'job2') == ('job2', True)
+    assert coalescer.stats()['submitted'] == 1
+
+
+def test_forget_lets_the_next_flag_go_out():
+    coalescer = FlagCoalescer(window=30)
+    coalescer.submit('0xabc', True, lambda: 'job1')
+    coalescer.forget('0xABC', True)
+    assert coalescer.submit('0xabc', True, lambda: 'job2') == ('job2', True)
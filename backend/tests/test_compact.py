@@ -0,0 +1,97 @@
+import json
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+import compact
+from artifacts import load_forest
+from forest_export import FlatForest, flatten_forest
+
+COLUMNS = ['Time', 'V1', 'V2', 'Amount']
+
+
+def dataset(n, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.normal(size=(n, len(COLUMNS))).astype(np.float32), columns=COLUMNS)
+    frame['Class'] = (frame['V1'] + frame['V2'] + rng.normal(scale=0.5, size=n) > 1.5).astype(np.int8)
+    return frame
+
+
+@pytest.fixture(scope='module')
+def forest():
+    frame = dataset(1000, 0)
+    model = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0).fit(frame[COLUMNS], frame['Class'])
+    X, y = dataset(400, 1)[COLUMNS].to_numpy(np.float32), dataset(400, 1)['Class'].to_numpy()
+    return model, flatten_forest(model), X, y
+
+
+def test_rebuild_with_every_tree_matches_the_forest(forest):
+    model, arrays, X, _ = forest
+    rebuilt = FlatForest.from_arrays(compact.rebuild(arrays, range(8)))
+    np.testing.assert_allclose(rebuilt.predict_proba(X), model.predict_proba(pd.DataFrame(X, columns=COLUMNS)),
+                               atol=1e-12)
+
+
+def test_depth_cap_turns_nodes_at_that_depth_into_leaves(forest):
+    _, arrays, X, _ = forest
+    capped = FlatForest.from_arrays(compact.rebuild(arrays, [0, 1], max_depth=2))
+    assert capped.max_depth == 2
+    assert capped.n_nodes <= 2 * 7
+    # Cut at the root, each tree predicts its whole sample's class distribution for every row
+    stumps = FlatForest.from_arrays(compact.rebuild(arrays, [0, 1], max_depth=0))
+    proba = stumps.predict_proba(X)
+    assert stumps.n_nodes == 2
+    np.testing.assert_allclose(proba, np.broadcast_to(proba[0], proba.shape))
+
+
+def test_selection_starts_from_the_single_best_tree(forest):
+    _, arrays, X, y = forest
+    flat = FlatForest.from_arrays(arrays)
+    chosen = compact.select_trees(flat, X, y, 3)
+    assert len(set(chosen)) == 3
+    single = [roc_auc_score(y, FlatForest.from_arrays(compact.rebuild(arrays, [tree])).predict_proba(X)[:, 1])
+              for tree in range(8)]
+    assert single[chosen[0]] == max(single)
+
+
+def test_float32_thresholds_decide_float32_inputs_exactly(forest):
+    _, arrays, X, _ = forest
+    full = FlatForest.from_arrays(arrays)
+    quantized = compact.quantize(arrays, 'float32')
+    assert quantized['threshold'].dtype == np.float32
+    np.testing.assert_array_equal(FlatForest.from_arrays(quantized).apply(X), full.apply(X))
+    half = compact.quantize(arrays, 'float16')['threshold'].astype(np.float64)
+    finite = np.isfinite(arrays['threshold'])
+    assert (half[finite] <= arrays['threshold'][finite]).all()
+
+
+def test_main_reports_every_setting(forest, tmp_path, monkeypatch):
+    model = forest[0]
+    test = dataset(300, 2)
+    joblib.dump(model, tmp_path / 'fraud_detection_model.pkl')
+    joblib.dump(test[COLUMNS], tmp_path / 'X_test.pkl')
+    joblib.dump(test['Class'], tmp_path / 'y_test.pkl')
+    dataset(500, 3).to_csv(tmp_path / 'creditcard.csv', index=False)
+    report = tmp_path / 'report.json'
+    monkeypatch.setattr(sys, 'argv', [
+        'compact.py', str(tmp_path), '--out', str(tmp_path / 'compacted'), '--trees', '8,3',
+        '--max-depth', 'none,3', '--precision', 'float64,float32', '--distill', 'forest,gbm',
+        '--distill-data', str(tmp_path / 'creditcard.csv'), '--student-trees', '3', '--student-depth', '3',
+        '--report', str(report)
+    ])
+    compact.main()
+    with open(report) as f:
+        settings = {entry['name']: entry for entry in json.load(f)['settings']}
+    assert len(settings) == 1 + 2 * 2 * 2 + 2
+    full = settings['t8-dfull-float64']
+    assert full['aucDelta'] == pytest.approx(0, abs=1e-9)
+    pruned = settings['t3-d3-float32']
+    assert (pruned['trees'], pruned['precision']) == (3, 'float32')
+    assert pruned['maxDepth'] <= 3
+    assert load_forest(full['path'], verify=True).n_estimators == 8
+    assert (tmp_path / 'compacted' / 'distill-gbm-t3-d3' / 'fraud_detection_model.pkl').exists()
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from features import FeatureError, FeatureExtractor
+
+COLUMNS = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+
+
+@pytest.fixture
+def extractor():
+    return FeatureExtractor(COLUMNS)
+
+
+def transaction(**values):
+    return dict(dict.fromkeys(COLUMNS, 0.0), **values)
+
+
+def test_row_follows_training_column_order(extractor):
+    row = extractor.extract(transaction(Time=1, V14=-2.5, Amount=10))
+    assert row.dtype == np.float32
+    assert row[COLUMNS.index('Time')] == 1
+    assert row[COLUMNS.index('V14')] == -2.5
+    assert row[COLUMNS.index('Amount')] == 10
+
+
+def test_numeric_strings_are_accepted(extractor):
+    row = extractor.extract(transaction(Amount='12.5', V1=' -3 '))
+    assert row[COLUMNS.index('Amount')] == 12.5
+    assert row[COLUMNS.index('V1')] == -3
+
+
+def test_missing_fields_are_listed(extractor):
+    payload = transaction()
+    del payload['V3'], payload['Amount']
+    payload['V4'] = None
+    with pytest.raises(FeatureError) as error:
+        extractor.extract(payload)
+    assert error.value.missing == ['V3', 'V4', 'Amount']
+    assert 'missing fields: V3, V4, Amount' in str(error.value)
+
+
+@pytest.mark.parametrize('value', [True, False, math.nan, 'nan', 'abc', '', [1], {'a': 1}])
+def test_non_numeric_values_are_rejected(extractor, value):
+    with pytest.raises(FeatureError) as error:
+        extractor.extract(transaction(V7=value))
+    assert error.value.non_numeric == ['V7']
+    assert error.value.missing == []
+
+
+def test_transaction_must_be_an_object(extractor):
+    with pytest.raises(FeatureError, match='must be a JSON object'):
+        extractor.extract([0.0] * len(COLUMNS))
+
+
+def test_extract_many_reports_invalid_rows_by_index(extractor):
+    payloads = [transaction(V1=1), transaction(V1='x'), 'not a dict', transaction(V1='2')]
+    rows, errors = extractor.extract_many(payloads)
+    assert rows.shape == (4, len(COLUMNS))
+    assert sorted(errors) == [1, 2]
+    assert 'non-numeric fields: V1' in errors[1]
+    assert rows[0, COLUMNS.index('V1')] == 1
+    assert rows[3, COLUMNS.index('V1')] == 2
+
+
+def test_extract_many_matches_extract(extractor):
+    payloads = [transaction(V1=i, Amount=str(i * 1.5)) for i in range(5)]
+    rows, errors = extractor.extract_many(payloads)
+    assert errors == {}
+    np.testing.assert_array_equal(rows, np.stack([extractor.extract(payload) for payload in payloads]))
+
+
+@pytest.mark.parametrize('value', [math.inf, -math.inf, 'Infinity', '-inf', 1e300, '1e39', 10 ** 400])
+def test_values_infinite_in_float32_are_rejected(extractor, value):
+    with pytest.raises(FeatureError) as error:
+        extractor.extract(transaction(Amount=value))
+    assert error.value.non_finite == ['Amount']
+    assert 'non-finite fields: Amount' in str(error.value)
+
+
+def test_largest_float32_value_is_accepted(extractor):
+    row = extractor.extract(transaction(Amount=3.4e38))
+    assert np.isfinite(row).all()
+
+
+def test_extract_many_rejects_non_finite_rows(extractor):
+    rows, errors = extractor.extract_many([transaction(V2=math.inf), transaction(V2=1.0)])
+    assert list(errors) == [0]
+    assert 'non-finite fields: V2' in errors[0]
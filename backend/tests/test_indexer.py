@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip('eth_tester')
+
+from bench_bulk_flags import send, setup_chain
+from indexer import EventIndexer
+from nonce import NonceManager
+
+
+@pytest.fixture
+def chain():
+    # UserAuth from the truffle build on an in-process eth-tester chain, two registered users
+    return setup_chain(2)
+
+
+def flag(chain, user, is_fraud=True):
+    w3, contract, nonces, owner, _ = chain
+    return send(w3, nonces, owner, lambda nonce: contract.functions.updateFraudStatus(
+        user.address, is_fraud
+    ).build_transaction({'from': owner.address, 'nonce': nonce, 'gas': 500000, 'gasPrice': w3.to_wei('20', 'gwei')}))
+
+
+def indexer_for(chain, tmp_path, **kwargs):
+    w3, contract = chain[:2]
+    return EventIndexer(w3, contract, str(tmp_path / 'events.sqlite3'), **kwargs)
+
+
+def test_indexes_registrations_and_flags(chain, tmp_path):
+    users = chain[4]
+    receipt = flag(chain, users[0])
+    indexer = indexer_for(chain, tmp_path)
+    assert indexer.step() == 3
+    total, flagged = indexer.flagged()
+    assert total == 1
+    assert flagged == [{'address': users[0].address.lower(), 'flaggedAtBlock': receipt['blockNumber'],
+                        'txHash': receipt['transactionHash'].to_0x_hex()}]
+    total, events = indexer.history(users[0].address)
+    assert [event['event'] for event in events] == ['FraudStatusUpdated', 'UserRegistered']
+    assert events[1]['username'] == 'user0'
+
+
+def test_block_range_splits_the_backfill(chain, tmp_path):
+    w3 = chain[0]
+    indexer = indexer_for(chain, tmp_path, block_range=1)
+    steps = 0
+    while indexer.last_block[0] < w3.eth.block_number:
+        indexer.step()
+        steps += 1
+    assert steps == w3.eth.block_number + 1
+    assert indexer.history(chain[4][1].address)[0] == 1
+
+
+def test_unflagging_removes_the_address_from_flagged(chain, tmp_path):
+    users = chain[4]
+    flag(chain, users[0])
+    flag(chain, users[1])
+    flag(chain, users[0], False)
+    indexer = indexer_for(chain, tmp_path)
+    indexer.step()
+    total, flagged = indexer.flagged()
+    assert (total, [entry['address'] for entry in flagged]) == (1, [users[1].address.lower()])
+
+
+def test_restart_continues_from_the_checkpoint(chain, tmp_path):
+    users = chain[4]
+    indexer_for(chain, tmp_path).step()
+    flag(chain, users[1])
+    restarted = indexer_for(chain, tmp_path)
+    # Only the new block is read; the registrations are not indexed twice
+    assert restarted.step() == 1
+    assert restarted.history(users[1].address)[0] == 2
+
+
+def test_reorg_rewinds_and_reindexes(chain, tmp_path):
+    w3 = chain[0]
+    snapshot = w3.testing.snapshot()
+    flag(chain, chain[4][0])
+    indexer = indexer_for(chain, tmp_path, reorg_depth=1)
+    indexer.step()
+    assert indexer.flagged()[0] == 1
+    # The flag's block is replaced by one that flags the other user
+    w3.testing.revert(snapshot)
+    w3, contract, _, owner, users = chain
+    flag((w3, contract, NonceManager(w3), owner, users), users[1])
+    w3.testing.mine(1)
+    indexer.step()
+    indexer.step()
+    total, flagged = indexer.flagged()
+    assert (total, [entry['address'] for entry in flagged]) == (1, [users[1].address.lower()])
+
+
+def test_start_twice_runs_one_indexing_thread(chain, tmp_path):
+    indexer = indexer_for(chain, tmp_path, poll_interval=60)
+    thread = indexer.start()._thread
+    assert indexer.start()._thread is thread
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import ingest_csv, load_dataset
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(250, 3)), columns=['Time', 'V1', 'Amount'])
+    frame['Class'] = (frame['V1'] > 1).astype(int)
+    path = tmp_path / 'creditcard.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_dataset_matches_a_plain_read_in_float32(csv_path, tmp_path):
+    X, y = load_dataset(csv_path, str(tmp_path / 'cache'), chunk_size=100)
+    expected = pd.read_csv(csv_path)
+    assert list(X.columns) == ['Time', 'V1', 'Amount']
+    np.testing.assert_array_equal(X.to_numpy(), expected[list(X.columns)].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(y.to_numpy(), expected['Class'].to_numpy())
+    assert (X.dtypes == np.float32).all() and y.dtype == np.int8
+
+
+def test_unchanged_file_reuses_the_cache(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    out_dir = ingest_csv(csv_path, cache_dir)
+    os.remove(os.path.join(out_dir, 'labels.npy'))
+    # A hit never opens the CSV or rewrites the cache
+    assert ingest_csv(csv_path, cache_dir) == out_dir
+    assert not os.path.exists(os.path.join(out_dir, 'labels.npy'))
+
+
+def test_changed_content_gets_a_new_cache(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = ingest_csv(csv_path, cache_dir)
+    with open(csv_path, 'a') as f:
+        f.write('1,2,3,1\n')
+    second = ingest_csv(csv_path, cache_dir)
+    assert second != first
+    X, _ = load_dataset(csv_path, cache_dir)
+    assert len(X) == 251
+
+
+def test_writes_to_the_loaded_frame_never_reach_the_cache(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    X, _ = load_dataset(csv_path, cache_dir)
+    original = X['Amount'].iloc[0]
+    X.iloc[0, X.columns.get_loc('Amount')] = 1e6
+    assert load_dataset(csv_path, cache_dir)[0]['Amount'].iloc[0] == original
+
+
+def test_missing_label_column_is_rejected(csv_path, tmp_path):
+    with pytest.raises(ValueError, match="Label column 'Fraud'"):
+        ingest_csv(csv_path, str(tmp_path / 'cache'), label='Fraud')
@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from jobs import JobQueue, JobWorkers
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def test_claim_marks_running_and_counts_attempts(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.enqueue('0xabc', True)
+    [job] = queue.claim()
+    assert (job['id'], job['status'], job['attempts'], job['isFraud']) == (job_id, 'running', 1, True)
+    assert queue.get(job_id)['status'] == 'running'
+    assert queue.claim() == []
+
+
+def test_queues_sharing_a_database_never_claim_the_same_job(db_path):
+    first, second = JobQueue(db_path), JobQueue(db_path)
+    job_ids = first.enqueue_many((f'0x{i:040x}', True) for i in range(3))
+    claimed = first.claim(2) + second.claim(2)
+    assert sorted(job['id'] for job in claimed) == sorted(job_ids)
+    assert first.claim(2) == second.claim(2) == []
+
+
+def test_concurrent_claims_take_each_job_once(db_path):
+    job_ids = JobQueue(db_path).enqueue_many((f'0x{i:040x}', True) for i in range(200))
+    queues = [JobQueue(db_path) for _ in range(4)]
+    claimed = []
+    lock = threading.Lock()
+
+    def drain(queue):
+        while jobs := queue.claim(3):
+            with lock:
+                claimed.extend(job['id'] for job in jobs)
+
+    threads = [threading.Thread(target=drain, args=(queue,)) for queue in queues for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_running_job_is_not_reclaimed_while_its_lease_holds(db_path):
+    JobQueue(db_path).enqueue('0xabc', True)
+    JobQueue(db_path).claim()
+    # A restarted process must not take over jobs another live process is sending
+    assert JobQueue(db_path, lease_seconds=600).claim() == []
+
+
+def test_running_job_is_reclaimed_after_its_lease_expires(db_path):
+    job_id = JobQueue(db_path).enqueue('0xabc', True)
+    crashed = JobQueue(db_path)
+    crashed.claim()
+    time.sleep(0.01)
+    survivor = JobQueue(db_path, lease_seconds=0)
+    [job] = survivor.claim()
+    assert (job['id'], job['attempts']) == (job_id, 2)
+    row = survivor._conn.execute('SELECT owner FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    assert row['owner'] == survivor.owner != crashed.owner
+
+
+def test_retry_or_fail_requeues_until_max_attempts(db_path):
+    queue = JobQueue(db_path, max_attempts=2)
+    job_id = queue.enqueue('0xabc', True)
+    queue.retry_or_fail(queue.claim()[0], 'node down')
+    assert queue.get(job_id)['status'] == 'pending'
+    queue.retry_or_fail(queue.claim()[0], 'node down')
+    job = queue.get(job_id)
+    assert (job['status'], job['attempts'], job['error']) == ('failed', 2, 'node down')
+    assert queue.claim() == []
+
+
+def test_enqueue_many_is_claimed_in_order(db_path):
+    queue = JobQueue(db_path)
+    job_ids = queue.enqueue_many([('0x1', True), ('0x2', False)])
+    assert queue.counts() == {'pending': 2}
+    assert [(job['id'], job['userAddress'], job['isFraud']) for job in queue.claim(5)] == \
+        [(job_ids[0], '0x1', True), (job_ids[1], '0x2', False)]
+
+
+def test_opening_adds_lease_columns_to_an_older_database(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, user_address TEXT NOT NULL, is_fraud INTEGER NOT NULL,
+            status TEXT NOT NULL, tx_hash TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL, updated_at REAL NOT NULL
+        )
+    """)
+    conn.execute("INSERT INTO jobs VALUES ('old', '0xabc', 1, 'pending', NULL, NULL, 0, 1, 1)")
+    conn.commit()
+    conn.close()
+    [job] = JobQueue(db_path).claim()
+    assert job['id'] == 'old'
+
+
+def test_recorded_tx_hash_is_visible_while_running(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.enqueue('0xabc', True)
+    queue.claim()
+    queue.record_tx(job_id, 'ab' * 32)
+    job = queue.get(job_id)
+    assert (job['status'], job['txHash']) == ('running', 'ab' * 32)
+
+
+def test_retry_keeps_the_recorded_tx_hash_for_the_next_claim(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.enqueue('0xabc', True)
+    queue.record_tx(job_id, 'ab' * 32)
+    queue.retry_or_fail(queue.claim()[0], 'Transaction not mined within 120s')
+    [job] = queue.claim()
+    assert (job['id'], job['txHash'], job['attempts']) == (job_id, 'ab' * 32, 2)
+    queue.complete(job_id, 'mined', 'cd' * 32)
+    assert queue.get(job_id)['txHash'] == 'cd' * 32
+
+
+def test_workers_retry_a_job_whose_future_fails(db_path):
+    queue = JobQueue(db_path, max_attempts=2)
+    job_id = queue.enqueue('0xabc', True)
+    futures = []
+
+    def handler(job):
+        futures.append(Future())
+        return futures[-1]
+
+    JobWorkers(queue, handler, poll_interval=0.01).start()
+    deadline = time.monotonic() + 5
+    while not futures and time.monotonic() < deadline:
+        time.sleep(0.01)
+    futures[0].set_exception(TimeoutError('Transaction not mined within 120s'))
+    while len(futures) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    futures[1].set_result({'status': 'mined', 'txHash': 'ab' * 32})
+    job = queue.get(job_id)
+    assert (job['status'], job['attempts'], job['txHash']) == ('mined', 2, 'ab' * 32)
+
+
+def test_starting_workers_again_is_a_no_op(db_path):
+    workers = JobWorkers(JobQueue(db_path), lambda job: {'status': 'noop'}, workers=2, poll_interval=0.01)
+    workers.start()
+    workers.start()
+    assert all(thread.is_alive() for thread in workers._threads)
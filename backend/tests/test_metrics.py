@@ -0,0 +1,58 @@
+from metrics import Registry
+
+
+def test_counter_renders_one_line_per_label_set():
+    registry = Registry()
+    counter = registry.counter('jobs_total', 'Jobs by status', ('status',))
+    counter.inc(status='mined')
+    counter.inc(2, status='failed')
+    counter.inc(status='mined')
+    assert registry.render().splitlines() == [
+        '# HELP jobs_total Jobs by status',
+        '# TYPE jobs_total counter',
+        'jobs_total{status="failed"} 2',
+        'jobs_total{status="mined"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram('wait_seconds', 'Wait', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'wait_seconds_bucket{le="0.1"} 2',
+        'wait_seconds_bucket{le="1.0"} 3',
+        'wait_seconds_bucket{le="+Inf"} 4',
+        'wait_seconds_sum 3.65',
+        'wait_seconds_count 4',
+    ]
+
+
+def test_timer_observes_its_block():
+    registry = Registry()
+    histogram = registry.histogram('stage_seconds', 'Stages', ('stage',))
+    with histogram.time(stage='predict'):
+        pass
+    assert 'stage_seconds_count{stage="predict"} 1' in registry.render()
+
+
+def test_failing_gauge_does_not_break_the_scrape():
+    registry = Registry()
+    registry.gauge('broken', 'Raises', lambda: 1 / 0)
+    registry.gauge('queued', 'Queued by status', lambda: {('pending',): 3}, ('status',))
+    text = registry.render()
+    assert '# broken unavailable: division by zero' in text
+    assert 'queued{status="pending"} 3' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter('errors_total', 'Errors', ('method',)).inc(method='a"b\nc')
+    assert 'errors_total{method="a\\"b\\nc"} 1' in registry.render()
+
+
+def test_registering_a_name_again_returns_the_same_metric():
+    registry = Registry()
+    assert registry.counter('x_total', 'X') is registry.counter('x_total', 'X')
@@ -0,0 +1,67 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_export import export_forest, FlatForest
+from model_registry import ModelRegistry
+
+COLUMNS = ['V1', 'V2', 'Amount']
+
+
+def fitted(seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(300, len(COLUMNS))), columns=COLUMNS)
+    return RandomForestClassifier(n_estimators=3, max_depth=3, random_state=seed).fit(X, (X['V1'] > 0).astype(int))
+
+
+def registry_for(path):
+    return ModelRegistry(path, joblib.load, lambda source: [source],
+                         lambda columns: np.zeros((4, len(columns)), dtype=np.float32), COLUMNS)
+
+
+def test_reload_swaps_in_a_changed_model_and_keeps_history(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    joblib.dump(fitted(0), path)
+    registry = registry_for(path)
+    first = registry.reload()
+    assert registry.reload() is first
+    joblib.dump(fitted(1), path)
+    second = registry.reload()
+    assert second is registry.active and second.version != first.version
+    assert [entry['version'] for entry in registry.status()['history']] == [first.version, second.version]
+
+
+def test_broken_model_keeps_the_active_version(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    joblib.dump(fitted(0), path)
+    registry = registry_for(path)
+    active = registry.reload()
+    joblib.dump(fitted(1).fit(np.zeros((2, 2)), [0, 1]), path)
+    with pytest.raises(ValueError, match='expects 2 features'):
+        registry.reload()
+    assert registry.active is active
+    assert 'expects 2 features' in registry.status()['error']
+
+
+def test_rows_reach_a_named_sklearn_model_as_a_frame(tmp_path, recwarn):
+    path = str(tmp_path / 'model.pkl')
+    model = fitted(0)
+    joblib.dump(model, path)
+    active = registry_for(path).reload()
+    rows = np.ones((2, len(COLUMNS)), dtype=np.float32)
+    np.testing.assert_array_equal(active.predict_proba(rows), model.predict_proba(pd.DataFrame(rows, columns=COLUMNS)))
+    assert not [w for w in recwarn if 'feature names' in str(w.message)]
+
+
+def test_flat_forest_gets_plain_rows(tmp_path):
+    path = export_forest(fitted(0), str(tmp_path / 'model.npz'))
+    registry = ModelRegistry(path, FlatForest.load, lambda source: [source],
+                             lambda columns: np.zeros((4, len(columns)), dtype=np.float32), COLUMNS)
+    active = registry.reload()
+    assert active.feature_columns == COLUMNS
+    assert active.predict_proba(np.zeros((1, 3), dtype=np.float32)).shape == (1, 2)
+    assert os.path.exists(path)
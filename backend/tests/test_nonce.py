@@ -0,0 +1,104 @@
+import types
+
+import pytest
+from eth_account import Account
+
+from nonce import NonceManager
+
+OWNER = Account.create()
+
+
+class FakeNode:
+    """Pending nonce per address plus a scripted error for the next sends."""
+
+    def __init__(self, pending=0):
+        self.pending = pending
+        self.errors = []
+        self.sent = []
+        self.count_calls = 0
+        self.eth = types.SimpleNamespace(
+            account=Account,
+            get_transaction_count=self.get_transaction_count,
+            send_raw_transaction=self.send_raw_transaction
+        )
+
+    def get_transaction_count(self, address, block):
+        self.count_calls += 1
+        return self.pending
+
+    def send_raw_transaction(self, raw):
+        tx = Account.recover_transaction(raw)
+        self.sent.append(raw)
+        if self.errors:
+            raise ValueError(self.errors.pop(0))
+        self.pending += 1
+        return b'sent:' + tx.encode()
+
+
+def build_tx(nonce):
+    return {'to': OWNER.address, 'value': 0, 'gas': 21000, 'gasPrice': 1, 'nonce': nonce, 'chainId': 1337}
+
+
+def test_allocates_consecutive_nonces_after_one_node_lookup():
+    node = FakeNode(pending=7)
+    nonces = NonceManager(node)
+    assert [nonces.allocate(OWNER.address) for _ in range(3)] == [7, 8, 9]
+    assert node.count_calls == 1
+
+
+@pytest.mark.parametrize('message', ['already known', 'known transaction: 0xab'])
+def test_already_known_returns_the_hash_of_the_same_transaction(message):
+    node = FakeNode()
+    node.errors.append(message)
+    nonces = NonceManager(node)
+    tx_hash = nonces.send(OWNER.address, OWNER.key, build_tx)
+    signed = Account.sign_transaction(build_tx(0), OWNER.key)
+    assert tx_hash == signed.hash
+    # Not resent, and the next transaction gets the next nonce
+    assert len(node.sent) == 1
+    assert nonces.allocate(OWNER.address) == 1
+
+
+def test_nonce_error_resyncs_and_resends():
+    node = FakeNode(pending=3)
+    nonces = NonceManager(node)
+    nonces.send(OWNER.address, OWNER.key, build_tx)
+    # Another process took nonce 4
+    node.pending = 5
+    node.errors.append('nonce too low')
+    nonces.send(OWNER.address, OWNER.key, build_tx)
+    assert node.sent == [Account.sign_transaction(build_tx(n), OWNER.key).raw_transaction for n in (3, 4, 5)]
+
+
+def test_failed_send_releases_its_nonce():
+    node = FakeNode()
+    node.errors.append('insufficient funds')
+    nonces = NonceManager(node)
+    with pytest.raises(ValueError, match='insufficient funds'):
+        nonces.send(OWNER.address, OWNER.key, build_tx)
+    assert nonces.allocate(OWNER.address) == 0
+
+
+def test_dropped_transaction_gap_is_refilled_on_the_next_check():
+    node = FakeNode(pending=0)
+    nonces = NonceManager(node, gap_check_interval=0)
+    for _ in range(3):
+        nonces.send(OWNER.address, OWNER.key, build_tx)
+    # Nonce 1 fell out of the mempool: the node now expects 1 again
+    node.pending = 1
+    assert nonces.allocate(OWNER.address) == 1
+
+
+def test_gap_check_ignores_nonces_still_being_sent():
+    node = FakeNode(pending=0)
+    nonces = NonceManager(node, gap_check_interval=0)
+    first = nonces.allocate(OWNER.address)
+    assert (first, nonces.allocate(OWNER.address)) == (0, 1)
+
+
+def test_gap_check_follows_another_sender():
+    node = FakeNode(pending=0)
+    nonces = NonceManager(node, gap_check_interval=0)
+    nonces.send(OWNER.address, OWNER.key, build_tx)
+    node.pending = 4
+    assert nonces.allocate(OWNER.address) == 4
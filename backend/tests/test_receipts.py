@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from web3.exceptions import TransactionNotFound
+
+from receipts import ReceiptTracker, replace_transaction
+
+HASH_A = '0x' + 'aa' * 32
+HASH_B = '0x' + 'bb' * 32
+
+
+class FakeNode:
+    def __init__(self):
+        self.blocks = [[]]
+        self.receipts = {}
+        self.down = False
+        self.eth = self
+
+    @property
+    def block_number(self):
+        if self.down:
+            raise ConnectionError('node down')
+        return len(self.blocks) - 1
+
+    def mine(self, *hashes):
+        self.blocks.append([bytes.fromhex(h[2:]) for h in hashes])
+        for tx_hash in hashes:
+            self.receipts[tx_hash] = {'transactionHash': tx_hash, 'status': 1}
+
+    def get_block(self, number):
+        return {'transactions': self.blocks[number]}
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(f'{tx_hash} not found')
+        return self.receipts[tx_hash]
+
+    def get_transaction(self, tx_hash):
+        raise TransactionNotFound(f'{tx_hash} not found')
+
+
+@pytest.fixture
+def node():
+    return FakeNode()
+
+
+def test_already_mined_transaction_resolves_on_the_first_round(node):
+    tracker = ReceiptTracker(node)
+    node.mine(HASH_A)
+    future = tracker.track(HASH_A)
+    tracker._poll()
+    assert future.result(0)['transactionHash'] == HASH_A
+    assert tracker.pending_count() == 0
+
+
+def test_transaction_mined_later_is_found_by_the_block_scan(node):
+    tracker = ReceiptTracker(node)
+    future = tracker.track(HASH_A)
+    tracker._poll()
+    assert not future.done()
+    node.mine(HASH_B)
+    node.mine(HASH_A)
+    tracker._poll()
+    assert future.result(0)['transactionHash'] == HASH_A
+
+
+def test_tracking_a_hash_twice_shares_one_future(node):
+    tracker = ReceiptTracker(node)
+    assert tracker.track(HASH_A) is tracker.track(bytes.fromhex(HASH_A[2:]))
+    assert tracker.pending_count() == 1
+
+
+def test_dropped_stuck_transaction_fails_only_its_own_record(node):
+    tracker = ReceiptTracker(node, stuck_after=0)
+
+    def replace(tx_hash):
+        return replace_transaction(node, tx_hash, private_key=None)
+
+    dropped = tracker.track(HASH_A, on_stuck=replace)
+    other = tracker.track(HASH_B, timeout=0.01)
+    time.sleep(0.02)
+    tracker._poll()
+    with pytest.raises(TransactionNotFound):
+        dropped.result(0)
+    # The same round still expired the other record
+    with pytest.raises(TimeoutError):
+        other.result(0)
+
+
+def test_failing_replacement_keeps_waiting_for_the_original(node):
+    tracker = ReceiptTracker(node, stuck_after=0)
+    future = tracker.track(HASH_A, on_stuck=lambda tx_hash: 1 / 0)
+    tracker._poll()
+    assert not future.done()
+    node.mine(HASH_A)
+    tracker._poll()
+    assert future.result(0)['status'] == 1
+
+
+def test_timeouts_fire_while_the_node_is_unreachable(node):
+    tracker = ReceiptTracker(node)
+    future = tracker.track(HASH_A, timeout=0.01)
+    node.down = True
+    time.sleep(0.02)
+    with pytest.raises(ConnectionError):
+        tracker._poll()
+    with pytest.raises(TimeoutError):
+        future.result(0)
+
+
+def test_start_twice_runs_one_polling_thread(node):
+    tracker = ReceiptTracker(node)
+    thread = tracker.start()._thread
+    assert tracker.start()._thread is thread
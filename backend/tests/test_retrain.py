@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import retrain
+from artifacts import load_forest, write_artifacts
+
+COLUMNS = ['V1', 'V2', 'Amount']
+
+
+def labeled(n, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.normal(size=(n, len(COLUMNS))).astype(np.float32), columns=COLUMNS)
+    frame['Class'] = (frame['V1'] > 1).astype(np.int8)
+    return frame
+
+
+@pytest.fixture
+def saved_dir(tmp_path):
+    # What train.py --save leaves behind
+    frame = labeled(400, 0)
+    scaler = StandardScaler().fit(frame[['Amount']])
+    X, y = frame[COLUMNS].copy(), frame['Class']
+    X['Amount'] = scaler.transform(X[['Amount']])
+    model = RandomForestClassifier(n_estimators=6, max_depth=3, random_state=0).fit(X[:300], y[:300])
+    joblib.dump(model, tmp_path / retrain.MODEL_FILE)
+    joblib.dump(scaler, tmp_path / 'scaler.pkl')
+    joblib.dump(X[300:], tmp_path / 'X_test.pkl')
+    joblib.dump(y[300:], tmp_path / 'y_test.pkl')
+    write_artifacts(str(tmp_path / 'artifacts'), model, X[300:], y[300:])
+    labeled(200, 1).to_csv(tmp_path / 'new_labels.csv', index=False)
+    return tmp_path
+
+
+def run(saved_dir, *args):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sys, 'argv', ['retrain.py', str(saved_dir / 'new_labels.csv'),
+                                    '--saved-dir', str(saved_dir), *args])
+        retrain.main()
+    (version,) = os.listdir(saved_dir / 'versions')
+    with open(saved_dir / 'versions' / version / 'report.json') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('mode, trees_after', [('add', 9), ('replace', 6)])
+def test_grow_keeps_the_newest_trees(saved_dir, mode, trees_after):
+    model = joblib.load(saved_dir / retrain.MODEL_FILE)
+    kept = model.estimators_[3:]
+    X, y = labeled(200, 1)[COLUMNS], labeled(200, 1)['Class']
+    model, _ = retrain.grow(model, X, y, 3, mode)
+    assert len(model.estimators_) == model.n_estimators == trees_after
+    assert model.estimators_[-6:-3] == kept
+    assert (model.warm_start, model.n_jobs) == (False, None)
+
+
+def test_labels_need_every_feature_column(saved_dir):
+    scaler = joblib.load(saved_dir / 'scaler.pkl')
+    labeled(10, 1).drop(columns='V2').to_csv(saved_dir / 'bad.csv', index=False)
+    with pytest.raises(ValueError, match='missing columns: V2'):
+        retrain.load_labels(str(saved_dir / 'bad.csv'), COLUMNS, scaler)
+    X, y = retrain.load_labels(str(saved_dir / 'new_labels.csv'), COLUMNS, scaler, window=50)
+    assert (len(X), len(y)) == (50, 50)
+
+
+def test_same_second_versions_get_a_suffix(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrain.time, 'strftime', lambda fmt: '20260101-000000')
+    names = [retrain.new_version_dir(str(tmp_path))[1] for _ in range(3)]
+    assert names == ['20260101-000000', '20260101-000000-1', '20260101-000000-2']
+
+
+def test_replace_report_keeps_the_forest_size(saved_dir):
+    report = run(saved_dir, '--mode', 'replace', '--trees', '2')
+    assert (report['treesBefore'], report['treesAfter']) == (6, 6)
+    assert report['newRows'] == 200
+    assert report['holdoutAucBefore'] is not None and report['holdoutAucAfter'] is not None
+    # Without --promote the served model is untouched
+    assert len(joblib.load(saved_dir / retrain.MODEL_FILE).estimators_) == 6
+
+
+def test_promote_swaps_in_the_model_and_artifacts(saved_dir):
+    X_frame = joblib.load(saved_dir / 'X_test.pkl')
+    X_test = X_frame.to_numpy(np.float32)
+    mapped = load_forest(str(saved_dir / 'artifacts'))
+    before = mapped.predict_proba(X_test)
+    run(saved_dir, '--trees', '4', '--promote')
+    promoted = joblib.load(saved_dir / retrain.MODEL_FILE)
+    assert len(promoted.estimators_) == 10
+    np.testing.assert_allclose(load_forest(str(saved_dir / 'artifacts'), verify=True).predict_proba(X_test),
+                               promoted.predict_proba(X_frame), atol=1e-6)
+    # A server still mapping the old artifacts keeps reading them
+    np.testing.assert_array_equal(mapped.predict_proba(X_test), before)
+    assert not [name for name in os.listdir(saved_dir) if name.startswith(('artifacts.', retrain.MODEL_FILE + '.'))]
+
+
+def test_saved_dir_without_a_scaler_is_refused(saved_dir):
+    os.remove(saved_dir / 'scaler.pkl')
+    with pytest.raises(SystemExit, match='Run train.py --save'):
+        run(saved_dir)
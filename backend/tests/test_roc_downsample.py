@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.metrics import roc_auc_score, roc_curve
+
+from roc_downsample import StreamingRoc, downsample_curve, drop_collinear
+
+
+@pytest.fixture
+def scored():
+    rng = np.random.default_rng(0)
+    y = rng.random(5000) < 0.1
+    scores = np.clip(rng.normal(0.3 + 0.4 * y, 0.2), 0, 1)
+    return y, scores
+
+
+def test_collinear_points_are_dropped():
+    assert drop_collinear([0, 0.5, 1], [0, 0.5, 1]).tolist() == [0, 2]
+    assert drop_collinear([0, 0.2, 1], [0, 0.8, 1]).tolist() == [0, 1, 2]
+
+
+def test_downsampled_curve_keeps_endpoints_and_point_limit(scored):
+    fpr, tpr, thresholds = roc_curve(*scored)
+    curve = downsample_curve(fpr, tpr, thresholds, 50)
+    assert 2 <= len(curve['fpr']) <= 50
+    assert len(curve['fpr']) == len(curve['tpr']) == len(curve['thresholds'])
+    assert (curve['fpr'][0], curve['tpr'][0]) == (fpr[0], tpr[0])
+    assert (curve['fpr'][-1], curve['tpr'][-1]) == (1.0, 1.0)
+    assert np.all(np.diff(curve['fpr']) >= 0)
+
+
+def test_short_curve_is_unchanged():
+    curve = downsample_curve([0, 0.2, 1], [0, 0.8, 1], [2.0, 0.5, 0.0], 1000)
+    assert curve == {'fpr': [0, 0.2, 1], 'tpr': [0, 0.8, 1], 'thresholds': [2.0, 0.5, 0.0]}
+
+
+def test_streaming_roc_matches_exact_auc(scored):
+    y, scores = scored
+    roc = StreamingRoc(n_bins=1000)
+    for start in range(0, len(y), 1000):
+        roc.update(y[start:start + 1000], scores[start:start + 1000])
+    curve = roc.curve()
+    assert len(curve['fpr']) == 1001
+    assert curve['roc_auc'] == pytest.approx(roc_auc_score(y, scores), abs=1e-3)
@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+import pytest
+from eth_account import Account
+from flask import Flask
+
+COLUMNS = ['Time'] + ['V%d' % i for i in range(1, 29)] + ['Amount']
+FRAUD = {'V14': -12.0}
+USER = '0xa29FC23Fa33F1D3c566bD3459Ce17225EadF109A'
+
+
+@pytest.fixture
+def client(server):
+    app = Flask(__name__)
+    app.register_blueprint(server.api)
+    return app.test_client()
+
+
+def transaction(**values):
+    return dict(dict.fromkeys(COLUMNS, 0.0), **values)
+
+
+def test_check_fraud_scores_a_valid_transaction(client):
+    response = client.post('/check-fraud', json={'transaction': transaction(Amount='10.5'), 'userAddress': USER})
+    assert response.status_code == 200
+    assert response.get_json() == {'isFraud': False}
+
+
+@pytest.mark.parametrize('value', [None, True, 'abc', float('nan')])
+def test_check_fraud_rejects_invalid_fields(client, value):
+    payload = transaction(V5=value)
+    if value is None:
+        del payload['V5']
+    response = client.post('/check-fraud', json={'transaction': payload, 'userAddress': USER})
+    assert response.status_code == 400
+    assert 'V5' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('body', [{}, [], {'records': 'x'}, 'records'])
+def test_batch_needs_a_non_empty_array(client, body):
+    response = client.post('/check-fraud/batch', json=body)
+    assert response.status_code == 400
+
+
+def test_batch_reports_the_same_errors_as_the_single_endpoint(client):
+    bad = transaction(V5=True)
+    single = client.post('/check-fraud', json={'transaction': bad, 'userAddress': USER}).get_json()
+    response = client.post('/check-fraud/batch', json=[
+        {'transaction': transaction(), 'userAddress': USER},
+        {'transaction': bad, 'userAddress': USER},
+        {'transaction': transaction()},
+        {'transaction': transaction(V1='2.5'), 'userAddress': USER},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['scored'], body['rejected']) == (2, 2)
+    results = body['results']
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    assert results[1]['error'] == single['error']
+    assert 'userAddress' in results[2]['error']
+    assert results[0]['chainAction'] == results[3]['chainAction'] == 'none'
+
+
+def test_batch_queues_one_flag_per_address(client, server):
+    address = '0x' + '11' * 20
+    response = client.post('/check-fraud/batch', json={'records': [
+        {'transaction': transaction(**FRAUD), 'userAddress': address},
+        {'transaction': transaction(**FRAUD), 'userAddress': address},
+    ]})
+    first, second = response.get_json()['results']
+    assert first['isFraud'] and second['isFraud']
+    assert (first['chainAction'], second['chainAction']) == ('queued', 'coalesced')
+    assert first['jobId'] == second['jobId']
+    assert server.job_queue.get(first['jobId'])['status'] == 'pending'
+
+
+def test_batch_reports_non_finite_records_and_scores_the_rest(client):
+    response = client.post('/check-fraud/batch', json=[
+        {'transaction': transaction(Amount=1e300), 'userAddress': USER},
+        {'transaction': transaction(), 'userAddress': USER},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['scored'], body['rejected']) == (1, 1)
+    assert 'non-finite fields: Amount' in body['results'][0]['error']
+    assert body['results'][1]['isFraud'] is False
+
+
+def test_batch_scores_the_other_rows_when_one_fails_in_the_model(client, server, monkeypatch):
+    active = server.model_registry.active
+    predict_proba = active.predict_proba
+
+    def failing_on_marked_rows(rows):
+        if (np.asarray(rows)[:, COLUMNS.index('V1')] == 999).any():
+            raise ValueError('model rejected the row')
+        return predict_proba(rows)
+
+    monkeypatch.setattr(active, 'predict_proba', failing_on_marked_rows)
+    response = client.post('/check-fraud/batch', json=[
+        {'transaction': transaction(), 'userAddress': USER},
+        {'transaction': transaction(V1=999), 'userAddress': USER},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['scored'], body['rejected']) == (1, 1)
+    assert body['results'][0]['chainAction'] == 'none'
+    assert body['results'][1]['error'] == 'Scoring failed: model rejected the row'
+
+
+def claimed_job(server, tx_hash=None):
+    job_id = server.job_queue.enqueue(Account.create().address, True)
+    if tx_hash:
+        server.job_queue.record_tx(job_id, tx_hash)
+    return next(job for job in server.job_queue.claim(100) if job['id'] == job_id)
+
+
+def test_flag_job_waits_for_its_recorded_transaction_instead_of_resending(server, monkeypatch):
+    job = claimed_job(server, 'ab' * 32)
+    monkeypatch.setattr(server.w3.eth, 'get_transaction', lambda tx_hash: {'hash': tx_hash})
+    monkeypatch.setattr(server, 'update_fraud_status', lambda *args: pytest.fail('transaction sent again'))
+    tracked = []
+    monkeypatch.setattr(server, 'fraud_status_outcome',
+                        lambda tx_hash, *args: tracked.append(tx_hash) or {'status': 'mined', 'txHash': 'ab' * 32})
+    assert server.process_flag_job(job) == {'status': 'mined', 'txHash': 'ab' * 32}
+    assert tracked == [bytes.fromhex('ab' * 32)]
+
+
+def test_flag_job_records_the_hash_of_a_resent_transaction(server, monkeypatch):
+    job = claimed_job(server, 'ab' * 32)
+
+    def dropped(tx_hash):
+        raise server.TransactionNotFound('not found')
+
+    def send(user_address, is_fraud, on_sent):
+        on_sent(bytes.fromhex('cd' * 32))
+        assert server.job_queue.get(job['id'])['txHash'] == 'cd' * 32
+        return {'status': 'mined', 'txHash': 'cd' * 32}
+
+    monkeypatch.setattr(server.w3.eth, 'get_transaction', dropped)
+    monkeypatch.setattr(server, 'update_fraud_status', send)
+    assert server.process_flag_job(job)['txHash'] == 'cd' * 32
+
+
+def test_reload_model_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    assert client.post('/admin/reload-model').status_code == 403
+    assert client.post('/admin/reload-model', headers={'X-Admin-Token': 'secreT'}).status_code == 403
+    assert client.post('/admin/reload-model', headers={'X-Admin-Token': 'secret'}).status_code == 200
+
+
+@pytest.mark.parametrize('source', ['/etc/passwd', '{root}/../outside.pkl', 42])
+def test_reload_model_only_loads_from_the_model_directory(server, client, monkeypatch, source):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    if isinstance(source, str):
+        source = source.format(root=server.model_source_root)
+    active = server.model_registry.active
+    response = client.post('/admin/reload-model', json={'source': source}, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 400
+    assert server.model_registry.active is active
+
+
+def test_reload_model_accepts_a_source_in_the_model_directory(server, client, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    source = os.path.join(server.model_source_root, 'fraud_detection_model.pkl')
+    response = client.post('/admin/reload-model', json={'source': source}, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['source'] == source
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from startup import Startup
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_tasks_run_concurrently():
+    # Each task waits for the other, so they only finish if they overlap
+    barrier = threading.Barrier(2, timeout=5)
+    startup = Startup().add('model', barrier.wait).add('chain', barrier.wait)
+    assert not startup.ready()
+    startup.start()
+    wait_for(startup.ready)
+    assert startup.status()['readyAfterSeconds'] is not None
+
+
+def test_optional_task_does_not_gate_readiness():
+    release = threading.Event()
+    startup = Startup().add('model', lambda: None).add('chain', release.wait, required=False).start()
+    wait_for(startup.ready)
+    assert startup.status()['tasks']['chain']['status'] == 'running'
+    release.set()
+
+
+def test_failing_task_is_retried_until_it_succeeds():
+    attempts = []
+
+    def load():
+        attempts.append(None)
+        if len(attempts) < 3:
+            raise ConnectionError('node down')
+
+    startup = Startup(retry_interval=0.01).add('model', load).start()
+    wait_for(startup.ready)
+    task = startup.status()['tasks']['model']
+    assert (task['status'], task['attempts'], task['error']) == ('ready', 3, None)
+
+
+def test_status_reports_the_last_error_while_retrying():
+    startup = Startup(retry_interval=60).add('model', lambda: 1 / 0).start()
+    wait_for(lambda: startup.status()['tasks']['model']['status'] == 'failed')
+    status = startup.status()
+    assert status['ready'] is False
+    assert status['tasks']['model']['error'] == 'division by zero'
+
+
+def test_start_twice_runs_each_task_once():
+    calls = []
+    startup = Startup().add('model', lambda: calls.append(None))
+    startup.start()
+    startup.start()
+    wait_for(startup.ready)
+    assert len(calls) == 1
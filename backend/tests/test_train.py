@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import train
+from artifacts import verify_artifacts
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(600, 4)), columns=['Time', 'V1', 'V2', 'Amount'])
+    frame['Amount'] = frame['Amount'] * 50 + 100
+    frame['Class'] = (frame['V1'] + rng.normal(scale=0.5, size=len(frame)) > 1).astype(int)
+    path = tmp_path / 'creditcard.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_split_scales_amount_on_the_training_part_only(csv_path):
+    X_train, X_test, y_train, y_test, scaler, _ = train.load_split(csv_path)
+    assert (len(X_train), len(X_test)) == (480, 120)
+    assert abs(X_train['Amount'].mean()) < 1e-5
+    raw = pd.read_csv(csv_path)
+    assert scaler.mean_[0] == pytest.approx(raw.loc[X_train.index, 'Amount'].mean(), rel=1e-5)
+
+
+def test_fold_resamples_only_its_training_rows(csv_path, tmp_path):
+    X_train, _, y_train, _, _, _ = train.load_split(csv_path)
+    train._save(str(tmp_path), X_train=X_train.to_numpy(np.float32), y_train=y_train.to_numpy(np.int8))
+    train_index, val_index = np.arange(0, 360), np.arange(360, 480)
+    fold_dir = train.prepare_fold(str(tmp_path / 'fold0'), str(tmp_path / 'X_train.npy'),
+                                  str(tmp_path / 'y_train.npy'), train_index, val_index)
+    X_fit, y_fit, X_val, y_val = train._load(fold_dir, 'X_fit', 'y_fit', 'X_val', 'y_val')
+    assert np.bincount(y_fit)[0] == np.bincount(y_fit)[1] == np.bincount(y_train.to_numpy()[train_index])[0]
+    np.testing.assert_array_equal(X_val, X_train.to_numpy(np.float32)[val_index])
+    np.testing.assert_array_equal(y_val, y_train.to_numpy()[val_index])
+    assert 0.5 < train.evaluate({'n_estimators': 5, 'max_depth': 3}, fold_dir)['auc'] <= 1.0
+
+
+def test_main_selects_and_saves_the_best_candidate(csv_path, tmp_path, monkeypatch):
+    results = tmp_path / 'results.json'
+    monkeypatch.setattr(sys, 'argv', [
+        'train.py', csv_path, '--n-estimators', '5', '--max-depth', '2,none', '--folds', '2', '--jobs', '1',
+        '--cache-dir', str(tmp_path / 'cache'), '--results', str(results), '--save', str(tmp_path / 'saved')
+    ])
+    train.main()
+    with open(results) as f:
+        summary = json.load(f)
+    assert len(summary['candidates']) == 2
+    assert summary['best'] == summary['candidates'][0]['params']
+    assert summary['candidates'][0]['meanAuc'] >= summary['candidates'][1]['meanAuc']
+    assert all(len(entry['fitSeconds']) == 2 for entry in summary['candidates'])
+    model = joblib.load(tmp_path / 'saved' / 'fraud_detection_model.pkl')
+    assert model.n_jobs is None
+    assert verify_artifacts(str(tmp_path / 'saved' / 'artifacts'))['featureColumns'] == ['Time', 'V1', 'V2',
+                                                                                          'Amount']
+    # The next run reuses the resampled folds instead of writing them again
+    (split_dir,) = os.listdir(tmp_path / 'cache')
+    fold = tmp_path / 'cache' / split_dir / 'fold0' / 'X_fit.npy'
+    written = os.stat(fold).st_mtime_ns
+    train.main()
+    assert os.stat(fold).st_mtime_ns == written
@@ -0,0 +1,113 @@
+import types
+
+from web3 import Web3
+
+from user_cache import UserStateCache
+
+USER = '0xa29FC23Fa33F1D3c566bD3459Ce17225EadF109A'
+
+
+class FakeChain:
+    """users() and balances per address, plus logs the cache sync reads."""
+
+    def __init__(self):
+        self.users = {}
+        self.balances = {}
+        self.block_number = 10
+        self.logs = {'UserRegistered': [], 'FraudStatusUpdated': []}
+        self.reads = 0
+        self.during_read = None
+        self.to_wei = Web3.to_wei
+        self.eth = self
+        self.functions = types.SimpleNamespace(users=self.user_call)
+        self.events = types.SimpleNamespace(**{
+            name: types.SimpleNamespace(get_logs=lambda from_block, to_block, name=name: [
+                log for log in self.logs[name] if from_block <= log['blockNumber'] <= to_block
+            ]) for name in self.logs
+        })
+
+    def get_balance(self, address):
+        return self.balances.get(address, 0)
+
+    def user_call(self, address):
+        def call():
+            self.reads += 1
+            if self.during_read:
+                self.during_read()
+            return self.users.get(address, (b'', b'', False, False))
+        return types.SimpleNamespace(call=call)
+
+    def emit(self, name, user, **args):
+        self.block_number += 1
+        self.logs[name].append({'blockNumber': self.block_number, 'logIndex': 0, 'args': dict(args, user=user)})
+
+
+def cache_for(chain, **kwargs):
+    return UserStateCache(chain, chain, **kwargs)
+
+
+def test_repeat_gets_are_served_from_the_cache():
+    chain = FakeChain()
+    chain.users[USER] = (b'', b'', True, False)
+    cache = cache_for(chain)
+    assert cache.get(USER)['exists'] is True
+    assert cache.get(USER.lower())['isFraudulent'] is False
+    assert chain.reads == 1
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_peek_does_not_count_as_a_hit():
+    chain = FakeChain()
+    cache = cache_for(chain)
+    assert cache.peek(USER) is None
+    cache.get(USER)
+    assert cache.peek(USER)['exists'] is False
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 1)
+
+
+def test_sync_applies_contract_events_to_cached_entries():
+    chain = FakeChain()
+    cache = cache_for(chain)
+    cache.get(USER)
+    cache.sync()
+    chain.emit('UserRegistered', USER)
+    chain.emit('FraudStatusUpdated', USER, isFraudulent=True)
+    cache.sync()
+    assert (cache.peek(USER)['exists'], cache.peek(USER)['isFraudulent']) == (True, True)
+    assert chain.reads == 1
+
+
+def test_balance_tier_is_read_again_when_needed_after_the_ttl():
+    chain = FakeChain()
+    chain.balances[USER] = Web3.to_wei(1, 'ether')
+    cache = cache_for(chain, balance_ttl=0)
+    assert cache.get(USER, need_balance=True)['balanceTier'] == 'funded'
+    chain.balances[USER] = 0
+    assert cache.get(USER)['balanceTier'] == 'funded'
+    assert cache.get(USER, need_balance=True)['balanceTier'] == 'low'
+
+
+def test_least_recently_used_entry_is_evicted():
+    chain = FakeChain()
+    cache = cache_for(chain, max_size=2)
+    first, second, third = ('0x%040x' % i for i in range(1, 4))
+    cache.get(first)
+    cache.get(second)
+    cache.get(first)
+    cache.get(third)
+    assert cache.peek(second) is None
+    assert cache.peek(first) is not None
+
+
+def test_read_that_races_an_event_is_returned_but_not_cached():
+    chain = FakeChain()
+    cache = cache_for(chain)
+    chain.during_read = lambda: cache.update(USER, isFraudulent=True)
+    assert cache.get(USER)['isFraudulent'] is False
+    assert cache.peek(USER) is None
+
+
+def test_start_twice_runs_one_sync_thread():
+    cache = cache_for(FakeChain(), sync_interval=60)
+    thread = cache.start()._thread
+    assert cache.start()._thread is thread
@@ -0,0 +1,186 @@
+"""Training and model selection, separate from the chain side of ok.py.
+
+Loads the dataset through ingest.py and scales Amount as ok.py does. It holds
+out the same 20% test split and cross-validates every hyperparameter candidate
+across a process pool:
+- SMOTE is applied per fold, on the fold's training part only.
+- The resampled fold arrays are cached as .npy under --cache-dir, keyed by
+  dataset hash, seed and fold count, so later runs skip resampling.
+- Workers memory-map those arrays read-only, so every process shares one copy.
+
+Records wall time, each candidate's fit times and AUC in a results JSON. With
+--save, refits the best candidate and writes the model, test set, scaler and
+memory-mapped artifacts the server loads.
+
+Usage: python train.py path/to/creditcard.csv [--n-estimators 50,100] [--max-depth 10,20,none]
+                       [--min-samples-leaf 1] [--folds 3] [--jobs N] [--results train_results.json]
+                       [--save savedresult_dir]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import joblib
+from imblearn.over_sampling import SMOTE
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from artifacts import write_artifacts
+from ingest import ingest_csv, load_cached
+
+SEED = 42
+
+
+def _save(directory, **arrays):
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+
+
+def _load(directory, *names):
+    return [np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in names]
+
+
+def load_split(csv_path):
+    """Scaled train/test split as in ok.py, plus the fitted scaler and the dataset cache key."""
+    cache = ingest_csv(csv_path)
+    X, y = load_cached(cache)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEED)
+    # Fitted on the training split only, so the holdout AUC is not flattered by test statistics
+    scaler = StandardScaler().fit(X_train[['Amount']])
+    X_train, X_test = X_train.copy(), X_test.copy()
+    X_train['Amount'] = scaler.transform(X_train[['Amount']])
+    X_test['Amount'] = scaler.transform(X_test[['Amount']])
+    return X_train, X_test, y_train, y_test, scaler, os.path.basename(cache)
+
+
+def prepare_fold(fold_dir, X_train_path, y_train_path, train_index, val_index):
+    if os.path.exists(os.path.join(fold_dir, 'done')):
+        return fold_dir
+    X, y = _load(os.path.dirname(X_train_path), 'X_train', 'y_train')
+    X_fit, y_fit = SMOTE(random_state=SEED).fit_resample(X[train_index], y[train_index])
+    os.makedirs(fold_dir, exist_ok=True)
+    _save(fold_dir, X_fit=X_fit.astype(np.float32), y_fit=y_fit.astype(np.int8),
+          X_val=X[val_index], y_val=y[val_index])
+    open(os.path.join(fold_dir, 'done'), 'w').close()
+    return fold_dir
+
+
+def evaluate(params, fold_dir):
+    X_fit, y_fit, X_val, y_val = _load(fold_dir, 'X_fit', 'y_fit', 'X_val', 'y_val')
+    model = RandomForestClassifier(random_state=SEED, n_jobs=1, **params)
+    started = time.perf_counter()
+    model.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - started
+    scores = model.predict_proba(X_val)[:, list(model.classes_).index(1)]
+    return {'params': params, 'fold': os.path.basename(fold_dir), 'fitSeconds': fit_seconds,
+            'auc': float(roc_auc_score(y_val, scores))}
+
+
+def parse_values(text, cast):
+    return [None if value.lower() == 'none' else cast(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('csv')
+    parser.add_argument('--n-estimators', default='50,100')
+    parser.add_argument('--max-depth', default='10,20')
+    parser.add_argument('--min-samples-leaf', default='1')
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--cache-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.train_cache'))
+    parser.add_argument('--results', default='train_results.json')
+    parser.add_argument('--save', help='directory for the refitted best model (e.g. savedresult)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    X_train, X_test, y_train, y_test, scaler, dataset_key = load_split(args.csv)
+    key = hashlib.sha256(f'{dataset_key}|{args.folds}|{SEED}'.encode()).hexdigest()[:16]
+    split_dir = os.path.join(args.cache_dir, key)
+    os.makedirs(split_dir, exist_ok=True)
+    if not os.path.exists(os.path.join(split_dir, 'y_train.npy')):
+        _save(split_dir, X_train=X_train.to_numpy(np.float32), y_train=y_train.to_numpy(np.int8))
+
+    candidates = [
+        {'n_estimators': n, 'max_depth': depth, 'min_samples_leaf': leaf}
+        for n, depth, leaf in itertools.product(parse_values(args.n_estimators, int),
+                                                 parse_values(args.max_depth, int),
+                                                 parse_values(args.min_samples_leaf, int))
+    ]
+    folds = list(StratifiedKFold(args.folds, shuffle=True, random_state=SEED).split(X_train, y_train))
+
+    with ProcessPoolExecutor(args.jobs) as pool:
+        prep_started = time.perf_counter()
+        fold_dirs = list(pool.map(
+            prepare_fold,
+            [os.path.join(split_dir, f'fold{i}') for i in range(len(folds))],
+            [os.path.join(split_dir, 'X_train.npy')] * len(folds),
+            [os.path.join(split_dir, 'y_train.npy')] * len(folds),
+            [train_index for train_index, _ in folds],
+            [val_index for _, val_index in folds]
+        ))
+        prep_seconds = time.perf_counter() - prep_started
+        tasks = [(params, fold_dir) for params in candidates for fold_dir in fold_dirs]
+        evaluations = list(pool.map(evaluate, *zip(*tasks)))
+
+    summary = []
+    for params in candidates:
+        runs = [run for run in evaluations if run['params'] == params]
+        aucs = [run['auc'] for run in runs]
+        summary.append({
+            'params': params,
+            'meanAuc': float(np.mean(aucs)),
+            'stdAuc': float(np.std(aucs)),
+            'fitSeconds': [run['fitSeconds'] for run in runs],
+            'meanFitSeconds': float(np.mean([run['fitSeconds'] for run in runs])),
+        })
+    summary.sort(key=lambda entry: entry['meanAuc'], reverse=True)
+    best = summary[0]
+    results = {
+        'dataset': os.path.abspath(args.csv),
+        'datasetKey': dataset_key,
+        'folds': args.folds,
+        'jobs': args.jobs,
+        'foldPrepSeconds': prep_seconds,
+        'candidates': summary,
+        'best': best['params'],
+    }
+    print(f"{'candidate':<48}{'AUC':>16}{'fit s':>10}")
+    for entry in summary:
+        print(f"{json.dumps(entry['params']):<48}{entry['meanAuc']:>10.4f}±{entry['stdAuc']:.3f}"
+              f"{entry['meanFitSeconds']:>10.1f}")
+
+    if args.save:
+        X_fit, y_fit = SMOTE(random_state=SEED).fit_resample(X_train, y_train)
+        model = RandomForestClassifier(random_state=SEED, n_jobs=args.jobs, **best['params'])
+        fit_started = time.perf_counter()
+        model.fit(X_fit, y_fit)
+        results['refitSeconds'] = time.perf_counter() - fit_started
+        # Served one row at a time; a per-call joblib pool would dominate predict_proba latency
+        model.n_jobs = None
+        results['holdoutAuc'] = float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+        os.makedirs(args.save, exist_ok=True)
+        joblib.dump(model, os.path.join(args.save, 'fraud_detection_model.pkl'))
+        joblib.dump(X_test, os.path.join(args.save, 'X_test.pkl'))
+        joblib.dump(y_test, os.path.join(args.save, 'y_test.pkl'))
+        joblib.dump(scaler, os.path.join(args.save, 'scaler.pkl'))
+        write_artifacts(os.path.join(args.save, 'artifacts'), model, X_test, y_test)
+        print(f"Best model refitted in {results['refitSeconds']:.1f}s, holdout AUC {results['holdoutAuc']:.4f}, "
+              f"saved to {args.save}")
+
+    results['wallSeconds'] = time.perf_counter() - started
+    with open(args.results, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"{len(candidates)} candidates x {args.folds} folds in {results['wallSeconds']:.1f}s; "
+          f"results in {args.results}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+
+from rpc import read_user_state
+
+
+class UserStateCache:
+    """LRU cache of on-chain user state (exists, isFraudulent, balance tier).
+
+    Entries are kept correct by following UserRegistered and FraudStatusUpdated
+    logs from the last synced block, so a cached address needs no RPC at all.
+    Balances have no events, so the balance tier expires after balance_ttl seconds.
+    A miss reads the node outside the lock; if an event for that address is
+    applied meanwhile, the read may predate it and is returned but not cached.
+    """
+
+    def __init__(self, w3, contract, max_size=10000, balance_ttl=30.0, sync_interval=2.0,
+                 min_balance_ether=0.01):
+        self.w3 = w3
+        self.contract = contract
+        self.max_size = max_size
+        self.balance_ttl = balance_ttl
+        self.sync_interval = sync_interval
+        self.min_balance = w3.to_wei(min_balance_ether, 'ether')
+        self.last_block = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # address -> [readers, generation] while a miss is reading it from the node
+        self._reads = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.last_block = self.w3.eth.block_number
+            self._thread = threading.Thread(target=self._run, name='user-cache-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Error syncing user cache: {e}")
+
+    def sync(self):
+        latest = self.w3.eth.block_number
+        if self.last_block is None:
+            self.last_block = latest
+            return
+        if latest <= self.last_block:
+            return
+        from_block = self.last_block + 1
+        registered = self.contract.events.UserRegistered.get_logs(from_block=from_block, to_block=latest)
+        updated = self.contract.events.FraudStatusUpdated.get_logs(from_block=from_block, to_block=latest)
+        with self._lock:
+            for log in registered:
+                self._changed(log['args']['user'].lower())
+                entry = self._entries.get(log['args']['user'].lower())
+                if entry is not None:
+                    entry['exists'] = True
+            for log in sorted(updated, key=lambda log: (log['blockNumber'], log['logIndex'])):
+                self._changed(log['args']['user'].lower())
+                entry = self._entries.get(log['args']['user'].lower())
+                if entry is not None:
+                    entry['exists'] = True
+                    entry['isFraudulent'] = log['args']['isFraudulent']
+        self.last_block = latest
+
+    def _changed(self, key):
+        # Called under the lock; invalidates node reads of key that are in flight
+        read = self._reads.get(key)
+        if read is not None:
+            read[1] += 1
+
+    def _end_read(self, key, read):
+        read[0] -= 1
+        if read[0] == 0:
+            del self._reads[key]
+
+    def peek(self, address):
+        """Cached state without touching the node, or None. Not counted in hits or misses."""
+        with self._lock:
+            entry = self._entries.get(address.lower())
+            if entry is None:
+                return None
+            self._entries.move_to_end(address.lower())
+            return dict(entry)
+
+    def get(self, address, need_balance=False):
+        key = address.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh_balance = entry is not None and entry['balanceTier'] is not None \
+                and time.monotonic() - entry['balanceCheckedAt'] < self.balance_ttl
+            if entry is not None and (not need_balance or fresh_balance):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+            read = self._reads.setdefault(key, [0, 0])
+            read[0] += 1
+            generation = read[1]
+
+        # The balance rides along in the same JSON-RPC batch as users(), so fetch both
+        try:
+            balance, user = read_user_state(self.w3, self.contract, address)
+        except Exception:
+            with self._lock:
+                self._end_read(key, read)
+            raise
+        entry = {
+            'exists': user[2],
+            'isFraudulent': user[3],
+            'balanceTier': 'funded' if balance >= self.min_balance else 'low',
+            'balanceCheckedAt': time.monotonic()
+        }
+        with self._lock:
+            self._end_read(key, read)
+            if read[1] != generation:
+                # An event for this address was applied during the read, which may predate it
+                return dict(entry)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return dict(entry)
+
+    def update(self, address, **fields):
+        # Write-through after our own transactions are mined; the logs confirm it later
+        with self._lock:
+            self._changed(address.lower())
+            entry = self._entries.get(address.lower())
+            if entry is not None:
+                entry.update(fields)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {'size': size, 'maxSize': self.max_size, 'hits': self.hits, 'misses': self.misses,
+                'lastBlock': self.last_block}
@@ -55,6 +55,15 @@ contract UserAuth {
         emit FraudStatusUpdated(userAddress, isFraud);
     }
 
+    function batchUpdateFraudStatus(address[] calldata userAddresses, bool[] calldata isFraud) public onlyOwner {
+        require(userAddresses.length == isFraud.length, "Array length mismatch");
+        for (uint256 i = 0; i < userAddresses.length; i++) {
+            require(users[userAddresses[i]].exists, "User does not exist");
+            users[userAddresses[i]].isFraudulent = isFraud[i];
+            emit FraudStatusUpdated(userAddresses[i], isFraud[i]);
+        }
+    }
+
     function isUserFraudulent(address userAddress) public view returns (bool) {
         return users[userAddress].isFraudulent;
     }
@@ -21,4 +21,28 @@ contract("UserAuth", accounts => {
     const loginResult = await instance.login.call("bob", "password456", "2025-05-24", { from: accounts[2] }); // Use .call() for view function
     assert.equal(loginResult, false, "Fraudulent user should not login");
   });
+
+  it("should update fraud status in bulk", async () => {
+    const instance = await UserAuth.deployed();
+    await instance.register("carol", "password789", { from: accounts[3] });
+    await instance.register("dave", "password000", { from: accounts[4] });
+    const result = await instance.batchUpdateFraudStatus(
+      [accounts[3], accounts[4], accounts[2]], [true, true, false], { from: accounts[0] }
+    );
+    const events = result.logs.filter(log => log.event === "FraudStatusUpdated");
+    assert.equal(events.length, 3, "One FraudStatusUpdated event per entry");
+    assert.equal(await instance.isUserFraudulent(accounts[3]), true, "carol should be flagged");
+    assert.equal(await instance.isUserFraudulent(accounts[4]), true, "dave should be flagged");
+    assert.equal(await instance.isUserFraudulent(accounts[2]), false, "bob should be cleared");
+  });
+
+  it("should reject bulk updates with mismatched arrays", async () => {
+    const instance = await UserAuth.deployed();
+    try {
+      await instance.batchUpdateFraudStatus([accounts[3]], [true, false], { from: accounts[0] });
+      assert.fail("Mismatched arrays should revert");
+    } catch (error) {
+      assert.include(error.message, "Array length mismatch");
+    }
+  });
 });
\ No newline at end of file